@@ -2,6 +2,7 @@ import streamlit as st
 import pandas as pd
 import sweetviz as sv
 import os
+import shutil
 import tempfile
 import warnings
 from io import BytesIO
@@ -134,7 +135,50 @@ def load_excel_sheets(uploaded_file):
         st.error(f"❌ Error reading Excel file: {str(e)}")
         return []
 
-def load_data(uploaded_file, file_type, sheet_name=None):
+SAS_CHUNK_ROWS = 100_000
+
+def stage_sas_file(uploaded_file):
+    """Copy a SAS upload to a temp file once per upload (streamed, not via getvalue)"""
+    staged = st.session_state.get('sas_staged')
+    if staged and staged['file_id'] == uploaded_file.file_id and os.path.exists(staged['path']):
+        return staged['path']
+    if staged and os.path.exists(staged['path']):
+        os.unlink(staged['path'])
+    
+    uploaded_file.seek(0)
+    with tempfile.NamedTemporaryFile(delete=False, suffix='.sas7bdat') as tmp_file:
+        shutil.copyfileobj(uploaded_file, tmp_file, length=16 * 1024**2)
+        tmp_path = tmp_file.name
+    uploaded_file.seek(0)
+    st.session_state['sas_staged'] = {'file_id': uploaded_file.file_id, 'path': tmp_path}
+    return tmp_path
+
+def load_sas_metadata(uploaded_file):
+    """Read only the SAS header: row count, column names and labels"""
+    with pd.read_sas(stage_sas_file(uploaded_file), format='sas7bdat', iterator=True, encoding='utf-8') as reader:
+        return {
+            'rows': reader.row_count,
+            'columns': list(reader.column_names),
+            'labels': [column.label for column in reader.columns]
+        }
+
+def read_sas_chunked(path, columns=None, row_limit=None, chunk_rows=SAS_CHUNK_ROWS):
+    """Read a SAS file in chunks, keeping only the selected columns and rows"""
+    chunks = []
+    rows_read = 0
+    with pd.read_sas(path, format='sas7bdat', chunksize=chunk_rows, encoding='utf-8') as reader:
+        for chunk in reader:
+            if columns:
+                chunk = chunk[columns]
+            if row_limit:
+                chunk = chunk.iloc[:row_limit - rows_read]
+            chunks.append(chunk)
+            rows_read += len(chunk)
+            if row_limit and rows_read >= row_limit:
+                break
+    return pd.concat(chunks, ignore_index=True)
+
+def load_data(uploaded_file, file_type, sheet_name=None, sas_columns=None, sas_row_limit=None):
     """Load data from uploaded file"""
     try:
         if file_type == "CSV":
@@ -153,12 +197,7 @@ def load_data(uploaded_file, file_type, sheet_name=None):
                 else:
                     df = pd.read_excel(uploaded_file, engine='openpyxl')
         elif file_type == "SAS":
-            with tempfile.NamedTemporaryFile(delete=False, suffix='.sas7bdat') as tmp_file:
-                tmp_file.write(uploaded_file.getvalue())
-                tmp_path = tmp_file.name
-            
-            df = pd.read_sas(tmp_path, encoding='utf-8')
-            os.unlink(tmp_path)
+            df = read_sas_chunked(stage_sas_file(uploaded_file), sas_columns, sas_row_limit)
         else:
             raise ValueError("Unsupported file format")
         
@@ -243,9 +282,36 @@ def main():
                         help="Choose which sheet to analyze"
                     )
             
+            # SAS column/row selection from the header only - NO DATA READ YET
+            sas_columns, sas_row_limit = None, None
+            if file_type == "SAS":
+                st.markdown("#### 📋 SAS Dataset Selection")
+                try:
+                    metadata = load_sas_metadata(uploaded_file)
+                except Exception as e:
+                    st.error(f"❌ Error reading SAS metadata: {str(e)}")
+                    metadata = None
+                if metadata:
+                    st.caption(f"{metadata['rows']:,} rows × {len(metadata['columns']):,} columns")
+                    with st.expander("🏷️ Column Labels"):
+                        st.dataframe(pd.DataFrame({'Column': metadata['columns'], 'Label': metadata['labels']}),
+                                     use_container_width=True)
+                    sas_columns = st.multiselect(
+                        "Select the columns to analyze:",
+                        metadata['columns'],
+                        default=metadata['columns'],
+                        help="Only the selected columns are kept in memory"
+                    ) or None
+                    sas_row_limit = st.number_input(
+                        "Rows to analyze (0 for all):",
+                        min_value=0,
+                        value=0,
+                        step=10_000
+                    ) or None
+            
             # Load data
             with st.spinner("📥 Loading data..."):
-                df = load_data(uploaded_file, file_type, selected_sheet)
+                df = load_data(uploaded_file, file_type, selected_sheet, sas_columns, sas_row_limit)
             
             if df is not None:
                 # Convert dtypes to string to fix Arrow serialization issue
@@ -0,0 +1,149 @@
+"""
+Aggregation Engine
+Cached, cardinality-aware value counts and groupby for the visualization tab
+"""
+
+import numpy as np
+import pandas as pd
+
+from history import cached_by_version
+from dtype_optimizer import is_category_profitable
+import polars_backend
+
+
+OTHER_LABEL = "Other"
+DEFAULT_TOP_K = 30
+APPROXIMATE_THRESHOLD = 1_000_000      # rows above which sampling is offered
+APPROXIMATE_SAMPLE_ROWS = 200_000
+ADDITIVE_AGGREGATIONS = ('sum', 'count')
+
+
+# ==================== Helpers ====================
+def compact_column(df, column):
+    """Return ``df[column]``, converted to category (and cached) when profitable"""
+    series = df[column]
+    if not is_category_profitable(series):
+        return series
+    return cached_by_version('categorical', column, [column], lambda: series.astype('category'))
+
+
+def _sample_positions(n_rows, sample_rows, seed=0):
+    rng = np.random.default_rng(seed)
+    return np.sort(rng.choice(n_rows, size=sample_rows, replace=False))
+
+
+# ==================== Value Counts ====================
+def _value_counts(df, column, approximate, sample_rows):
+    if not approximate and polars_backend.use_polars(df):
+        try:
+            return polars_backend.value_counts(df, column)
+        except polars_backend.BACKEND_ERRORS:
+            pass
+    series = compact_column(df, column)
+    if approximate and len(series) > sample_rows:
+        sampled = series.iloc[_sample_positions(len(series), sample_rows)]
+        counts = sampled.value_counts()
+        counts = (counts * (len(series) / sample_rows)).round().astype('int64')
+    else:
+        counts = series.value_counts()
+    # Categoricals report unobserved categories with a zero count
+    return counts[counts > 0]
+
+
+def value_counts_table(df, column, top_k=None, approximate=False, sample_rows=APPROXIMATE_SAMPLE_ROWS):
+    """
+    Value counts of a column with an optional top-K + "Other" bucket
+
+    Parameters:
+    -----------
+    df : pd.DataFrame
+        Session DataFrame
+    column : str
+        Column to count
+    top_k : int
+        Keep the K most frequent values and fold the rest into "Other" (None for all)
+    approximate : bool
+        Count a uniform random sample and scale the counts up
+    sample_rows : int
+        Sample size in approximate mode
+
+    Returns:
+    --------
+    tuple : (pd.DataFrame with Value/Count/Percentage, number of distinct values)
+    """
+    counts = cached_by_version(
+        'value_counts', (column, approximate, sample_rows), [column],
+        lambda: _value_counts(df, column, approximate, sample_rows)
+    )
+    n_unique = len(counts)
+    total_count = len(df)
+
+    values = counts.index.astype(str)
+    numbers = counts.to_numpy()
+    if top_k is not None and n_unique > top_k:
+        values = list(values[:top_k]) + [f"{OTHER_LABEL} ({n_unique - top_k:,} values)"]
+        numbers = np.append(numbers[:top_k], numbers[top_k:].sum())
+
+    table = pd.DataFrame({
+        'Value': values,
+        'Count': numbers,
+        'Percentage': (numbers / total_count * 100).round(2) if total_count else 0.0
+    })
+    return table, n_unique
+
+
+# ==================== GroupBy ====================
+def _groupby(df, groupby_cols, agg_col, agg_type, approximate, sample_rows):
+    if not approximate and polars_backend.use_polars(df):
+        try:
+            return polars_backend.groupby(df, groupby_cols, agg_col, agg_type)
+        except polars_backend.BACKEND_ERRORS:
+            pass
+    keys = [compact_column(df, col) for col in groupby_cols]
+    values = df[agg_col]
+    scale = 1.0
+    if approximate and len(df) > sample_rows:
+        positions = _sample_positions(len(df), sample_rows)
+        keys = [key.iloc[positions] for key in keys]
+        values = values.iloc[positions]
+        scale = len(df) / sample_rows
+
+    grouped = values.groupby(keys, observed=True).agg(agg_type)
+    if scale != 1.0 and agg_type in ADDITIVE_AGGREGATIONS:
+        grouped = grouped * scale
+    grouped = grouped.reset_index()
+    grouped.columns = list(groupby_cols) + [f"{agg_type}_{agg_col}"]
+    return grouped
+
+
+def groupby_table(df, groupby_cols, agg_col, agg_type, top_k=None, approximate=False,
+                  sample_rows=APPROXIMATE_SAMPLE_ROWS):
+    """
+    GroupBy aggregation with an optional top-K limit
+
+    The K groups with the largest aggregate are kept. For additive
+    aggregations (sum, count) the remaining groups are folded into an
+    "Other" row; for the others the table is simply truncated.
+
+    Returns:
+    --------
+    tuple : (pd.DataFrame, total number of groups)
+    """
+    grouped = cached_by_version(
+        'groupby', (tuple(groupby_cols), agg_col, agg_type, approximate, sample_rows),
+        list(groupby_cols) + [agg_col],
+        lambda: _groupby(df, groupby_cols, agg_col, agg_type, approximate, sample_rows)
+    )
+    n_groups = len(grouped)
+    if top_k is None or n_groups <= top_k:
+        return grouped, n_groups
+
+    value_col = grouped.columns[-1]
+    ranked = grouped.sort_values(value_col, ascending=False, kind='mergesort')
+    top = ranked.iloc[:top_k]
+    if agg_type in ADDITIVE_AGGREGATIONS:
+        other = {col: f"{OTHER_LABEL} ({n_groups - top_k:,} groups)" for col in groupby_cols}
+        other[value_col] = ranked[value_col].iloc[top_k:].sum()
+        top = pd.concat([top.astype({col: object for col in groupby_cols}), pd.DataFrame([other])],
+                        ignore_index=True)
+    return top.reset_index(drop=True), n_groups
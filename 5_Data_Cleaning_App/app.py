@@ -5,16 +5,40 @@ A comprehensive Streamlit app for data upload, cleaning, and exploration
 
 import streamlit as st
 import pandas as pd
-import io
+import os
 from datetime import datetime
 import openpyxl
-import pyreadstat
 import plotly.express as px
 import plotly.graph_objects as go
 from utalities import view_dataframe
+from ingestion import read_csv_chunked, sniff_delimited_file, DEFAULT_MEMORY_LIMIT_MB, ON_LIMIT_OPTIONS
+from workbooks import open_workbook, read_sheet, parse_all_sheets, available_engines, EXCEL_ENGINES
+from sas_reader import stage_sas_file, read_sas_metadata, read_sas, PARALLEL_READ_ROWS
+from dtype_optimizer import optimize_dtypes, restore_dtypes, memory_report
+from pipeline import pipeline_to_json, load_pipeline
+from value_index import (value_index, refresh_value_index, replace_in_index, unique_values,
+                         value_counts_frame, count_rows, row_positions)
+from missingness import (null_counts, null_summary, null_rows, co_missingness,
+                         missingness_patterns, missingness_heatmap)
+from session_store import store_dataset, get_original_df, get_session_dir
+import polars_backend
+from history import (run_operation, undo, redo, can_undo, can_redo, reset_history,
+                     reset_to_original, applied_operations, describe_operation, dataset_version)
+from exporters import build_export, EXPORT_FORMATS
+from change_report import change_report, build_change_report_export, REMOVED_PREVIEW_ROWS
+from profiling import column_profiles, describe_table, info_table
+from duplicates import find_duplicates, find_near_duplicates, default_normalizer, NORMALIZERS
+from aggregation import (value_counts_table, groupby_table, DEFAULT_TOP_K,
+                         APPROXIMATE_THRESHOLD, APPROXIMATE_SAMPLE_ROWS)
 
 
 # ==================== Configuration ====================
+# The working DataFrame shares column buffers with the memory-mapped original
+# (session_store.py) and history snapshots: with copy-on-write pandas copies a
+# column the first time it is modified instead of writing into shared, read-only
+# buffers. Enabled here, once per process, rather than on import of a helper module.
+pd.set_option('mode.copy_on_write', True)
+
 st.set_page_config(
     page_title="Data Cleaning & Exploration Tool",
     page_icon="🧹",
@@ -83,6 +107,14 @@ def show_df_info(df, title="DataFrame"):
     
     st.subheader(f"📊 {title}")
     
+    # Reuse the versioned column profiles for the session dataset
+    if df is st.session_state.get('df'):
+        info_df = info_table(column_profiles(df))
+        memory_usage = info_df['Memory Usage (bytes)'].sum() + df.index.memory_usage()
+    else:
+        info_df = None
+        memory_usage = df.memory_usage(deep=True).sum()
+    
     # Display shape
     col1, col2, col3 = st.columns(3)
     with col1:
@@ -90,62 +122,59 @@ def show_df_info(df, title="DataFrame"):
     with col2:
         st.metric("Total Columns", f"{df.shape[1]:,}")
     with col3:
-        st.metric("Memory Usage", f"{df.memory_usage(deep=True).sum() / 1024**2:.2f} MB")
+        st.metric("Memory Usage", f"{memory_usage / 1024**2:.2f} MB")
+    
+    # Effect of the dtype optimizer pass on the uploaded data
+    dtype_report = st.session_state.get('dtype_report')
+    if info_df is not None and dtype_report and dtype_report['columns']:
+        saved = 1 - dtype_report['after'] / dtype_report['before'] if dtype_report['before'] else 0.0
+        st.caption(f"⚡ Dtype optimizer: {dtype_report['before'] / 1024**2:.2f} MB → "
+                   f"{dtype_report['after'] / 1024**2:.2f} MB after upload ({saved:.0%} saved, "
+                   f"{dtype_report['columns']} column(s) converted; original types are restored on export)")
     
     # Display column data types
     with st.expander("📋 Column Data Types", expanded=False):
-        dtype_df = pd.DataFrame({
-            'Column': df.columns,
-            'Data Type': df.dtypes.values,
-            'Non-Null Count': df.count().values,
-            'Null Count': df.isnull().sum().values
-        })
+        if info_df is not None:
+            dtype_df = info_df[['Column', 'Dtype', 'Non-Null Count', 'Null Count']].rename(
+                columns={'Dtype': 'Data Type'}
+            )
+        else:
+            dtype_df = pd.DataFrame({
+                'Column': df.columns,
+                'Data Type': df.dtypes.values,
+                'Non-Null Count': df.count().values,
+                'Null Count': df.isnull().sum().values
+            })
         st.dataframe(dtype_df, use_container_width=True)
 
 
-def detect_delimiter_and_encoding(file_content, filename):
+def detect_delimiter_and_encoding(uploaded_file):
     """
     Auto-detect delimiter and encoding for CSV/TSV files
     
+    Only a bounded head and tail sample of the file is inspected, and the
+    result is cached per file hash.
+    
     Parameters:
     -----------
-    file_content : bytes
-        File content
-    filename : str
-        Name of the file
+    uploaded_file : UploadedFile
+        Streamlit uploaded file object
         
     Returns:
     --------
-    tuple : (delimiter, encoding)
+    dict : 'delimiter', 'encoding' and 'confidence' (0-1) of the detection
     """
-    # Try different encodings
-    encodings = ['utf-8', 'utf-8-sig', 'latin1', 'cp1252', 'iso-8859-1']
-    detected_encoding = 'utf-8'
-    
-    for encoding in encodings:
-        try:
-            file_content.decode(encoding)
-            detected_encoding = encoding
-            break
-        except:
-            continue
-    
-    # Detect delimiter
-    if filename.lower().endswith('.tsv'):
-        return '\t', detected_encoding
-    
-    # Try to detect delimiter from first line
     try:
-        first_line = file_content.decode(detected_encoding, errors='ignore').split('\n')[0]
-        delimiters = [',', ';', '\t', '|']
-        delimiter_counts = {d: first_line.count(d) for d in delimiters}
-        detected_delimiter = max(delimiter_counts, key=delimiter_counts.get)
-        return detected_delimiter, detected_encoding
-    except:
-        return ',', detected_encoding
+        return sniff_delimited_file(uploaded_file, uploaded_file.name)
+    except Exception:
+        uploaded_file.seek(0)
+        delimiter = '\t' if uploaded_file.name.lower().endswith('.tsv') else ','
+        return {'delimiter': delimiter, 'encoding': 'utf-8', 'confidence': 0.0}
 
 
-def load_file(uploaded_file, delimiter=',', encoding='utf-8', sheet_name=0):
+def load_file(uploaded_file, delimiter=',', encoding='utf-8', sheet_name=0,
+              memory_limit_mb=DEFAULT_MEMORY_LIMIT_MB, on_limit='sample', excel_engine='auto',
+              columns=None, row_limit=None, parallel=False):
     """
     Load file into pandas DataFrame with auto-detection
     
@@ -159,6 +188,18 @@ def load_file(uploaded_file, delimiter=',', encoding='utf-8', sheet_name=0):
         Encoding for CSV/TSV files
     sheet_name : str or int
         Sheet name or index for Excel files
+    memory_limit_mb : int
+        Memory ceiling for CSV/TSV ingestion, in MB
+    on_limit : str
+        What to do when the ceiling is hit: 'sample' or 'spill'
+    excel_engine : str
+        Excel reader engine (see EXCEL_ENGINES)
+    columns : list
+        Columns to load from SAS files (None for all)
+    row_limit : int
+        Load only the first rows of SAS files (None for all)
+    parallel : bool
+        Read SAS files with several worker processes
         
     Returns:
     --------
@@ -166,30 +207,62 @@ def load_file(uploaded_file, delimiter=',', encoding='utf-8', sheet_name=0):
     """
     try:
         file_extension = uploaded_file.name.split('.')[-1].lower()
+        # A previous upload's spilled data is replaced by this one
+        previous_info = st.session_state.pop('ingest_info', None)
+        if previous_info and previous_info.get('spill_path') and os.path.exists(previous_info['spill_path']):
+            os.unlink(previous_info['spill_path'])
         
         if file_extension in ['csv', 'tsv', 'txt']:
-            # Try with detected encoding first, then fallback
+            # Stream in chunks with the detected encoding first, then fallback
+            progress_bar = st.progress(0.0, text="Reading file...")
+            
+            def update_progress(fraction, rows_read):
+                progress_bar.progress(fraction, text=f"Reading file... {rows_read:,} rows")
+            
+            df = None
+            fits_in_memory = uploaded_file.size * polars_backend.CSV_EXPANSION <= memory_limit_mb * 1024 ** 2
+            if polars_backend.use_polars() and fits_in_memory:
+                try:
+                    df, ingest_info = polars_backend.read_csv(uploaded_file, delimiter=delimiter, encoding=encoding)
+                except polars_backend.BACKEND_ERRORS:
+                    uploaded_file.seek(0)
+            
             try:
-                df = pd.read_csv(uploaded_file, delimiter=delimiter, encoding=encoding)
-            except:
+                if df is None:
+                    df, ingest_info = read_csv_chunked(
+                        uploaded_file, delimiter=delimiter, encoding=encoding,
+                        memory_limit_mb=memory_limit_mb, on_limit=on_limit,
+                        progress_callback=update_progress, spill_dir=get_session_dir()
+                    )
+            except UnicodeDecodeError:
+                # Only bad bytes warrant re-reading the whole file as latin1
                 uploaded_file.seek(0)
-                df = pd.read_csv(uploaded_file, delimiter=delimiter, encoding='latin1')
+                df, ingest_info = read_csv_chunked(
+                    uploaded_file, delimiter=delimiter, encoding='latin1',
+                    memory_limit_mb=memory_limit_mb, on_limit=on_limit,
+                    progress_callback=update_progress, spill_dir=get_session_dir()
+                )
+            progress_bar.empty()
+            st.session_state['ingest_info'] = ingest_info
         
         elif file_extension in ['xlsx', 'xls']:
-            df = pd.read_excel(uploaded_file, sheet_name=sheet_name, engine='openpyxl')
+            # The workbook is opened once and each sheet is parsed at most once
+            workbook_info = open_workbook(uploaded_file, uploaded_file.name, excel_engine)
+            if isinstance(sheet_name, int):
+                sheet_name = workbook_info['sheets'][sheet_name]
+            df = read_sheet(uploaded_file, workbook_info, sheet_name)
         
         elif file_extension == 'sas7bdat':
-            # Save uploaded file temporarily
-            import tempfile
-            with tempfile.NamedTemporaryFile(delete=False, suffix='.sas7bdat') as tmp_file:
-                tmp_file.write(uploaded_file.getvalue())
-                tmp_path = tmp_file.name
+            # Reuse the file staged for the metadata preview when there is one
+            sas_file = open_sas_file(uploaded_file)
+            progress_bar = st.progress(0.0, text="Reading file...")
             
-            df, meta = pyreadstat.read_sas7bdat(tmp_path)
+            def update_progress(fraction, rows_read):
+                progress_bar.progress(fraction, text=f"Reading file... {rows_read:,} rows")
             
-            # Clean up temp file
-            import os
-            os.unlink(tmp_path)
+            df = read_sas(sas_file['path'], sas_file['metadata'], columns=columns, row_limit=row_limit,
+                          parallel=parallel, progress_callback=update_progress)
+            progress_bar.empty()
         
         else:
             st.error(f"❌ Unsupported file format: .{file_extension}")
@@ -202,32 +275,183 @@ def load_file(uploaded_file, delimiter=',', encoding='utf-8', sheet_name=0):
         return None
 
 
-def get_excel_sheet_names(uploaded_file):
+def get_excel_sheet_names(uploaded_file, excel_engine='auto'):
     """
     Get all sheet names from an Excel file
     
+    The workbook handle opened here is cached and reused by ``load_file``.
+    
     Parameters:
     -----------
     uploaded_file : UploadedFile
         Streamlit uploaded file object
+    excel_engine : str
+        Excel reader engine (see EXCEL_ENGINES)
         
     Returns:
     --------
     list : List of sheet names
     """
     try:
-        excel_file = pd.ExcelFile(uploaded_file, engine='openpyxl')
-        return excel_file.sheet_names
+        return open_workbook(uploaded_file, uploaded_file.name, excel_engine)['sheets']
     except Exception as e:
         st.error(f"❌ Error reading Excel file: {str(e)}")
         return []
 
 
+def open_sas_file(uploaded_file):
+    """
+    Stage a SAS upload on disk and read its metadata (no data rows)
+    
+    The result is kept in the session per uploaded file, so reruns and the
+    final load reuse the staged copy.
+    
+    Parameters:
+    -----------
+    uploaded_file : UploadedFile
+        Streamlit uploaded file object
+        
+    Returns:
+    --------
+    dict : 'file_id', 'path' and 'metadata' (see ``read_sas_metadata``)
+    """
+    sas_file = st.session_state.get('sas_file')
+    if sas_file is None or sas_file['file_id'] != uploaded_file.file_id:
+        path = stage_sas_file(uploaded_file)
+        sas_file = {'file_id': uploaded_file.file_id, 'path': path, 'metadata': read_sas_metadata(path)}
+        st.session_state['sas_file'] = sas_file
+    return sas_file
+
+
+def sas_load_section(uploaded_file):
+    """Preview SAS metadata and choose the columns and rows to load"""
+    with st.spinner(f"Reading metadata of {uploaded_file.name}..."):
+        metadata = open_sas_file(uploaded_file)['metadata']
+    
+    st.subheader("📋 SAS Dataset Preview")
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("Rows", f"{metadata['rows']:,}" if metadata['rows'] is not None else "Unknown")
+    with col2:
+        st.metric("Columns", len(metadata['columns']))
+    with col3:
+        st.metric("Encoding", metadata['encoding'] or "Unknown")
+    if metadata['file_label']:
+        st.caption(f"Dataset label: {metadata['file_label']}")
+    st.dataframe(metadata['variables'], use_container_width=True, hide_index=True)
+    
+    columns = st.multiselect(
+        "Columns to load",
+        options=metadata['columns'],
+        default=metadata['columns'],
+        help="Only the selected columns are decoded",
+        key="sas_columns"
+    )
+    col1, col2 = st.columns(2)
+    with col1:
+        row_limit = st.number_input(
+            "Rows to load (0 for all)",
+            min_value=0,
+            value=0,
+            step=10_000,
+            key="sas_row_limit"
+        )
+    with col2:
+        parallel = st.checkbox(
+            "Read with multiple processes",
+            value=(metadata['rows'] or 0) > PARALLEL_READ_ROWS,
+            disabled=row_limit > 0,
+            help="Faster for large files; each worker decodes its own row range",
+            key="sas_parallel"
+        )
+    
+    if st.button("📥 Load SAS Data", type="primary", disabled=not columns, key="load_sas"):
+        df = load_file(uploaded_file, columns=columns, row_limit=row_limit or None, parallel=parallel)
+        if df is not None:
+            set_working_dataset(df, uploaded_file.name)
+            st.session_state['last_uploaded_file'] = uploaded_file.name
+            st.success(f"✅ Successfully loaded {uploaded_file.name}")
+            st.rerun()
+
+
+def set_working_dataset(df, file_name):
+    """
+    Make a freshly loaded DataFrame the session's working dataset
+    
+    Column types are compacted first (unless disabled in the ingestion
+    settings); the plan to restore them is kept for export. The original
+    version is kept on disk as a memory-mapped Arrow file instead of a second
+    in-memory copy.
+    
+    Parameters:
+    -----------
+    df : pd.DataFrame
+        Newly loaded DataFrame
+    file_name : str
+        Display name of the dataset
+    """
+    plan = {}
+    if st.session_state.get('optimize_dtypes', True):
+        optimized, plan = optimize_dtypes(df)
+        st.session_state['dtype_report'] = memory_report(df, optimized, plan)
+        df = optimized
+    else:
+        st.session_state.pop('dtype_report', None)
+    st.session_state['dtype_plan'] = plan
+    st.session_state['df'] = store_dataset(df)
+    st.session_state['file_name'] = file_name
+    reset_history()
+
+
 # ==================== File Upload Section ====================
 def file_upload_section():
     """Handle file uploads with automatic loading"""
     st.header("📁 File Upload")
     
+    with st.expander("⚙️ Ingestion Settings", expanded=False):
+        col1, col2 = st.columns(2)
+        with col1:
+            memory_limit_mb = st.number_input(
+                "Memory ceiling (MB)",
+                min_value=64,
+                value=DEFAULT_MEMORY_LIMIT_MB,
+                step=64,
+                help="Maximum memory a CSV/TSV upload may use before it is sampled",
+                key="memory_limit_mb"
+            )
+        with col2:
+            on_limit = st.radio(
+                "When the ceiling is reached",
+                options=list(ON_LIMIT_OPTIONS),
+                format_func=ON_LIMIT_OPTIONS.get,
+                key="on_limit"
+            )
+        
+        col1, col2 = st.columns(2)
+        with col1:
+            excel_engine = st.selectbox(
+                "Excel reader engine",
+                options=available_engines(),
+                format_func=EXCEL_ENGINES.get,
+                help="Calamine is much faster when the python-calamine package is installed",
+                key="excel_engine"
+            )
+        with col2:
+            parse_all = st.checkbox(
+                "Parse all Excel sheets on upload",
+                value=False,
+                help="Parse every sheet in parallel workers so switching sheets is instant",
+                key="excel_parse_all"
+            )
+        
+        st.checkbox(
+            "Optimize column types after upload",
+            value=True,
+            help="Downcast numbers, convert repeated strings to category and parse dates; "
+                 "original types are restored on export",
+            key="optimize_dtypes"
+        )
+    
     uploaded_file = st.file_uploader(
         "Choose a file",
         type=['csv', 'tsv', 'txt', 'xlsx', 'xls', 'sas7bdat'],
@@ -242,36 +466,42 @@ def file_upload_section():
             # Handle CSV/TSV files - Auto load
             if file_extension in ['csv', 'tsv', 'txt']:
                 with st.spinner(f"Loading {uploaded_file.name}..."):
-                    # Auto-detect delimiter and encoding
-                    file_content = uploaded_file.getvalue()
-                    delimiter, encoding = detect_delimiter_and_encoding(file_content, uploaded_file.name)
+                    # Auto-detect delimiter and encoding from a bounded sample
+                    detection = detect_delimiter_and_encoding(uploaded_file)
+                    delimiter, encoding = detection['delimiter'], detection['encoding']
                     
                     # Reset file pointer and load
                     uploaded_file.seek(0)
-                    df = load_file(uploaded_file, delimiter=delimiter, encoding=encoding)
+                    df = load_file(uploaded_file, delimiter=delimiter, encoding=encoding,
+                                   memory_limit_mb=memory_limit_mb, on_limit=on_limit)
                     
                     if df is not None:
-                        st.session_state['df'] = df
-                        st.session_state['original_df'] = df.copy()
-                        st.session_state['file_name'] = uploaded_file.name
+                        set_working_dataset(df, uploaded_file.name)
                         st.session_state['last_uploaded_file'] = uploaded_file.name
-                        st.success(f"✅ Successfully loaded {uploaded_file.name} (Delimiter: {repr(delimiter)}, Encoding: {encoding})")
+                        st.success(f"✅ Successfully loaded {uploaded_file.name} (Delimiter: {repr(delimiter)}, Encoding: {encoding}, Confidence: {detection['confidence']:.0%})")
                         st.rerun()
             
             # Handle Excel files - Auto load first sheet
             elif file_extension in ['xlsx', 'xls']:
                 with st.spinner(f"Loading {uploaded_file.name}..."):
-                    sheet_names = get_excel_sheet_names(uploaded_file)
+                    sheet_names = get_excel_sheet_names(uploaded_file, excel_engine)
+                    
+                    if sheet_names and parse_all and len(sheet_names) > 1:
+                        progress_bar = st.progress(0.0, text=f"Parsing {len(sheet_names)} sheets...")
+                        parse_all_sheets(
+                            uploaded_file, open_workbook(uploaded_file, uploaded_file.name, excel_engine),
+                            progress_callback=lambda fraction: progress_bar.progress(
+                                fraction, text=f"Parsing {len(sheet_names)} sheets...")
+                        )
+                        progress_bar.empty()
                     
                     if sheet_names:
                         # Auto-load first sheet
                         uploaded_file.seek(0)
-                        df = load_file(uploaded_file, sheet_name=sheet_names[0])
+                        df = load_file(uploaded_file, sheet_name=sheet_names[0], excel_engine=excel_engine)
                         
                         if df is not None:
-                            st.session_state['df'] = df
-                            st.session_state['original_df'] = df.copy()
-                            st.session_state['file_name'] = f"{uploaded_file.name} - {sheet_names[0]}"
+                            set_working_dataset(df, f"{uploaded_file.name} - {sheet_names[0]}")
                             st.session_state['last_uploaded_file'] = uploaded_file.name
                             st.session_state['excel_sheets'] = sheet_names
                             st.success(f"✅ Successfully loaded sheet '{sheet_names[0]}' from {uploaded_file.name}")
@@ -281,19 +511,30 @@ def file_upload_section():
                                 st.info(f"📋 This file has {len(sheet_names)} sheets. First sheet loaded automatically.")
                             st.rerun()
             
-            # Handle SAS files - Auto load
+            # Handle SAS files - Preview metadata, then load the chosen columns
             elif file_extension == 'sas7bdat':
-                with st.spinner(f"Loading {uploaded_file.name}..."):
-                    uploaded_file.seek(0)
-                    df = load_file(uploaded_file)
-                    
-                    if df is not None:
-                        st.session_state['df'] = df
-                        st.session_state['original_df'] = df.copy()
-                        st.session_state['file_name'] = uploaded_file.name
-                        st.session_state['last_uploaded_file'] = uploaded_file.name
-                        st.success(f"✅ Successfully loaded {uploaded_file.name}")
-                        st.rerun()
+                sas_load_section(uploaded_file)
+        
+        # Warn when the upload did not fit under the memory ceiling
+        ingest_info = st.session_state.get('ingest_info')
+        if ingest_info and ingest_info['mode'] != 'full':
+            message = (f"⚠️ File exceeded the memory ceiling: working on a random sample of "
+                       f"{ingest_info['rows_kept']:,} of {ingest_info['rows_read']:,} rows "
+                       f"({ingest_info['sample_rate']:.2%}).")
+            spill_path = ingest_info.get('spill_path')
+            if ingest_info['mode'] == 'on_disk' and spill_path and os.path.exists(spill_path):
+                message += " The complete data was saved as Parquet and can be downloaded below."
+            st.warning(message)
+            if ingest_info['mode'] == 'on_disk' and spill_path and os.path.exists(spill_path):
+                with open(spill_path, 'rb') as spill_file:
+                    st.download_button(
+                        label=f"📥 Download complete data (Parquet, {os.path.getsize(spill_path) / 1024**2:.1f} MB)",
+                        data=spill_file,
+                        file_name=f"{os.path.splitext(st.session_state.get('file_name', 'data'))[0]}_full.parquet",
+                        mime=EXPORT_FORMATS['Parquet']['mime'],
+                        key="download_spill"
+                    )
+                st.caption("To clean every row, save the pipeline and replay it on the original file with `batch_clean.py`.")
         
         # Show sheet selector for Excel files if multiple sheets exist
         if 'excel_sheets' in st.session_state and len(st.session_state['excel_sheets']) > 1:
@@ -311,11 +552,9 @@ def file_upload_section():
                 if st.button("🔄 Load Selected Sheet", key="switch_sheet"):
                     uploaded_file.seek(0)
                     with st.spinner(f"Loading sheet '{selected_sheet}'..."):
-                        df = load_file(uploaded_file, sheet_name=selected_sheet)
+                        df = load_file(uploaded_file, sheet_name=selected_sheet, excel_engine=excel_engine)
                         if df is not None:
-                            st.session_state['df'] = df
-                            st.session_state['original_df'] = df.copy()
-                            st.session_state['file_name'] = f"{uploaded_file.name} - {selected_sheet}"
+                            set_working_dataset(df, f"{uploaded_file.name} - {selected_sheet}")
                             st.success(f"✅ Switched to sheet '{selected_sheet}'")
                             st.rerun()
 
@@ -336,7 +575,8 @@ def view_data_tab():
     
     # Display DataFrame using view_dataframe
     st.subheader("📋 Data Table")
-    view_dataframe(df, height=500, page_size=20, key_suffix="view_data")
+    view_dataframe(df, height=500, page_size=20, key_suffix="view_data", pagination_mode="auto",
+                   data_version=dataset_version())
 
 
 # ==================== Basic Statistics Tab ====================
@@ -350,28 +590,26 @@ def basic_statistics_tab():
     
     st.header("📈 Basic Statistics")
     
+    # Per-column statistics are cached by dataset version; only columns
+    # changed since the last visit are recomputed
+    profiles = column_profiles(df)
+    
     tab1, tab2, tab3 = st.tabs(["Numerical Statistics", "Categorical Statistics", "DataFrame Info"])
     
     with tab1:
         # Numerical columns statistics
-        numeric_cols = df.select_dtypes(include=['number'])
-        if numeric_cols.shape[1] > 0:
+        numeric_stats = describe_table(profiles, numeric=True)
+        if len(numeric_stats) > 0:
             st.write("**Descriptive Statistics for Numerical Columns:**")
-            numeric_stats = df.describe().T
-            numeric_stats = numeric_stats.reset_index()
-            numeric_stats.columns = ['Column'] + list(numeric_stats.columns[1:])
             view_dataframe(numeric_stats, height=400, page_size=20, key_suffix="numeric_stats")
         else:
             st.info("No numerical columns found in the dataset")
     
     with tab2:
         # Categorical columns statistics
-        categorical_cols = df.select_dtypes(include=['object', 'category'])
-        if categorical_cols.shape[1] > 0:
+        cat_stats = describe_table(profiles, numeric=False)
+        if len(cat_stats) > 0:
             st.write("**Descriptive Statistics for Categorical Columns:**")
-            cat_stats = df.describe(include=['object', 'category']).T
-            cat_stats = cat_stats.reset_index()
-            cat_stats.columns = ['Column'] + list(cat_stats.columns[1:])
             view_dataframe(cat_stats, height=400, page_size=20, key_suffix="cat_stats")
         else:
             st.info("No categorical columns found in the dataset")
@@ -381,20 +619,12 @@ def basic_statistics_tab():
         st.write("**DataFrame Information:**")
         
         # Create info DataFrame
-        info_data = {
-            'Column': df.columns,
-            'Non-Null Count': df.count().values,
-            'Null Count': df.isnull().sum().values,
-            'Dtype': df.dtypes.values.astype(str),
-            'Unique Values': [df[col].nunique() for col in df.columns],
-            'Memory Usage (bytes)': [df[col].memory_usage(deep=True) for col in df.columns]
-        }
-        info_df = pd.DataFrame(info_data)
+        info_df = info_table(profiles)
         
         # Add summary row
         st.write(f"**Total Entries:** {len(df):,}")
         st.write(f"**Total Columns:** {len(df.columns):,}")
-        st.write(f"**Total Memory Usage:** {df.memory_usage(deep=True).sum() / 1024**2:.2f} MB")
+        st.write(f"**Total Memory Usage:** {(info_df['Memory Usage (bytes)'].sum() + df.index.memory_usage()) / 1024**2:.2f} MB")
         
         view_dataframe(info_df, height=400, page_size=20, key_suffix="df_info")
 
@@ -417,6 +647,26 @@ def value_counts_visualizations_tab():
         horizontal=True
     )
     
+    # Limits for high-cardinality columns and very large frames
+    col1, col2 = st.columns(2)
+    with col1:
+        top_k = st.number_input(
+            "Show top K values/groups (rest grouped as 'Other')",
+            min_value=1,
+            value=DEFAULT_TOP_K,
+            step=5,
+            key="agg_top_k"
+        )
+    with col2:
+        approximate = False
+        if len(df) > APPROXIMATE_THRESHOLD:
+            approximate = st.checkbox(
+                f"Approximate (sample {APPROXIMATE_SAMPLE_ROWS:,} rows)",
+                value=False,
+                help="Estimate counts from a random sample for a much faster response",
+                key="agg_approximate"
+            )
+    
     if analysis_type == "Value Counts":
         st.subheader("📊 Value Counts Analysis")
         
@@ -429,25 +679,26 @@ def value_counts_visualizations_tab():
         )
         
         if selected_column:
-            # Calculate value counts
-            value_counts = df[selected_column].value_counts()
-            total_count = len(df)
+            # Calculate value counts (cached per column and dataset version)
+            value_counts_df, n_unique = value_counts_table(
+                df, selected_column, top_k=int(top_k), approximate=approximate
+            )
             
-            # Create DataFrame with counts and percentages
-            value_counts_df = pd.DataFrame({
-                'Value': value_counts.index.astype(str),
-                'Count': value_counts.values,
-                'Percentage': (value_counts.values / total_count * 100).round(2)
-            })
+            if value_counts_df.empty:
+                st.info(f"Column '{selected_column}' has no non-null values")
+                return
             
             # Display metrics
             col1, col2, col3 = st.columns(3)
             with col1:
-                st.metric("Unique Values", len(value_counts))
+                st.metric("Unique Values", f"{n_unique:,}" + (" (approx.)" if approximate else ""))
             with col2:
-                st.metric("Most Common Value", str(value_counts.index[0]))
+                st.metric("Most Common Value", value_counts_df['Value'].iloc[0])
             with col3:
-                st.metric("Most Common Count", f"{value_counts.values[0]:,}")
+                st.metric("Most Common Count", f"{value_counts_df['Count'].iloc[0]:,}")
+            
+            if n_unique > top_k:
+                st.caption(f"Showing the top {int(top_k):,} of {n_unique:,} values; the rest are grouped as 'Other'")
             
             # Display value counts table
             st.write("**Value Distribution:**")
@@ -560,9 +811,13 @@ def value_counts_visualizations_tab():
             )
             
             if agg_col:
-                # Perform groupby
-                grouped_df = df.groupby(groupby_cols)[agg_col].agg(agg_type).reset_index()
-                grouped_df.columns = list(groupby_cols) + [f"{agg_type}_{agg_col}"]
+                # Perform groupby (cached per columns, aggregation and dataset version)
+                grouped_df, n_groups = groupby_table(
+                    df, groupby_cols, agg_col, agg_type, top_k=int(top_k), approximate=approximate
+                )
+                
+                if n_groups > top_k:
+                    st.caption(f"Showing the top {int(top_k):,} of {n_groups:,} groups by {agg_type}")
                 
                 # Display grouped data
                 st.write(f"**Grouped Data ({agg_type} of {agg_col}):**")
@@ -669,13 +924,8 @@ def check_duplicates_tab():
     # Determine subset for duplicate checking
     subset = selected_columns if selected_columns else None
     
-    # Find duplicates
-    if subset:
-        duplicates = df[df.duplicated(subset=subset, keep=False)]
-        duplicate_count = df.duplicated(subset=subset).sum()
-    else:
-        duplicates = df[df.duplicated(keep=False)]
-        duplicate_count = df.duplicated().sum()
+    # Find duplicates with the row-fingerprint index (one hash combine per subset)
+    duplicates, duplicate_count = find_duplicates(df, subset)
     
     # Display metrics
     col1, col2 = st.columns(2)
@@ -696,7 +946,8 @@ def check_duplicates_tab():
     # Display duplicate rows
     if duplicate_count > 0:
         st.subheader("🔎 Duplicate Rows Found")
-        view_dataframe(duplicates, height=400, page_size=20, key_suffix="duplicates")
+        view_dataframe(duplicates, height=400, page_size=20, key_suffix="duplicates", pagination_mode="auto",
+                       data_version=(dataset_version(), tuple(selected_columns)))
         
         # Remove duplicates button
         st.subheader("🗑️ Remove Duplicates")
@@ -704,10 +955,7 @@ def check_duplicates_tab():
         col1, col2 = st.columns([1, 3])
         with col1:
             if st.button("🗑️ Remove Duplicates", type="primary"):
-                if subset:
-                    st.session_state['df'] = df.drop_duplicates(subset=subset)
-                else:
-                    st.session_state['df'] = df.drop_duplicates()
+                run_operation({'op': 'drop_duplicates', 'subset': subset})
                 
                 st.success(f"✅ Removed {duplicate_count:,} duplicate rows!")
                 st.rerun()
@@ -716,6 +964,39 @@ def check_duplicates_tab():
             st.info(f"This will remove {duplicate_count:,} duplicate rows from the dataset")
     else:
         st.success("✅ No duplicate rows found in the dataset!")
+    
+    # Near-duplicates: rows that only differ in case, spacing or formatting
+    st.divider()
+    st.subheader("🧬 Near-Duplicate Detection")
+    st.write("Find records that match once case, whitespace, punctuation or phone formatting are ignored")
+    
+    near_columns = st.multiselect(
+        "Choose columns to compare (e.g. name and phone)",
+        options=df.columns.tolist(),
+        key="near_dup_columns"
+    )
+    
+    if near_columns:
+        normalizers = {}
+        normalizer_cols = st.columns(min(len(near_columns), 4))
+        for i, col in enumerate(near_columns):
+            with normalizer_cols[i % len(normalizer_cols)]:
+                normalizers[col] = st.selectbox(
+                    f"Match '{col}' by",
+                    options=list(NORMALIZERS),
+                    index=list(NORMALIZERS).index(default_normalizer(col)),
+                    format_func=NORMALIZERS.get,
+                    key=f"near_dup_normalizer_{col}"
+                )
+        
+        near_duplicates = find_near_duplicates(df, normalizers)
+        if len(near_duplicates) > 0:
+            st.metric("Near-Duplicate Groups", f"{near_duplicates.iloc[:, 0].max():,}",
+                      delta=f"{len(near_duplicates):,} rows", delta_color="off")
+            view_dataframe(near_duplicates, height=400, page_size=20, key_suffix="near_duplicates",
+                           pagination_mode="auto", data_version=(dataset_version(), tuple(normalizers.items())))
+        else:
+            st.success("✅ No near-duplicate records found for the selected columns")
 
 
 # ==================== Check Null Values Tab ====================
@@ -732,29 +1013,107 @@ def check_null_values_tab():
     # Overall null statistics
     st.subheader("📊 Overall Null Statistics")
     
-    total_nulls = df.isnull().sum().sum()
+    # Counts come from bit-packed null masks cached per column and dataset version
+    column_nulls = null_counts(df)
+    total_nulls = column_nulls.sum()
     total_cells = df.shape[0] * df.shape[1]
     
     col1, col2, col3 = st.columns(3)
     with col1:
         st.metric("Total Null Values", f"{total_nulls:,}")
     with col2:
-        st.metric("Percentage of Nulls", f"{(total_nulls / total_cells * 100):.2f}%")
+        st.metric("Percentage of Nulls", f"{(total_nulls / total_cells * 100 if total_cells else 0):.2f}%")
     with col3:
-        st.metric("Columns with Nulls", df.isnull().any().sum())
+        st.metric("Columns with Nulls", int((column_nulls > 0).sum()))
     
     # Null values by column
-    null_df = pd.DataFrame({
-        'Column': df.columns,
-        'Null Count': df.isnull().sum().values,
-        'Null Percentage (%)': (df.isnull().sum().values / len(df) * 100).round(2)
-    })
-    null_df = null_df[null_df['Null Count'] > 0].sort_values('Null Count', ascending=False)
+    null_df = null_summary(df)
+    null_columns = null_df['Column'].tolist()
     
     if len(null_df) > 0:
         st.subheader("📋 Null Values by Column")
         st.dataframe(null_df, use_container_width=True)
     
+    # Missingness structure across columns
+    if len(null_columns) > 0:
+        with st.expander("🧩 Missingness Patterns", expanded=False):
+            st.write("**Missingness Heatmap** (share of nulls per block of rows)")
+            heatmap = missingness_heatmap(df, null_columns)
+            fig = px.imshow(
+                heatmap.T,
+                color_continuous_scale='Reds',
+                zmin=0,
+                zmax=1,
+                aspect='auto',
+                labels={'x': 'Row', 'y': 'Column', 'color': 'Null share'}
+            )
+            st.plotly_chart(fig, use_container_width=True)
+            
+            if len(null_columns) > 1:
+                st.write("**Co-Missingness** (rows where both columns are null)")
+                fig = px.imshow(co_missingness(df, null_columns), text_auto=True, color_continuous_scale='Blues',
+                                aspect='auto')
+                st.plotly_chart(fig, use_container_width=True)
+            
+            st.write("**Most Frequent Missingness Patterns**")
+            st.dataframe(missingness_patterns(df, null_columns), use_container_width=True, hide_index=True)
+        
+        # Batch handling across several columns in one operation
+        st.subheader("🧹 Handle Nulls in Multiple Columns")
+        batch_columns = st.multiselect(
+            "Select columns",
+            options=null_columns,
+            key="batch_null_columns"
+        )
+        
+        if batch_columns:
+            batch_action = st.radio(
+                "Action",
+                options=["Remove rows", "Replace nulls"],
+                horizontal=True,
+                key="batch_null_action"
+            )
+            
+            if batch_action == "Remove rows":
+                how = st.radio(
+                    "Remove a row when",
+                    options=['any', 'all'],
+                    format_func=lambda h: "any selected column is null" if h == 'any' else "all selected columns are null",
+                    horizontal=True,
+                    key="batch_null_how"
+                )
+                affected = len(null_rows(df, batch_columns, how))
+                st.write(f"**{affected:,} rows will be removed**")
+                if st.button("🗑️ Remove Rows", key="batch_remove_nulls", disabled=affected == 0):
+                    run_operation({'op': 'dropna_columns', 'columns': batch_columns, 'how': how})
+                    st.success(f"✅ Removed {affected:,} rows!")
+                    st.rerun()
+            else:
+                fill_values = {}
+                fill_cols = st.columns(min(len(batch_columns), 4))
+                for i, col in enumerate(batch_columns):
+                    with fill_cols[i % len(fill_cols)]:
+                        fill_values[col] = st.text_input(f"'{col}' ({int(column_nulls[col]):,} nulls)",
+                                                         key=f"batch_fill_{col}")
+                
+                if st.button("🔄 Replace Nulls", key="batch_replace_nulls"):
+                    missing = [col for col, value in fill_values.items() if not value]
+                    if missing:
+                        st.warning(f"⚠️ Please enter a replacement value for: {', '.join(map(str, missing))}")
+                    else:
+                        values = []
+                        for col, value in fill_values.items():
+                            # Convert replacement value to appropriate type
+                            try:
+                                if pd.api.types.is_numeric_dtype(df[col]):
+                                    value = float(value)
+                            except ValueError:
+                                pass
+                            values.append(value)
+                        run_operation({'op': 'fillna_columns', 'columns': batch_columns, 'values': values})
+                        st.success(f"✅ Replaced nulls in {len(batch_columns)} column(s)!")
+                        st.rerun()
+    
     # Column-specific null handling
     st.subheader("🛠️ Handle Null Values")
     
@@ -765,8 +1124,8 @@ def check_null_values_tab():
     )
     
     if selected_column:
-        null_count = df[selected_column].isnull().sum()
-        null_percentage = (null_count / len(df) * 100)
+        null_count = int(column_nulls[selected_column])
+        null_percentage = (null_count / len(df) * 100) if len(df) else 0.0
         
         # Display metrics for selected column
         col1, col2 = st.columns(2)
@@ -790,8 +1149,8 @@ def check_null_values_tab():
         if null_count > 0:
             # Display rows with null values
             with st.expander("👁️ View Rows with Null Values", expanded=False):
-                null_rows = df[df[selected_column].isnull()]
-                view_dataframe(null_rows, height=400, page_size=20, key_suffix="null_rows")
+                view_dataframe(null_rows(df, [selected_column]), height=400, page_size=20, key_suffix="null_rows", pagination_mode="auto",
+                               data_version=(dataset_version(), selected_column))
             
             # Action options
             st.subheader("⚙️ Actions")
@@ -802,8 +1161,7 @@ def check_null_values_tab():
                 st.write("**Option 1: Remove Rows**")
                 if st.button("🗑️ Remove Rows with Null", key="remove_nulls"):
                     original_shape = df.shape
-                    st.session_state['df'] = df.dropna(subset=[selected_column])
-                    new_shape = st.session_state['df'].shape
+                    new_shape = run_operation({'op': 'dropna', 'column': selected_column}).shape
                     st.success(f"✅ Removed {original_shape[0] - new_shape[0]:,} rows!")
                     st.rerun()
             
@@ -818,12 +1176,12 @@ def check_null_values_tab():
                     if replacement_value:
                         # Convert replacement value to appropriate type
                         try:
-                            if df[selected_column].dtype in ['int64', 'float64']:
+                            if pd.api.types.is_numeric_dtype(df[selected_column]):
                                 replacement_value = float(replacement_value)
                         except:
                             pass
                         
-                        st.session_state['df'][selected_column] = df[selected_column].fillna(replacement_value)
+                        run_operation({'op': 'fillna', 'column': selected_column, 'value': replacement_value})
                         st.success(f"✅ Replaced {null_count:,} null values with '{replacement_value}'!")
                         st.rerun()
                     else:
@@ -857,23 +1215,17 @@ def edit_data_tab():
         # Step 2: Show unique values and allow selection
         st.subheader("Step 2: Select Values to Replace")
         
-        unique_values = df[selected_column].dropna().unique()
+        # Unique values, counts and affected rows are lookups in the column's value index
+        index = value_index(df, selected_column)
         
         # Display value counts for context
         with st.expander("📊 View Value Distribution", expanded=False):
-            value_counts = df[selected_column].value_counts()
-            st.dataframe(
-                pd.DataFrame({
-                    'Value': value_counts.index,
-                    'Count': value_counts.values
-                }),
-                use_container_width=True
-            )
+            st.dataframe(value_counts_frame(index), use_container_width=True)
         
         # Multi-select for values to replace
         values_to_replace = st.multiselect(
             "Select values to replace",
-            options=unique_values.tolist(),
+            options=unique_values(index),
             help="Choose one or more values that you want to replace"
         )
         
@@ -888,13 +1240,14 @@ def edit_data_tab():
             
             # Preview affected rows
             if replacement_value:
-                affected_rows = df[df[selected_column].isin(values_to_replace)]
-                affected_count = len(affected_rows)
+                affected_count = count_rows(index, values_to_replace)
                 
                 st.write(f"**Preview: {affected_count:,} rows will be affected**")
                 
                 with st.expander("👁️ View Affected Rows (Before)", expanded=False):
-                    view_dataframe(affected_rows, height=400, page_size=20, key_suffix="affected_rows")
+                    affected_rows = df.iloc[row_positions(index, values_to_replace)]
+                    view_dataframe(affected_rows, height=400, page_size=20, key_suffix="affected_rows", pagination_mode="auto",
+                                   data_version=(dataset_version(), selected_column, tuple(map(str, values_to_replace))))
                 
                 # Step 4: Execute replacement
                 st.subheader("Step 4: Execute Replacement")
@@ -905,16 +1258,23 @@ def edit_data_tab():
                     if st.button("🔄 Replace Values", type="primary"):
                         # Convert replacement value to appropriate type
                         try:
-                            if df[selected_column].dtype in ['int64', 'float64']:
+                            if pd.api.types.is_numeric_dtype(df[selected_column]):
                                 replacement_value = float(replacement_value)
                         except:
                             pass
                         
                         # Perform replacement
-                        st.session_state['df'][selected_column] = df[selected_column].replace(
-                            values_to_replace,
-                            replacement_value
-                        )
+                        new_df = run_operation({
+                            'op': 'replace',
+                            'column': selected_column,
+                            'to_replace': values_to_replace,
+                            'value': replacement_value
+                        })
+                        
+                        # Re-code only the affected rows instead of rebuilding the index
+                        if new_df[selected_column].dtype == df[selected_column].dtype:
+                            refresh_value_index(selected_column,
+                                                replace_in_index(index, values_to_replace, replacement_value))
                         
                         st.success(f"✅ Successfully replaced {affected_count:,} values!")
                         st.rerun()
@@ -923,6 +1283,138 @@ def edit_data_tab():
                     st.info(f"Will replace {len(values_to_replace)} unique value(s) in {affected_count:,} rows")
 
 
+# ==================== Change Report Tab ====================
+def change_report_tab():
+    """Compare the cleaned dataset with the original upload"""
+    if 'df' not in st.session_state or st.session_state['df'] is None:
+        st.info("👆 Please upload a file to get started")
+        return
+    
+    df = st.session_state['df']
+    
+    st.header("🧾 Change Report")
+    st.write("Everything cleaning changed since the upload: removed rows, changed cells per column "
+             "and before/after examples")
+    
+    # The comparison reads the whole original, so it only runs on request (then per version)
+    version = dataset_version()
+    if st.session_state.get('change_report_version') != version:
+        if not st.button("🧾 Build Change Report", type="primary", key="build_change_report"):
+            return
+        st.session_state['change_report_version'] = version
+    
+    with st.spinner("Comparing with the original upload..."):
+        report = change_report(df)
+    if report is None:
+        st.warning("⚠️ The original upload is no longer available for comparison")
+        return
+    
+    summary = report['summary']
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("Original Rows", f"{report['original_rows']:,}")
+    with col2:
+        st.metric("Current Rows", f"{report['current_rows']:,}")
+    with col3:
+        st.metric("Removed Rows", f"{len(report['removed_rows']):,}")
+    with col4:
+        st.metric("Changed Cells", f"{int(summary['Changed Cells'].fillna(0).sum()):,}")
+    
+    st.subheader("📋 Changes per Column")
+    view_dataframe(summary, height=350, page_size=20, key_suffix="change_summary")
+    
+    st.subheader("🔎 Before / After Examples")
+    if len(report['samples']) > 0:
+        samples = report['samples'].astype({'Before': str, 'After': str})
+        view_dataframe(samples, height=350, page_size=20, key_suffix="change_samples")
+    else:
+        st.success("✅ No cell values were changed")
+    
+    if len(report['removed_rows']) > 0:
+        with st.expander(f"🗑️ Removed Rows ({len(report['removed_rows']):,})"):
+            preview = get_original_df(rows=report['removed_rows'][:REMOVED_PREVIEW_ROWS])
+            if len(report['removed_rows']) > REMOVED_PREVIEW_ROWS:
+                st.caption(f"Showing the first {REMOVED_PREVIEW_ROWS:,} removed rows")
+            view_dataframe(preview.reset_index(names='Original Row'), height=350, page_size=20,
+                           key_suffix="change_removed", pagination_mode="auto", data_version=(version, 'removed'))
+    
+    path = build_change_report_export(report, version)
+    with open(path, 'rb') as report_file:
+        st.download_button(
+            label="📥 Download Change Report (.xlsx)",
+            data=report_file,
+            file_name=f"{st.session_state.get('file_name', 'data').split('.')[0]}_changes.xlsx",
+            mime=EXPORT_FORMATS['Excel']['mime'],
+            key="download_change_report_tab"
+        )
+
+
+# ==================== Backend Section ====================
+def backend_section():
+    """Sidebar choice of the engine that runs the heavy computations"""
+    st.sidebar.header("⚙️ Compute Backend")
+    st.sidebar.selectbox(
+        "Backend",
+        options=polars_backend.available_backends(),
+        format_func=polars_backend.BACKENDS.get,
+        help="Polars runs CSV parsing, statistics, value counts, groupby, duplicate and "
+             "null checks on its multi-threaded engine; cleaning operations stay in pandas",
+        key="backend"
+    )
+    if not polars_backend.POLARS_AVAILABLE:
+        st.sidebar.caption("ℹ️ Install polars to enable the multi-threaded backend")
+
+
+# ==================== History Section ====================
+def history_section():
+    """Undo/redo controls and the log of applied cleaning operations"""
+    if 'df' not in st.session_state or st.session_state['df'] is None:
+        return
+    
+    st.sidebar.header("↩️ History")
+    
+    col1, col2, col3 = st.sidebar.columns(3)
+    with col1:
+        if st.button("↩️ Undo", disabled=not can_undo(), key="history_undo"):
+            undo()
+            st.rerun()
+    with col2:
+        if st.button("↪️ Redo", disabled=not can_redo(), key="history_redo"):
+            redo()
+            st.rerun()
+    with col3:
+        if st.button("🔄 Reset", key="history_reset", help="Reload the original uploaded data"):
+            reset_to_original()
+            st.rerun()
+    
+    operations = applied_operations()
+    if operations:
+        with st.sidebar.expander(f"📜 Applied Operations ({len(operations)})", expanded=False):
+            for i, op in enumerate(operations, start=1):
+                st.write(f"{i}. {describe_operation(op)}")
+            
+            st.download_button(
+                label="💾 Save Pipeline",
+                data=pipeline_to_json(operations, st.session_state.get('file_name')),
+                file_name="cleaning_pipeline.json",
+                mime="application/json",
+                help="Replay on other files with: python batch_clean.py cleaning_pipeline.json <input_dir> <output_dir>",
+                key="save_pipeline"
+            )
+    
+    with st.sidebar.expander("📂 Apply Saved Pipeline", expanded=False):
+        pipeline_file = st.file_uploader("Pipeline JSON", type=['json'], key="pipeline_file")
+        if pipeline_file is not None and st.button("▶️ Run Pipeline", key="run_pipeline"):
+            try:
+                pipeline_ops = load_pipeline(pipeline_file.getvalue())
+                for op in pipeline_ops:
+                    run_operation(op)
+                st.success(f"✅ Applied {len(pipeline_ops)} operation(s)")
+                st.rerun()
+            except (ValueError, KeyError) as e:
+                st.error(f"❌ Could not apply pipeline: {str(e)}")
+
+
 # ==================== Download Section ====================
 def download_section():
     """Provide download options for the cleaned dataset"""
@@ -942,38 +1434,69 @@ def download_section():
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     base_filename = st.session_state.get('file_name', 'cleaned_data').split('.')[0]
     
-    # CSV Download
-    st.sidebar.subheader("📄 CSV Format")
-    encoding = st.sidebar.selectbox(
-        "Select encoding",
-        options=['utf-8', 'utf-8-sig', 'latin1', 'cp1252'],
-        index=0
+    export_format = st.sidebar.selectbox(
+        "Select format",
+        options=list(EXPORT_FORMATS),
+        index=0,
+        help="Parquet and Feather are much smaller and faster for large datasets"
     )
     
-    csv_buffer = io.StringIO()
-    df.to_csv(csv_buffer, index=False, encoding=encoding)
-    csv_data = csv_buffer.getvalue().encode(encoding)
+    encoding = 'utf-8'
+    if export_format == 'CSV':
+        encoding = st.sidebar.selectbox(
+            "Select encoding",
+            options=['utf-8', 'utf-8-sig', 'latin1', 'cp1252'],
+            index=0
+        )
     
-    st.sidebar.download_button(
-        label="📥 Download CSV",
-        data=csv_data,
-        file_name=f"{base_filename}_cleaned_{timestamp}.csv",
-        mime="text/csv"
+    include_report = st.sidebar.checkbox(
+        "Include change report",
+        value=False,
+        help="Also download an .xlsx report of removed rows and changed cells compared with the upload",
+        key="export_change_report"
     )
     
-    # Excel Download
-    st.sidebar.subheader("📊 Excel Format")
-    excel_buffer = io.BytesIO()
-    with pd.ExcelWriter(excel_buffer, engine='openpyxl') as writer:
-        df.to_excel(writer, index=False, sheet_name='Cleaned Data')
-    excel_data = excel_buffer.getvalue()
-    
-    st.sidebar.download_button(
-        label="📥 Download Excel",
-        data=excel_data,
-        file_name=f"{base_filename}_cleaned_{timestamp}.xlsx",
-        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-    )
+    # Exports are only generated on request and cached per dataset version
+    version = dataset_version()
+    request = (version, export_format, encoding, include_report)
+    ready = st.session_state.get('export_ready')
+    
+    if ready is None or ready[0] != request:
+        if st.sidebar.button(f"⚙️ Prepare {export_format} File", key="prepare_export"):
+            with st.sidebar:
+                with st.spinner(f"Generating {export_format} file..."):
+                    try:
+                        export_df = restore_dtypes(df, st.session_state.get('dtype_plan', {}))
+                        path = build_export(export_df, export_format, version, encoding=encoding)
+                        report_path = None
+                        if include_report:
+                            report = change_report(df)
+                            if report is not None:
+                                report_path = build_change_report_export(report, version)
+                        st.session_state['export_ready'] = (request, path, report_path)
+                        st.rerun()
+                    except Exception as e:
+                        st.error(f"❌ Error generating {export_format} file: {str(e)}")
+        return
+    
+    path, report_path = ready[1], ready[2]
+    file_info = EXPORT_FORMATS[export_format]
+    st.sidebar.caption(f"File size: {os.path.getsize(path) / 1024**2:.2f} MB")
+    with open(path, 'rb') as export_file:
+        st.sidebar.download_button(
+            label=f"📥 Download {export_format}",
+            data=export_file,
+            file_name=f"{base_filename}_cleaned_{timestamp}.{file_info['extension']}",
+            mime=file_info['mime']
+        )
+    if report_path:
+        with open(report_path, 'rb') as report_file:
+            st.sidebar.download_button(
+                label="📥 Download Change Report",
+                data=report_file,
+                file_name=f"{base_filename}_changes_{timestamp}.xlsx",
+                mime=EXPORT_FORMATS['Excel']['mime']
+            )
     
 
 
@@ -991,13 +1514,13 @@ def main():
     # Initialize session state
     if 'df' not in st.session_state:
         st.session_state['df'] = None
-    if 'original_df' not in st.session_state:
-        st.session_state['original_df'] = None
     
     # File upload section in main area
     file_upload_section()
     
-    # Sidebar for download
+    # Sidebar for backend, history and download
+    backend_section()
+    history_section()
     download_section()
     
     st.divider()
@@ -1011,7 +1534,8 @@ def main():
             "🔢 Value Counts & Visualizations",
             "🔍 Check Duplicates",
             "🔍 Check Nulls",
-            "✏️ Edit Data"
+            "✏️ Edit Data",
+            "🧾 Change Report"
         ])
         
         with tabs[0]:
@@ -1031,6 +1555,9 @@ def main():
         
         with tabs[5]:
             edit_data_tab()
+        
+        with tabs[6]:
+            change_report_tab()
     else:
         # Error message when no file selected
         st.error("⚠️ No file selected! Please upload a file to get started.")
@@ -1064,7 +1591,7 @@ def main():
             **💾 Export Options:**
             - CSV with encoding selection
             - Excel format
-            - SAS format
+            - Parquet and Feather for large datasets
             """)
 
 
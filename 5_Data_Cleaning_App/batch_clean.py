@@ -0,0 +1,182 @@
+"""
+Batch Cleaning Runner
+Replay a saved cleaning pipeline on a directory of files, without the UI
+
+Usage:
+    python batch_clean.py pipeline.json input_dir output_dir --format parquet --workers 4
+    python batch_clean.py pipeline.json input_dir output_dir --change-report
+    python batch_clean.py pipeline.json input_dir output_dir --strict
+"""
+
+import argparse
+import glob
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pandas as pd
+import pyreadstat
+
+from ingestion import read_csv_chunked, sniff_delimited_file
+from exporters import write_csv_chunked, write_excel_streaming, write_parquet, write_feather, EXPORT_FORMATS
+from dtype_optimizer import optimize_dtypes, restore_dtypes
+from history import describe_operation
+from pipeline import load_pipeline, replay_pipeline
+from change_report import compare_frames, write_change_report
+
+
+INPUT_EXTENSIONS = ('csv', 'tsv', 'txt', 'xlsx', 'xls', 'sas7bdat')
+
+# The shared readers use Streamlit caches, which log a warning per call without a running app
+logging.getLogger('streamlit.runtime.caching.cache_data_api').setLevel(logging.ERROR)
+
+WRITERS = {
+    'CSV': write_csv_chunked,
+    'Excel': write_excel_streaming,
+    'Parquet': write_parquet,
+    'Feather': write_feather
+}
+
+
+# ==================== File I/O ====================
+def load_path(path):
+    """
+    Load a file from disk with the same readers as the app (first sheet for Excel)
+
+    Parameters:
+    -----------
+    path : str
+        Path to a CSV/TSV/TXT, Excel or SAS file
+
+    Returns:
+    --------
+    pd.DataFrame : Loaded data (never sampled)
+    """
+    extension = path.rsplit('.', 1)[-1].lower()
+    if extension in ('csv', 'tsv', 'txt'):
+        with open(path, 'rb') as handle:
+            detection = sniff_delimited_file(handle, os.path.basename(path))
+            df, _ = read_csv_chunked(handle, delimiter=detection['delimiter'],
+                                     encoding=detection['encoding'], memory_limit_mb=None)
+        return df
+    if extension in ('xlsx', 'xls'):
+        return pd.read_excel(path, sheet_name=0, engine='xlrd' if extension == 'xls' else 'openpyxl')
+    if extension == 'sas7bdat':
+        df, _ = pyreadstat.read_sas7bdat(path)
+        return df
+    raise ValueError(f"Unsupported file format: .{extension}")
+
+
+def clean_file(path, operations, output_dir, export_format, with_report=False, strict=False):
+    """
+    Load one file, replay the pipeline and write the result (runs in a worker process)
+
+    The file goes through the same dtype optimization as an upload in the app,
+    so recorded values (e.g. dates) match, and is restored before writing.
+
+    With ``with_report``, a change report (removed rows, changed cells per
+    column, before/after examples) is written next to the output as
+    ``<name>_changes.xlsx``. With ``strict``, a step that changes no rows fails
+    the file instead of only being listed in 'noop_steps'.
+
+    Returns:
+    --------
+    dict : 'file', 'rows_in', 'rows_out', 'output', 'report', 'noop_steps', 'seconds' and 'error'
+    """
+    started = time.perf_counter()
+    result = {'file': path, 'rows_in': None, 'rows_out': None, 'output': None, 'report': None,
+              'noop_steps': [], 'error': None}
+    try:
+        # Row labels are original positions, which is what the change report matches on
+        df = load_path(path).reset_index(drop=True)
+        result['rows_in'] = len(df)
+        optimized, plan = optimize_dtypes(df)
+        cleaned, affected = replay_pipeline(optimized, operations, plan)
+        result['noop_steps'] = [f"step {i} ({describe_operation(op)})"
+                                for i, (op, rows) in enumerate(zip(operations, affected), start=1) if rows == 0]
+        if strict and result['noop_steps']:
+            raise ValueError(f"no rows changed by {', '.join(result['noop_steps'])}")
+        cleaned = restore_dtypes(cleaned, plan)
+        result['rows_out'] = len(cleaned)
+
+        stem = os.path.splitext(os.path.basename(path))[0]
+        output = os.path.join(output_dir, f"{stem}_cleaned.{EXPORT_FORMATS[export_format]['extension']}")
+        WRITERS[export_format](cleaned, output)
+        result['output'] = output
+
+        if with_report:
+            report = compare_frames(cleaned, lambda col, rows: df[col].iloc[rows], len(df), list(df.columns))
+            result['report'] = os.path.join(output_dir, f"{stem}_changes.xlsx")
+            write_change_report(report, result['report'])
+    except Exception as e:
+        result['error'] = f"{type(e).__name__}: {e}"
+    result['seconds'] = time.perf_counter() - started
+    return result
+
+
+def find_inputs(input_dir, pattern=None):
+    """List the supported files in ``input_dir`` (optionally filtered by a glob pattern)"""
+    paths = glob.glob(os.path.join(input_dir, pattern or '*'))
+    return sorted(p for p in paths if os.path.isfile(p) and p.rsplit('.', 1)[-1].lower() in INPUT_EXTENSIONS)
+
+
+# ==================== Command Line ====================
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Replay a cleaning pipeline on every file in a directory")
+    parser.add_argument('pipeline', help="Pipeline JSON saved from the app's History section")
+    parser.add_argument('input_dir', help="Directory with the files to clean")
+    parser.add_argument('output_dir', help="Directory for the cleaned files")
+    parser.add_argument('--format', default='csv', choices=[name.lower() for name in EXPORT_FORMATS],
+                        help="Output format (default: csv)")
+    parser.add_argument('--pattern', default=None, help="Glob pattern to select input files, e.g. '*.csv'")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help="Number of worker processes (default: CPU count)")
+    parser.add_argument('--change-report', action='store_true',
+                        help="Also write <name>_changes.xlsx with the removed rows and changed cells")
+    parser.add_argument('--strict', action='store_true',
+                        help="Fail a file when a pipeline step changes no rows in it (default: warn)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    export_format = next(name for name in EXPORT_FORMATS if name.lower() == args.format)
+
+    with open(args.pipeline, encoding='utf-8') as handle:
+        operations = load_pipeline(handle.read())
+
+    paths = find_inputs(args.input_dir, args.pattern)
+    if not paths:
+        print(f"No supported files found in {args.input_dir}")
+        return 1
+    os.makedirs(args.output_dir, exist_ok=True)
+
+    print(f"Cleaning {len(paths)} file(s) with {len(operations)} operation(s) "
+          f"using {min(args.workers, len(paths))} worker(s)")
+    failures = 0
+    with ProcessPoolExecutor(max_workers=max(1, min(args.workers, len(paths)))) as pool:
+        futures = [pool.submit(clean_file, path, operations, args.output_dir, export_format,
+                               args.change_report, args.strict)
+                   for path in paths]
+        for future in as_completed(futures):
+            result = future.result()
+            name = os.path.basename(result['file'])
+            if result['error']:
+                failures += 1
+                print(f"FAILED  {name}: {result['error']}")
+            else:
+                print(f"OK      {name}: {result['rows_in']:,} -> {result['rows_out']:,} rows "
+                      f"in {result['seconds']:.1f}s -> {result['output']}")
+                if result['report']:
+                    print(f"        change report -> {result['report']}")
+                for step in result['noop_steps']:
+                    print(f"        WARNING: {step} changed no rows")
+
+    print(f"Done: {len(paths) - failures} succeeded, {failures} failed")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,362 @@
+"""
+Benchmark Suite
+Wall time and peak memory of the app's data operations across dataset sizes
+
+Usage:
+    python benchmark.py                                   # 10k, 100k and 1M rows, narrow and wide
+    python benchmark.py --sizes 10000 10000000 --shapes narrow
+    python benchmark.py --label after-change --compare benchmark_results/baseline.json
+    python benchmark.py --backend polars --label polars --compare benchmark_results/baseline.json
+
+Every run is saved to benchmark_results/<label>.json. With --compare, each
+operation is matched against the baseline file and the run fails (exit code 1)
+when an operation got slower than --threshold times the baseline.
+"""
+
+import argparse
+import gc
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import streamlit as st
+
+from ingestion import read_csv_chunked, sniff_delimited_file
+from session_store import write_arrow, read_arrow
+from dtype_optimizer import optimize_dtypes
+from profiling import column_profiles
+from duplicates import find_duplicates
+from missingness import null_counts, missingness_patterns
+from aggregation import value_counts_table, groupby_table
+import polars_backend
+from value_index import build_value_index, row_positions
+from history import apply_operation
+from exporters import write_csv_chunked, write_excel_streaming, write_parquet
+
+
+DEFAULT_SIZES = [10_000, 100_000, 1_000_000]
+SHAPES = {'narrow': 8, 'wide': 96}       # number of columns
+MAX_CELLS = 120_000_000                  # skip size/shape combinations above this (override with --force)
+EXCEL_MAX_BENCH_CELLS = 1_000_000        # xlsx export is only measured up to this many cells
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmark_results')
+DEFAULT_THRESHOLD = 1.25
+MIN_COMPARE_SECONDS = 0.05               # ignore timing noise below this
+
+# Measure the operations with the copy-on-write semantics the app runs them with (see app.py)
+pd.set_option('mode.copy_on_write', True)
+
+# The shared helpers use Streamlit caches and session state, which warn on every call without a running app
+for _logger in ('streamlit.runtime.caching.cache_data_api',
+                'streamlit.runtime.scriptrunner_utils.script_run_context',
+                'streamlit.runtime.state.session_state_proxy'):
+    logging.getLogger(_logger).setLevel(logging.ERROR)
+
+
+# ==================== Synthetic Data ====================
+_COLUMN_KINDS = ['int_id', 'int_code', 'float', 'float_nulls', 'category_text', 'free_text', 'date_text', 'bool']
+
+
+def _make_column(kind, n_rows, rng):
+    if kind == 'int_id':
+        # ~10% duplicate ids so duplicate checks have work to do
+        return rng.integers(0, max(int(n_rows * 0.9), 1), n_rows)
+    if kind == 'int_code':
+        return rng.integers(0, 100, n_rows)
+    if kind == 'float':
+        return rng.normal(100, 15, n_rows)
+    if kind == 'float_nulls':
+        values = np.round(rng.random(n_rows) * 1000, 1)
+        values[rng.random(n_rows) < 0.2] = np.nan
+        return values
+    if kind == 'category_text':
+        labels = np.array([f"group_{i:02d}" for i in range(50)], dtype=object)
+        values = labels[rng.integers(0, len(labels), n_rows)]
+        values[rng.random(n_rows) < 0.05] = None
+        return values
+    if kind == 'free_text':
+        return pd.Series(rng.integers(0, n_rows * 10, n_rows)).map('user_{}@example.com'.format).to_numpy()
+    if kind == 'date_text':
+        dates = pd.Timestamp('2020-01-01') + pd.to_timedelta(rng.integers(0, 3650, n_rows), unit='D')
+        return dates.strftime('%Y-%m-%d').to_numpy(dtype=object)
+    if kind == 'bool':
+        return rng.random(n_rows) < 0.5
+    raise ValueError(f"Unknown column kind: {kind}")
+
+
+def make_dataset(n_rows, n_columns, seed=0):
+    """
+    Build a reproducible mixed-dtype DataFrame
+
+    Columns cycle through ints, floats (with and without nulls), low-cardinality
+    strings, high-cardinality strings, date strings and booleans.
+    """
+    rng = np.random.default_rng(seed)
+    columns = {}
+    for i in range(n_columns):
+        kind = _COLUMN_KINDS[i % len(_COLUMN_KINDS)]
+        columns[f"{kind}_{i}"] = _make_column(kind, n_rows, rng)
+    return pd.DataFrame(columns)
+
+
+def _first_column(df, kind):
+    return next(col for col in df.columns if col.startswith(kind))
+
+
+# ==================== Operations ====================
+def _operations(df, work_dir):
+    """
+    Map operation name -> zero-argument callable for one dataset
+
+    Each callable reproduces what the corresponding tab or section does.
+    """
+    csv_path = os.path.join(work_dir, 'data.csv')
+    category_col = _first_column(df, 'category_text')
+    nulls_col = _first_column(df, 'float_nulls')
+    id_col = _first_column(df, 'int_id')
+    code_col = _first_column(df, 'int_code')
+
+    def load_csv():
+        with open(csv_path, 'rb') as handle:
+            detection = sniff_delimited_file(handle, 'data.csv')
+            if polars_backend.use_polars():
+                return polars_backend.read_csv(handle, delimiter=detection['delimiter'],
+                                               encoding=detection['encoding'])
+            return read_csv_chunked(handle, delimiter=detection['delimiter'],
+                                    encoding=detection['encoding'], memory_limit_mb=None)
+
+    def store_original():
+        path = os.path.join(work_dir, 'original.arrow')
+        write_arrow(df, path)
+        return read_arrow(path)
+
+    def replace_values():
+        index = build_value_index(df[category_col])
+        row_positions(index, ['group_01', 'group_02'])
+        return apply_operation(df, {'op': 'replace', 'column': category_col,
+                                    'to_replace': ['group_01', 'group_02'], 'value': 'merged'})
+
+    operations = {
+        'load_csv': load_csv,
+        'store_original': store_original,
+        'optimize_dtypes': lambda: optimize_dtypes(df),
+        'profile_columns': lambda: column_profiles(df),
+        'duplicates_subset': lambda: find_duplicates(df, [id_col, code_col]),
+        'duplicates_all_columns': lambda: find_duplicates(df),
+        'null_counts': lambda: null_counts(df),
+        'missingness_patterns': lambda: missingness_patterns(df, [col for col in df.columns if df[col].hasnans]),
+        'fillna': lambda: apply_operation(df, {'op': 'fillna', 'column': nulls_col, 'value': 0.0}),
+        'dropna': lambda: apply_operation(df, {'op': 'dropna', 'column': nulls_col}),
+        'value_counts': lambda: value_counts_table(df, category_col, top_k=30),
+        'groupby': lambda: groupby_table(df, [category_col], nulls_col, 'mean'),
+        'replace_values': replace_values,
+        'export_csv': lambda: write_csv_chunked(df, os.path.join(work_dir, 'export.csv')),
+        'export_parquet': lambda: write_parquet(df, os.path.join(work_dir, 'export.parquet')),
+    }
+    if df.size <= EXCEL_MAX_BENCH_CELLS:
+        operations['export_excel'] = lambda: write_excel_streaming(df, os.path.join(work_dir, 'export.xlsx'))
+    return operations
+
+
+def _reset_caches(backend='pandas'):
+    """Start every measurement with cold session caches"""
+    st.session_state.clear()
+    st.session_state['store_id'] = 'benchmark'
+    st.session_state['backend'] = backend
+    gc.collect()
+
+
+def measure(operation, repeat=1, track_memory=True, backend='pandas'):
+    """
+    Time an operation and measure its peak memory
+
+    Wall time is the best of ``repeat`` runs without tracing; peak memory is
+    taken from one extra run under tracemalloc (numpy buffers are traced) plus
+    the growth of pyarrow's memory pool.
+
+    Returns:
+    --------
+    dict : 'seconds' and 'peak_mb' (None when memory tracking is off)
+
+    ``backend`` is the compute backend selected for the run ('pandas' or 'polars').
+    """
+    timings = []
+    for _ in range(repeat):
+        _reset_caches(backend)
+        started = time.perf_counter()
+        operation()
+        timings.append(time.perf_counter() - started)
+
+    peak_mb = None
+    if track_memory:
+        _reset_caches(backend)
+        arrow_before = pa.total_allocated_bytes()
+        tracemalloc.start()
+        operation()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        arrow_growth = max(pa.total_allocated_bytes() - arrow_before, 0)
+        peak_mb = round((peak + arrow_growth) / 1024**2, 2)
+
+    return {'seconds': round(min(timings), 4), 'peak_mb': peak_mb}
+
+
+# ==================== Runner ====================
+def _git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmarks(sizes, shapes, operations=None, repeat=1, track_memory=True, force=False,
+                   backend='pandas'):
+    """
+    Run the suite and return a list of result records
+
+    Parameters:
+    -----------
+    sizes : list
+        Row counts
+    shapes : list
+        Keys of SHAPES ('narrow', 'wide')
+    operations : list
+        Operation names to run (None for all)
+    repeat : int
+        Timing repetitions (best is kept)
+    track_memory : bool
+        Measure peak memory with an extra traced run
+    force : bool
+        Also run size/shape combinations above MAX_CELLS
+    backend : str
+        Compute backend (key of ``polars_backend.BACKENDS``)
+
+    Returns:
+    --------
+    list : One dict per (dataset, operation)
+    """
+    records = []
+    for shape in shapes:
+        n_columns = SHAPES[shape]
+        for n_rows in sizes:
+            dataset = f"{shape}-{n_rows}"
+            if n_rows * n_columns > MAX_CELLS and not force:
+                print(f"Skipping {dataset}: {n_rows * n_columns:,} cells (use --force)")
+                continue
+
+            print(f"Preparing {dataset} ({n_rows:,} x {n_columns})...")
+            df = make_dataset(n_rows, n_columns)
+            with tempfile.TemporaryDirectory(prefix='dca_bench_') as work_dir:
+                write_csv_chunked(df, os.path.join(work_dir, 'data.csv'))
+                for name, operation in _operations(df, work_dir).items():
+                    if operations and name not in operations:
+                        continue
+                    result = measure(operation, repeat=repeat, track_memory=track_memory, backend=backend)
+                    records.append({'dataset': dataset, 'shape': shape, 'rows': n_rows,
+                                    'columns': n_columns, 'operation': name, 'backend': backend, **result})
+                    peak = f"{result['peak_mb']:>10,.1f} MB" if result['peak_mb'] is not None else ''
+                    print(f"  {name:<24}{result['seconds']:>10.3f} s{peak}")
+            del df
+            gc.collect()
+    return records
+
+
+def save_results(records, label, path=None):
+    """Write a run with its environment to benchmark_results/<label>.json"""
+    path = path or os.path.join(RESULTS_DIR, f"{label}.json")
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    document = {
+        'label': label,
+        'revision': _git_revision(),
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'environment': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'pandas': pd.__version__,
+            'numpy': np.__version__,
+            'pyarrow': pa.__version__,
+            'polars': polars_backend.pl.__version__ if polars_backend.POLARS_AVAILABLE else None
+        },
+        'results': records
+    }
+    with open(path, 'w', encoding='utf-8') as handle:
+        json.dump(document, handle, indent=2)
+    return path
+
+
+def compare_results(records, baseline_path, threshold=DEFAULT_THRESHOLD):
+    """
+    Compare a run against a saved baseline
+
+    Returns:
+    --------
+    list : Regressions as (dataset, operation, baseline seconds, current seconds)
+    """
+    with open(baseline_path, encoding='utf-8') as handle:
+        baseline = {(r['dataset'], r['operation']): r for r in json.load(handle)['results']}
+
+    regressions = []
+    print(f"\n{'dataset':<18}{'operation':<24}{'baseline':>10}{'current':>10}{'ratio':>8}")
+    for record in records:
+        previous = baseline.get((record['dataset'], record['operation']))
+        if previous is None:
+            continue
+        ratio = record['seconds'] / previous['seconds'] if previous['seconds'] else float('inf')
+        flag = ''
+        if ratio > threshold and record['seconds'] >= MIN_COMPARE_SECONDS:
+            regressions.append((record['dataset'], record['operation'], previous['seconds'], record['seconds']))
+            flag = '  REGRESSION'
+        print(f"{record['dataset']:<18}{record['operation']:<24}{previous['seconds']:>10.3f}"
+              f"{record['seconds']:>10.3f}{ratio:>8.2f}{flag}")
+    return regressions
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the Data Cleaning App operations")
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES,
+                        help="Row counts (default: 10000 100000 1000000; add 10000000 for the full suite)")
+    parser.add_argument('--shapes', nargs='+', choices=list(SHAPES), default=list(SHAPES))
+    parser.add_argument('--operations', nargs='+', default=None, help="Only run these operations")
+    parser.add_argument('--repeat', type=int, default=1, help="Timing repetitions, best is kept")
+    parser.add_argument('--no-memory', action='store_true', help="Skip the traced peak-memory run")
+    parser.add_argument('--force', action='store_true', help=f"Run datasets above {MAX_CELLS:,} cells")
+    parser.add_argument('--backend', choices=polars_backend.available_backends(), default='pandas',
+                        help="Compute backend to measure")
+    parser.add_argument('--label', default=None, help="Name of the result file (default: git revision)")
+    parser.add_argument('--compare', default=None, help="Baseline result file to compare against")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help="Slowdown ratio reported as a regression")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    label = args.label or _git_revision() or datetime.now().strftime('%Y%m%d-%H%M%S')
+
+    records = run_benchmarks(args.sizes, args.shapes, operations=args.operations, repeat=args.repeat,
+                             track_memory=not args.no_memory, force=args.force,
+                             backend=args.backend)
+    print(f"\nSaved results to {save_results(records, label)}")
+
+    if args.compare:
+        regressions = compare_results(records, args.compare, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) above {args.threshold:.2f}x")
+            return 1
+        print("\nNo regressions")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
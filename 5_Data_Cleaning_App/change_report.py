@@ -0,0 +1,216 @@
+"""
+Change Report
+Vectorized comparison of the original upload with the cleaned dataset
+
+Rows are matched on the working DataFrame's index, which keeps the original
+row positions through every cleaning operation. Each column is compared in
+chunks of rows, reading the original chunk from the memory-mapped store, so
+only one chunk of one column is materialized at a time.
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+
+from history import cached_by_version
+from session_store import get_session_dir, get_original_df, original_shape, original_columns
+
+
+REPORT_CHUNK_ROWS = 1_000_000
+SAMPLES_PER_COLUMN = 5
+REMOVED_PREVIEW_ROWS = 1_000
+EXCEL_MAX_ROWS = 1_048_576
+
+
+# ==================== Comparison ====================
+def _category_codes(series, categories):
+    """Codes of a categorical Series against a shared category index (-1 for nulls)"""
+    codes = series.cat.codes.to_numpy()
+    mapped = categories.get_indexer(series.cat.categories)
+    return np.where(codes >= 0, mapped[codes], -1)
+
+
+def _comparable(series):
+    if isinstance(series.dtype, pd.CategoricalDtype) or pd.api.types.is_extension_array_dtype(series):
+        return series.to_numpy(dtype=object)
+    return series.to_numpy()
+
+
+def changed_mask(before, after):
+    """
+    Element-wise "value differs" for two aligned Series
+
+    Two nulls count as equal; a null on one side only counts as a change.
+    Categoricals are compared on their codes, other dtypes with a single
+    numpy comparison (falling back to the string form for incomparable types).
+
+    Returns:
+    --------
+    np.ndarray : Boolean mask
+    """
+    if isinstance(before.dtype, pd.CategoricalDtype) and isinstance(after.dtype, pd.CategoricalDtype):
+        categories = before.cat.categories.union(after.cat.categories)
+        return _category_codes(before, categories) != _category_codes(after, categories)
+
+    left, right = _comparable(before), _comparable(after)
+    try:
+        with np.errstate(invalid='ignore'):
+            equal = left == right
+    except TypeError:
+        equal = None
+    if not isinstance(equal, np.ndarray) or equal.shape != left.shape:
+        equal = left.astype(str) == right.astype(str)
+
+    both_null = before.isna().to_numpy() & after.isna().to_numpy()
+    return ~(equal.astype(bool) | both_null)
+
+
+def compare_frames(current, read_original, n_original_rows, columns_before,
+                   chunk_rows=REPORT_CHUNK_ROWS, samples=SAMPLES_PER_COLUMN):
+    """
+    Compare a cleaned DataFrame with its original, column by column
+
+    Parameters:
+    -----------
+    current : pd.DataFrame
+        Cleaned DataFrame, indexed by original row position
+    read_original : callable
+        ``read_original(column, rows)`` -> original values of one column at the
+        given row positions, as a Series
+    n_original_rows : int
+        Number of rows of the original
+    columns_before : list
+        Columns of the original
+    chunk_rows : int
+        Rows compared per vectorized step
+    samples : int
+        Before/after examples kept per changed column
+
+    Returns:
+    --------
+    dict : 'original_rows', 'current_rows', 'removed_rows' (original positions),
+        'summary' (one row per column) and 'samples' (Row/Column/Before/After)
+    """
+    kept = current.index.to_numpy(dtype=np.int64)
+    removed = np.ones(n_original_rows, dtype=bool)
+    removed[kept] = False
+
+    summary, sample_frames = [], []
+    current_columns, original_set = set(current.columns), set(columns_before)
+    for col in columns_before:
+        if col not in current_columns:
+            summary.append({'Column': col, 'Status': 'removed', 'Original Dtype': None,
+                            'Current Dtype': None, 'Changed Cells': None, 'Changed (%)': None})
+            continue
+
+        original_dtype, changed, sampled = None, 0, 0
+        for start in range(0, len(kept), chunk_rows):
+            rows = kept[start:start + chunk_rows]
+            before = read_original(col, rows)
+            after = current[col].iloc[start:start + chunk_rows]
+            original_dtype = original_dtype or str(before.dtype)
+
+            mask = changed_mask(before, after)
+            changed += int(mask.sum())
+            if sampled < samples and mask.any():
+                hits = np.flatnonzero(mask)[:samples - sampled]
+                sampled += len(hits)
+                sample_frames.append(pd.DataFrame({
+                    'Row': rows[hits], 'Column': col,
+                    'Before': before.iloc[hits].astype(object).to_numpy(),
+                    'After': after.iloc[hits].astype(object).to_numpy()
+                }))
+
+        summary.append({
+            'Column': col,
+            'Status': 'changed' if changed else 'unchanged',
+            'Original Dtype': original_dtype or str(current[col].dtype),
+            'Current Dtype': str(current[col].dtype),
+            'Changed Cells': changed,
+            'Changed (%)': round(changed / len(kept) * 100, 2) if len(kept) else 0.0
+        })
+
+    for col in current.columns:
+        if col not in original_set:
+            summary.append({'Column': col, 'Status': 'added', 'Original Dtype': None,
+                            'Current Dtype': str(current[col].dtype), 'Changed Cells': None, 'Changed (%)': None})
+
+    sample_table = (pd.concat(sample_frames, ignore_index=True) if sample_frames
+                    else pd.DataFrame(columns=['Row', 'Column', 'Before', 'After']))
+    return {
+        'original_rows': n_original_rows,
+        'current_rows': len(current),
+        'removed_rows': np.flatnonzero(removed),
+        'summary': pd.DataFrame(summary),
+        'samples': sample_table
+    }
+
+
+def change_report(df):
+    """
+    Change report of the session dataset against the stored original
+
+    Cached per dataset version; any operation invalidates it.
+
+    Returns:
+    --------
+    dict or None : See ``compare_frames``; None when no original is stored
+    """
+    shape = original_shape()
+    if shape is None:
+        return None
+
+    def read_original(col, rows):
+        return get_original_df(columns=[str(col)], rows=rows).iloc[:, 0]
+
+    return cached_by_version(
+        'change_report', None, list(df.columns),
+        lambda: compare_frames(df, read_original, shape[0], original_columns())
+    )
+
+
+# ==================== Export ====================
+def report_tables(report):
+    """
+    Flatten a report into the tables written on export
+
+    Returns:
+    --------
+    dict : Sheet name -> DataFrame ('Overview', 'Columns', 'Changed Cells', 'Removed Rows')
+    """
+    removed = report['removed_rows']
+    changed_columns = int((report['summary']['Status'] != 'unchanged').sum())
+    overview = pd.DataFrame({
+        'Metric': ['Original rows', 'Current rows', 'Removed rows', 'Columns with changes'],
+        'Value': [report['original_rows'], report['current_rows'], len(removed), changed_columns]
+    })
+    return {
+        'Overview': overview,
+        'Columns': report['summary'],
+        'Changed Cells': report['samples'],
+        'Removed Rows': pd.DataFrame({'Original Row': removed[:EXCEL_MAX_ROWS - 1]})
+    }
+
+
+def write_change_report(report, path):
+    """Write a report as an Excel workbook with one sheet per table of ``report_tables``"""
+    with pd.ExcelWriter(path) as writer:
+        for sheet, table in report_tables(report).items():
+            table.to_excel(writer, sheet_name=sheet, index=False)
+
+
+def build_change_report_export(report, version):
+    """
+    Write the report of one dataset version next to the data exports
+
+    Returns:
+    --------
+    str : Path to the .xlsx file
+    """
+    export_dir = os.path.join(get_session_dir(), 'exports')
+    os.makedirs(export_dir, exist_ok=True)
+    path = os.path.join(export_dir, f"{version}_changes.xlsx")
+    if not os.path.exists(path):
+        write_change_report(report, path)
+    return path
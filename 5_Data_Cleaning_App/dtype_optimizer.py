@@ -0,0 +1,170 @@
+"""
+Dtype Optimizer
+Compact column types after ingestion, with a reversible plan for export
+"""
+
+import warnings
+
+import numpy as np
+import pandas as pd
+
+
+CATEGORY_MAX_RATIO = 0.5               # convert strings to category when unique/rows is below this
+CATEGORY_SAMPLE_ROWS = 10_000          # rows sampled (evenly spaced) to estimate unique/rows
+DATE_FORMATS = ['%Y-%m-%d', '%Y-%m-%d %H:%M:%S', '%d/%m/%Y', '%m/%d/%Y', '%d-%m-%Y', '%Y/%m/%d']
+DATE_SAMPLE_ROWS = 1_000
+
+
+# ==================== Column Rules ====================
+def _downcast_integer(series):
+    downcast = pd.to_numeric(series, downcast='integer')
+    if downcast.dtype == series.dtype and pd.api.types.is_signed_integer_dtype(series) and series.min() >= 0:
+        downcast = pd.to_numeric(series, downcast='unsigned')
+    return downcast
+
+
+def _downcast_float(series):
+    """float64 -> float32 only when every value survives the round trip"""
+    if series.dtype != np.float64:
+        return series
+    downcast = series.astype(np.float32)
+    restored = downcast.astype(np.float64)
+    if ((restored == series) | (restored.isna() & series.isna())).all():
+        return downcast
+    return series
+
+
+def _detect_date_format(series):
+    """
+    Return the date format every non-null value is written in, or None
+
+    A format only qualifies when formatting the parsed dates reproduces the
+    original strings exactly, so the conversion can be reversed losslessly.
+    """
+    values = series.dropna()
+    if values.empty or pd.api.types.infer_dtype(values, skipna=True) != 'string':
+        return None
+    sample = values.iloc[:DATE_SAMPLE_ROWS]
+    for date_format in DATE_FORMATS:
+        parsed = pd.to_datetime(sample, format=date_format, errors='coerce')
+        if parsed.notna().all() and (parsed.dt.strftime(date_format) == sample).all():
+            parsed = pd.to_datetime(values, format=date_format, errors='coerce')
+            if parsed.notna().all() and (parsed.dt.strftime(date_format) == values).all():
+                return date_format
+    return None
+
+
+def is_category_profitable(series):
+    """
+    Whether an object column has enough repeated values to be cheaper as a categorical
+
+    Shared by the optimizer and the aggregation engine so they agree on every
+    column. The unique/rows ratio is estimated on evenly spaced rows, which
+    over- rather than underestimates it for long columns.
+    """
+    if not pd.api.types.is_object_dtype(series) or series.isna().all():
+        return False
+    sample = series.iloc[::max(1, len(series) // CATEGORY_SAMPLE_ROWS)]
+    return sample.nunique() / len(sample) <= CATEGORY_MAX_RATIO
+
+
+# ==================== Public API ====================
+def optimize_dtypes(df, parse_dates=True):
+    """
+    Convert columns to the smallest lossless representation
+
+    - integers are downcast to the smallest (unsigned) width that holds them
+    - float64 columns become float32 when no value changes
+    - object columns whose values all follow one date format become datetime64
+    - other object columns with repeated values become category
+
+    Parameters:
+    -----------
+    df : pd.DataFrame
+        Freshly loaded DataFrame
+    parse_dates : bool
+        Whether to convert date-like string columns
+
+    Returns:
+    --------
+    tuple : (optimized pd.DataFrame, plan) where plan maps each converted
+        column to {'from': original dtype, 'to': new dtype, 'date_format': str or None}
+    """
+    if df.columns.has_duplicates:
+        return df, {}
+
+    columns = {}
+    plan = {}
+    for col in df.columns:
+        series = df[col]
+        converted, date_format = series, None
+        if pd.api.types.is_bool_dtype(series):
+            pass
+        elif pd.api.types.is_integer_dtype(series) and not pd.api.types.is_extension_array_dtype(series):
+            converted = _downcast_integer(series)
+        elif pd.api.types.is_float_dtype(series):
+            converted = _downcast_float(series)
+        elif pd.api.types.is_object_dtype(series):
+            date_format = _detect_date_format(series) if parse_dates else None
+            if date_format:
+                converted = pd.to_datetime(series, format=date_format)
+            elif is_category_profitable(series):
+                converted = series.astype('category')
+
+        if converted.dtype != series.dtype:
+            plan[col] = {'from': str(series.dtype), 'to': str(converted.dtype), 'date_format': date_format}
+        columns[col] = converted
+
+    return pd.DataFrame(columns, index=df.index), plan
+
+
+def restore_dtypes(df, plan):
+    """
+    Undo ``optimize_dtypes`` for export fidelity
+
+    Columns are only restored while they still have the optimized dtype;
+    columns that were dropped or changed type since are left as they are,
+    except date columns turned into object by an edit (e.g. text inserted by
+    fillna/replace), whose remaining timestamps are still written in the
+    source format.
+
+    Parameters:
+    -----------
+    df : pd.DataFrame
+        DataFrame in the optimized representation
+    plan : dict
+        Plan returned by ``optimize_dtypes``
+
+    Returns:
+    --------
+    pd.DataFrame : DataFrame with the original dtypes
+    """
+    restored = df.copy(deep=False)
+    for col, step in plan.items():
+        if col not in df.columns:
+            continue
+        series = df[col]
+        if step['date_format'] and series.dtype == object:
+            fmt = step['date_format']
+            restored[col] = series.map(lambda v: v.strftime(fmt) if isinstance(v, pd.Timestamp) else v)
+            continue
+        if str(series.dtype) != step['to']:
+            continue
+        if step['date_format']:
+            restored[col] = series.dt.strftime(step['date_format']).astype(object).where(series.notna(), np.nan)
+        elif isinstance(series.dtype, pd.CategoricalDtype):
+            restored[col] = series.astype(object).where(series.notna(), np.nan)
+        else:
+            with warnings.catch_warnings():
+                warnings.simplefilter('ignore', RuntimeWarning)
+                restored[col] = series.astype(step['from'])
+    return restored
+
+
+def memory_report(original, optimized, plan):
+    """Summarize an optimizer pass: memory before/after and converted columns"""
+    return {
+        'before': int(original.memory_usage(deep=True).sum()),
+        'after': int(optimized.memory_usage(deep=True).sum()),
+        'columns': len(plan)
+    }
@@ -0,0 +1,162 @@
+"""
+Duplicate Detection
+Row-fingerprint index for exact and near-duplicate queries
+"""
+
+import numpy as np
+import pandas as pd
+
+from history import cached_by_version
+import polars_backend
+
+
+NORMALIZERS = {
+    'text': 'Ignore case, whitespace and punctuation',
+    'digits': 'Digits only (phone numbers, IDs)',
+    'exact': 'Exact value'
+}
+
+GROUP_COLUMN = 'Near-Duplicate Group'
+
+_PHONE_HINTS = ('phone', 'mobile', 'tel', 'fax')
+
+
+# ==================== Row Fingerprints ====================
+def column_hash(df, column):
+    """
+    Return a uint64 hash per row of one column, cached until the column or rows change
+
+    Missing values hash to the same value, matching ``DataFrame.duplicated``.
+    """
+    return cached_by_version(
+        'column_hash', column, [column],
+        lambda: pd.util.hash_pandas_object(df[column], index=False).to_numpy()
+    )
+
+
+def combine_hashes(hashes):
+    """Combine per-column hashes into one order-sensitive row fingerprint"""
+    # Same mixing scheme as pandas' combine_hash_arrays
+    n_columns = len(hashes)
+    result = np.full(len(hashes[0]) if n_columns else 0, 0x345678, dtype=np.uint64)
+    multiplier = np.uint64(1000003)
+    with np.errstate(over='ignore'):
+        for i, values in enumerate(hashes):
+            result ^= values
+            result *= multiplier
+            multiplier += np.uint64(82520 + 2 * (n_columns - i))
+        result += np.uint64(97531)
+    return result
+
+
+def row_fingerprints(df, subset=None):
+    """
+    Return one uint64 fingerprint per row for any column subset
+
+    Per-column hashes are computed once and reused for every subset, so a new
+    subset only costs a vectorized combine.
+    """
+    columns = list(subset) if subset else list(df.columns)
+    return combine_hashes([column_hash(df, col) for col in columns])
+
+
+def _duplicate_masks(df, columns):
+    if polars_backend.use_polars(df):
+        try:
+            return polars_backend.duplicate_masks(df, columns)
+        except polars_backend.BACKEND_ERRORS:
+            pass
+    fingerprints = pd.Series(row_fingerprints(df, columns))
+    return (fingerprints.duplicated(keep=False).to_numpy(),
+            fingerprints.duplicated(keep='first').to_numpy())
+
+
+def find_duplicates(df, subset=None):
+    """
+    Find exact duplicate rows using the fingerprint index
+
+    Parameters:
+    -----------
+    df : pd.DataFrame
+        Session DataFrame
+    subset : list
+        Columns to compare (None for all columns)
+
+    Returns:
+    --------
+    tuple : (pd.DataFrame of all rows that have a duplicate, number of rows
+        that ``drop_duplicates`` would remove)
+    """
+    columns = list(subset) if subset else list(df.columns)
+    all_duplicates, later_duplicates = cached_by_version(
+        'duplicates', tuple(columns), columns, lambda: _duplicate_masks(df, columns)
+    )
+    return df[all_duplicates], int(later_duplicates.sum())
+
+
+# ==================== Near Duplicates ====================
+def default_normalizer(column):
+    """Guess a normalizer from the column name"""
+    return 'digits' if any(hint in str(column).lower() for hint in _PHONE_HINTS) else 'text'
+
+
+def normalize_column(series, normalizer):
+    """
+    Reduce values to a blocking key
+
+    'text' lowercases and drops whitespace and punctuation, 'digits' keeps
+    only digits (so "+20 100-123 4567" and "201001234567" match), 'exact'
+    leaves values untouched.
+    """
+    if normalizer == 'exact':
+        return series
+    values = series.astype('string')
+    if normalizer == 'digits':
+        return values.str.replace(r'\D', '', regex=True)
+    return values.str.lower().str.replace(r'[\W_]+', '', regex=True)
+
+
+def _normalized_hash(df, column, normalizer):
+    return cached_by_version(
+        'normalized_hash', (column, normalizer), [column],
+        lambda: pd.util.hash_pandas_object(normalize_column(df[column], normalizer), index=False).to_numpy()
+    )
+
+
+def find_near_duplicates(df, normalizers):
+    """
+    Find groups of rows that only differ in formatting (case, spacing, punctuation)
+
+    Rows are blocked on the normalized values of the chosen columns; every
+    block with more than one row whose raw values are not all identical is a
+    near-duplicate group.
+
+    Parameters:
+    -----------
+    df : pd.DataFrame
+        Session DataFrame
+    normalizers : dict
+        Column -> normalizer name (see NORMALIZERS)
+
+    Returns:
+    --------
+    pd.DataFrame : Matching rows with a leading GROUP_COLUMN, sorted by group
+    """
+    columns = list(normalizers)
+    if not columns:
+        return df.iloc[0:0]
+
+    blocking_key = pd.Series(combine_hashes([_normalized_hash(df, col, normalizers[col]) for col in columns]))
+    exact_key = pd.Series(row_fingerprints(df, columns))
+
+    # Blocks with at least two rows and more than one distinct raw value
+    block_sizes = blocking_key.map(blocking_key.value_counts())
+    variants = exact_key.groupby(blocking_key).transform('nunique')
+    mask = ((block_sizes > 1) & (variants > 1)).to_numpy()
+    if not mask.any():
+        return df.iloc[0:0]
+
+    matches = df[mask].copy()
+    groups = blocking_key[mask]
+    matches.insert(0, GROUP_COLUMN, pd.factorize(groups)[0] + 1)
+    return matches.sort_values(GROUP_COLUMN, kind='mergesort')
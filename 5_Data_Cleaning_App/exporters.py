@@ -0,0 +1,162 @@
+"""
+Export Helpers
+On-demand, cached, streaming export of the working dataset
+"""
+
+import glob
+import os
+
+import openpyxl
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+import pyarrow.parquet as pq
+
+try:
+    import xlsxwriter
+    XLSXWRITER_AVAILABLE = True
+except ImportError:
+    XLSXWRITER_AVAILABLE = False
+
+from session_store import get_session_dir
+
+
+EXPORT_CHUNK_ROWS = 100_000
+EXCEL_MAX_ROWS = 1_048_576
+
+EXPORT_FORMATS = {
+    'CSV': {'extension': 'csv', 'mime': 'text/csv'},
+    'Excel': {'extension': 'xlsx',
+              'mime': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'},
+    'Parquet': {'extension': 'parquet', 'mime': 'application/octet-stream'},
+    'Feather': {'extension': 'feather', 'mime': 'application/octet-stream'}
+}
+
+
+# ==================== Writers ====================
+def write_csv_chunked(df, path, encoding='utf-8', chunk_rows=EXPORT_CHUNK_ROWS):
+    """
+    Write a DataFrame to CSV one chunk of rows at a time
+
+    Only one chunk is ever formatted in memory, unlike ``df.to_csv(StringIO)``
+    which builds the whole file as a string first.
+    """
+    with open(path, 'w', encoding=encoding, newline='') as handle:
+        for start in range(0, max(len(df), 1), chunk_rows):
+            df.iloc[start:start + chunk_rows].to_csv(handle, index=False, header=(start == 0))
+
+
+def _excel_rows(df, chunk_rows):
+    """Yield rows of plain Python values (None for missing) in row-major order"""
+    for start in range(0, len(df), chunk_rows):
+        chunk = df.iloc[start:start + chunk_rows]
+        for col in chunk.columns:
+            if isinstance(chunk[col].dtype, pd.DatetimeTZDtype):
+                chunk = chunk.assign(**{col: chunk[col].dt.tz_localize(None)})
+        values = chunk.astype(object).where(chunk.notna(), None)
+        yield from values.itertuples(index=False, name=None)
+
+
+def write_excel_streaming(df, path, sheet_name='Cleaned Data', chunk_rows=EXPORT_CHUNK_ROWS):
+    """
+    Write a DataFrame to .xlsx in constant memory
+
+    Uses xlsxwriter's ``constant_memory`` mode (each row is flushed to disk as
+    soon as the next one starts), falling back to openpyxl's write-only mode.
+    """
+    if len(df) + 1 > EXCEL_MAX_ROWS:
+        raise ValueError(
+            f"Excel supports at most {EXCEL_MAX_ROWS - 1:,} data rows; "
+            f"this dataset has {len(df):,}. Use CSV, Parquet or Feather instead."
+        )
+
+    header = [str(col) for col in df.columns]
+    if XLSXWRITER_AVAILABLE:
+        workbook = xlsxwriter.Workbook(path, {
+            'constant_memory': True,
+            'default_date_format': 'yyyy-mm-dd hh:mm:ss',
+            'strings_to_urls': False
+        })
+        worksheet = workbook.add_worksheet(sheet_name)
+        worksheet.write_row(0, 0, header)
+        for row_idx, row in enumerate(_excel_rows(df, chunk_rows), start=1):
+            worksheet.write_row(row_idx, 0, row)
+        workbook.close()
+    else:
+        workbook = openpyxl.Workbook(write_only=True)
+        worksheet = workbook.create_sheet(sheet_name)
+        worksheet.append(header)
+        for row in _excel_rows(df, chunk_rows):
+            worksheet.append(row)
+        workbook.save(path)
+
+
+def write_parquet(df, path, chunk_rows=EXPORT_CHUNK_ROWS * 10):
+    """Write a DataFrame to Parquet, converting one row group at a time"""
+    schema = pa.Schema.from_pandas(df, preserve_index=False)
+    with pq.ParquetWriter(path, schema, compression='snappy') as writer:
+        for start in range(0, max(len(df), 1), chunk_rows):
+            chunk = df.iloc[start:start + chunk_rows]
+            writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+
+
+def write_feather(df, path):
+    """Write a DataFrame to Feather (Arrow IPC, lz4-compressed)"""
+    feather.write_feather(pa.Table.from_pandas(df, preserve_index=False), path, compression='lz4')
+
+
+# ==================== Cached Export ====================
+def export_path(version, export_format, encoding='utf-8'):
+    """Return the on-disk cache path of an export for one dataset version"""
+    extension = EXPORT_FORMATS[export_format]['extension']
+    suffix = f"_{encoding}" if export_format == 'CSV' else ''
+    export_dir = os.path.join(get_session_dir(), 'exports')
+    os.makedirs(export_dir, exist_ok=True)
+    return os.path.join(export_dir, f"{version}{suffix}.{extension}")
+
+
+def build_export(df, export_format, version, encoding='utf-8'):
+    """
+    Generate an export file, reusing a cached one for the same dataset version
+
+    Parameters:
+    -----------
+    df : pd.DataFrame
+        DataFrame to export
+    export_format : str
+        One of EXPORT_FORMATS ('CSV', 'Excel', 'Parquet', 'Feather')
+    version : str
+        Dataset version token; exports of other versions are discarded
+    encoding : str
+        Text encoding (CSV only)
+
+    Returns:
+    --------
+    str : Path to the generated file
+    """
+    path = export_path(version, export_format, encoding)
+    if os.path.exists(path):
+        return path
+
+    # Exports of older versions can never be requested again
+    for stale in glob.glob(os.path.join(os.path.dirname(path), '*')):
+        if not os.path.basename(stale).startswith((f"{version}_", f"{version}.")):
+            os.unlink(stale)
+
+    tmp_path = f"{path}.tmp"
+    try:
+        if export_format == 'CSV':
+            write_csv_chunked(df, tmp_path, encoding=encoding)
+        elif export_format == 'Excel':
+            write_excel_streaming(df, tmp_path)
+        elif export_format == 'Parquet':
+            write_parquet(df, tmp_path)
+        elif export_format == 'Feather':
+            write_feather(df, tmp_path)
+        else:
+            raise ValueError(f"Unsupported export format: {export_format}")
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+    return path
@@ -0,0 +1,337 @@
+"""
+Operation History
+Operation log with undo/redo for the cleaning tabs
+
+Every cleaning action is described by a small, serializable operation dict:
+
+    {'op': 'drop_duplicates', 'subset': ['name', 'phone']}
+    {'op': 'dropna', 'column': 'age'}
+    {'op': 'fillna', 'column': 'age', 'value': 0.0}
+    {'op': 'dropna_columns', 'columns': ['age', 'phone'], 'how': 'any'}
+    {'op': 'fillna_columns', 'columns': ['age', 'city'], 'values': [0.0, 'Unknown']}
+    {'op': 'replace', 'column': 'gender', 'to_replace': ['M', 'm'], 'value': 'Male'}
+
+Instead of keeping a copy of the DataFrame per step, each log entry stores the
+inverse delta of its operation: the removed rows for row operations, or the
+previous version of the changed column for column operations. With pandas
+copy-on-write that previous column is a snapshot shared with nothing else, so
+history memory grows with the changed columns/rows, not with the dataset size.
+"""
+
+import pandas as pd
+import streamlit as st
+
+from session_store import get_original_df
+
+
+MAX_HISTORY = 50
+MAX_CHANGE_LOG = 500
+
+OPERATION_LABELS = {
+    'drop_duplicates': 'Remove duplicates',
+    'dropna': 'Remove rows with nulls',
+    'fillna': 'Replace nulls',
+    'dropna_columns': 'Remove rows with nulls',
+    'fillna_columns': 'Replace nulls',
+    'replace': 'Replace values'
+}
+
+
+# ==================== Pure Operations ====================
+def _with_category(series, value):
+    """Add ``value`` to the categories of a categorical column so it can be assigned"""
+    if isinstance(series.dtype, pd.CategoricalDtype) and pd.notna(value) and value not in series.cat.categories:
+        return series.cat.add_categories([value])
+    return series
+
+
+def apply_operation(df, op):
+    """
+    Apply a single operation to a DataFrame
+
+    Parameters:
+    -----------
+    df : pd.DataFrame
+        Input DataFrame (not modified)
+    op : dict
+        Operation description (see module docstring)
+
+    Returns:
+    --------
+    pd.DataFrame : Resulting DataFrame
+    """
+    kind = op['op']
+    if kind == 'drop_duplicates':
+        return df.drop_duplicates(subset=op.get('subset') or None)
+    if kind == 'dropna':
+        return df.dropna(subset=[op['column']])
+    if kind == 'fillna':
+        result = df.copy(deep=False)
+        result[op['column']] = _with_category(df[op['column']], op['value']).fillna(op['value'])
+        return result
+    if kind == 'dropna_columns':
+        return df.dropna(subset=list(op['columns']), how=op.get('how', 'any'))
+    if kind == 'fillna_columns':
+        result = df.copy(deep=False)
+        for column, value in zip(op['columns'], op['values']):
+            result[column] = _with_category(df[column], value).fillna(value)
+        return result
+    if kind == 'replace':
+        result = df.copy(deep=False)
+        column = df[op['column']]
+        if isinstance(column.dtype, pd.CategoricalDtype):
+            # Categorical replace() may not add categories; assign through a mask instead
+            column = _with_category(column, op['value'])
+            column = column.mask(column.isin(op['to_replace']), op['value']).cat.remove_unused_categories()
+        else:
+            column = column.replace(op['to_replace'], op['value'])
+        result[op['column']] = column
+        return result
+    raise ValueError(f"Unknown operation: {kind}")
+
+
+def operation_columns(op):
+    """Return the columns whose values an operation changes (None for row operations)"""
+    if op['op'] in ('fillna', 'replace'):
+        return [op['column']]
+    if op['op'] == 'fillna_columns':
+        return list(op['columns'])
+    return None
+
+
+def describe_operation(op):
+    """Return a short human-readable description of an operation"""
+    label = OPERATION_LABELS.get(op['op'], op['op'])
+    if op['op'] == 'drop_duplicates':
+        subset = op.get('subset')
+        return f"{label} ({', '.join(map(str, subset)) if subset else 'all columns'})"
+    if op['op'] == 'replace':
+        return f"{label} in '{op['column']}' ({len(op['to_replace'])} value(s) -> '{op['value']}')"
+    if op['op'] == 'fillna':
+        return f"{label} in '{op['column']}' with '{op['value']}'"
+    if op['op'] == 'dropna_columns':
+        joiner = ' or ' if op.get('how', 'any') == 'any' else ' and '
+        return f"{label} in {joiner.join(repr(col) for col in op['columns'])}"
+    if op['op'] == 'fillna_columns':
+        return f"{label} in {len(op['columns'])} column(s) ({', '.join(map(str, op['columns']))})"
+    return f"{label} in '{op['column']}'"
+
+
+# ==================== Deltas ====================
+def _make_delta(before, after, op):
+    """Capture what is needed to turn ``after`` back into ``before``"""
+    columns = operation_columns(op)
+    if columns is not None:
+        return {'columns': {col: before[col] for col in columns}}
+    removed = before.index.difference(after.index, sort=False)
+    return {'index': before.index, 'removed': before.loc[removed]}
+
+
+def _revert_delta(df, delta):
+    """Undo a delta produced by ``_make_delta``"""
+    if 'columns' in delta:
+        result = df.copy(deep=False)
+        for col, values in delta['columns'].items():
+            result[col] = values
+        return result
+    if delta['removed'].empty:
+        return df
+    return pd.concat([df, delta['removed']]).reindex(delta['index'])
+
+
+# ==================== Dataset Version ====================
+def _bump_version(columns=None):
+    """Advance the dataset version and log which columns changed (None for all)"""
+    st.session_state['df_version'] = st.session_state.get('df_version', 0) + 1
+    change_log = st.session_state.setdefault('change_log', [])
+    change_log.append((dataset_version(), None if columns is None else list(columns)))
+    del change_log[:-MAX_CHANGE_LOG]
+
+
+def _set_df(df, columns=None):
+    """Replace the session DataFrame and bump the dataset version"""
+    st.session_state['df'] = df
+    _bump_version(columns)
+
+
+def dataset_version():
+    """
+    Return a token identifying the current state of the session DataFrame
+
+    The token changes whenever an operation, undo, redo, reset or new upload
+    changes the data, and is unique across sessions, so it can key caches.
+
+    Returns:
+    --------
+    str : Dataset version token
+    """
+    return f"{st.session_state.get('store_id', 'local')}-{st.session_state.get('df_version', 0)}"
+
+
+def changed_columns_since(version):
+    """
+    Return the columns whose values changed after a given dataset version
+
+    Parameters:
+    -----------
+    version : str
+        Token previously returned by ``dataset_version()``
+
+    Returns:
+    --------
+    set or None : Changed columns, or None when rows changed, a new dataset
+        was loaded, or the version is too old to tell
+    """
+    if version == dataset_version():
+        return set()
+    change_log = st.session_state.get('change_log', [])
+    versions = [token for token, _ in change_log]
+    if version not in versions:
+        return None
+    changed = set()
+    for _, columns in change_log[versions.index(version) + 1:]:
+        if columns is None:
+            return None
+        changed.update(columns)
+    return changed
+
+
+# ==================== Version-Keyed Caches ====================
+MAX_CACHE_ENTRIES = 32
+
+
+def cached_by_version(namespace, key, columns, compute):
+    """
+    Cache a derived result for the current dataset version
+
+    Entries survive new versions that did not change any of their ``columns``,
+    so e.g. value counts of column A stay valid after a replacement in column B.
+
+    Parameters:
+    -----------
+    namespace : str
+        Cache name (one LRU cache per namespace in session state)
+    key : hashable
+        Key of the result within the namespace
+    columns : iterable
+        Columns the result depends on
+    compute : callable
+        Zero-argument function producing the result on a miss
+
+    Returns:
+    --------
+    object : Cached or freshly computed result
+    """
+    version = dataset_version()
+    cache = st.session_state.setdefault(f"cache_{namespace}", {'version': version, 'entries': {}})
+    if cache['version'] != version:
+        changed = changed_columns_since(cache['version'])
+        if changed is None:
+            cache['entries'] = {}
+        else:
+            cache['entries'] = {k: entry for k, entry in cache['entries'].items() if not entry[0] & changed}
+        cache['version'] = version
+
+    entries = cache['entries']
+    if key in entries:
+        entries[key] = entries.pop(key)  # most recently used goes last
+        return entries[key][1]
+
+    value = compute()
+    entries[key] = (set(columns), value)
+    while len(entries) > MAX_CACHE_ENTRIES:
+        entries.pop(next(iter(entries)))
+    return value
+
+
+# ==================== Session History ====================
+def _history():
+    if 'history' not in st.session_state:
+        reset_history()
+    return st.session_state['history']
+
+
+def reset_history():
+    """Forget all undo/redo steps (e.g. after loading a new file)"""
+    st.session_state['history'] = {'undo': [], 'redo': [], 'applied': []}
+    _bump_version()
+
+
+def run_operation(op):
+    """
+    Apply an operation to the session DataFrame and record it for undo
+
+    Parameters:
+    -----------
+    op : dict
+        Operation description
+
+    Returns:
+    --------
+    pd.DataFrame : The new session DataFrame
+    """
+    history = _history()
+    before = st.session_state['df']
+    after = apply_operation(before, op)
+
+    history['undo'].append({'op': op, 'delta': _make_delta(before, after, op)})
+    del history['undo'][:-MAX_HISTORY]
+    history['redo'].clear()
+    history['applied'].append(op)
+
+    _set_df(after, operation_columns(op))
+    return after
+
+
+def can_undo():
+    return bool(_history()['undo'])
+
+
+def can_redo():
+    return bool(_history()['redo'])
+
+
+def undo():
+    """Revert the most recent operation"""
+    history = _history()
+    if not history['undo']:
+        return None
+    entry = history['undo'].pop()
+    _set_df(_revert_delta(st.session_state['df'], entry['delta']), operation_columns(entry['op']))
+    history['redo'].append(entry['op'])
+    history['applied'].pop()
+    return entry['op']
+
+
+def redo():
+    """Re-apply the most recently undone operation"""
+    history = _history()
+    if not history['redo']:
+        return None
+    op = history['redo'].pop()
+    before = st.session_state['df']
+    after = apply_operation(before, op)
+    history['undo'].append({'op': op, 'delta': _make_delta(before, after, op)})
+    history['applied'].append(op)
+    _set_df(after, operation_columns(op))
+    return op
+
+
+def reset_to_original():
+    """Reload the original dataset from disk and clear the history"""
+    original = get_original_df()
+    if original is None:
+        return None
+    st.session_state['df'] = original
+    reset_history()
+    return original
+
+
+def applied_operations():
+    """
+    Return every operation currently applied, oldest first
+
+    Unlike the undo stack this list is not capped at MAX_HISTORY, so it can be
+    saved as a complete pipeline.
+    """
+    return list(_history()['applied'])
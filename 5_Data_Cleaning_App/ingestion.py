@@ -0,0 +1,457 @@
+"""
+Streaming Ingestion Helpers
+Chunked, memory-bounded CSV reading for the Data Cleaning App
+"""
+
+import codecs
+import csv
+import hashlib
+import io
+import os
+import re
+import tempfile
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.csv as pa_csv
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+
+# ==================== Defaults ====================
+DEFAULT_MEMORY_LIMIT_MB = 1024
+DEFAULT_BLOCK_SIZE = 16 * 1024**2      # bytes per pyarrow block
+DEFAULT_CHUNK_ROWS = 250_000           # rows per pandas chunk (fallback engine)
+ON_LIMIT_OPTIONS = {
+    'sample': 'Keep a random sample in memory'
+}
+# Spilling writes Parquet through pyarrow, so it is only offered when pyarrow is installed
+if PYARROW_AVAILABLE:
+    ON_LIMIT_OPTIONS['spill'] = 'Spill full data to disk (Parquet) and keep a sample in memory'
+
+SNIFF_HEAD_BYTES = 256 * 1024
+SNIFF_TAIL_BYTES = 32 * 1024
+SNIFF_ENCODINGS = ['utf-8', 'cp1252', 'latin1']
+SNIFF_DELIMITERS = [',', ';', '\t', '|']
+
+_ARROW_CONFLICT = re.compile(r"In CSV column #(\d+): .*CSV conversion error")
+
+
+class _SchemaConflict(Exception):
+    """Raised when a later block does not fit the types inferred from the first block"""
+
+    def __init__(self, column, schema):
+        super().__init__(column)
+        self.column = column
+        self.schema = schema
+
+
+# ==================== Format Sniffer ====================
+def _decode_sample(sample, encoding, final):
+    """Decode a byte sample, tolerating a multi-byte character cut at the end"""
+    decoder = codecs.getincrementaldecoder(encoding)()
+    return decoder.decode(sample, final=final)
+
+
+def _trim_partial_start(tail):
+    """Drop UTF-8 continuation bytes left at the start of a sample taken mid-file"""
+    start = 0
+    while start < min(len(tail), 3) and 0x80 <= tail[start] <= 0xBF:
+        start += 1
+    return tail[start:]
+
+
+def _sniff_encoding(head, tail):
+    """Return the first candidate encoding that decodes both samples"""
+    if head.startswith(codecs.BOM_UTF8):
+        return 'utf-8-sig'
+    for encoding in SNIFF_ENCODINGS:
+        try:
+            _decode_sample(head, encoding, final=False)
+            _decode_sample(tail, encoding, final=True)
+            return encoding
+        except UnicodeDecodeError:
+            continue
+    return 'latin1'
+
+
+def _complete_lines(text, drop_first=False):
+    """Split a sample into lines, dropping partial lines cut by the sample window"""
+    lines = text.splitlines()
+    if drop_first and lines:
+        lines = lines[1:]
+    if lines and not text.endswith(('\n', '\r')):
+        lines = lines[:-1]
+    return [line for line in lines if line.strip()]
+
+
+def _field_count_profile(lines, delimiter):
+    """
+    Parse sample lines quote-aware and describe how consistent the field counts are
+
+    Returns:
+    --------
+    tuple : (modal field count, fraction of records with that count)
+    """
+    try:
+        counts = [len(row) for row in csv.reader(io.StringIO('\n'.join(lines)), delimiter=delimiter, quotechar='"')]
+    except csv.Error:
+        return 1, 0.0
+    if not counts:
+        return 1, 0.0
+    modal, frequency = Counter(counts).most_common(1)[0]
+    return modal, frequency / len(counts)
+
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def _sniff_cached(file_hash, _head, _tail, is_tsv):
+    """Sniff encoding and delimiter from bounded samples, cached by ``file_hash``"""
+    _tail = _trim_partial_start(_tail)
+    encoding = _sniff_encoding(_head, _tail)
+    head_lines = _complete_lines(_decode_sample(_head, encoding, final=False))
+    tail_lines = _complete_lines(_decode_sample(_tail, encoding, final=False), drop_first=True) if _tail else []
+
+    candidates = ['\t'] if is_tsv else SNIFF_DELIMITERS
+    scores = {}
+    for delimiter in candidates:
+        fields, consistency = _field_count_profile(head_lines, delimiter)
+        if tail_lines:
+            tail_fields, tail_consistency = _field_count_profile(tail_lines, delimiter)
+            # A delimiter that splits the end of the file differently is suspect
+            if tail_fields == fields:
+                consistency = min(consistency, tail_consistency)
+            else:
+                consistency = consistency * tail_consistency / 2
+        # A delimiter that never splits a row is no delimiter at all
+        scores[delimiter] = (consistency if fields > 1 else 0.0, fields)
+
+    best = max(scores, key=scores.get)
+    best_score, fields = scores[best]
+    runner_up = max((score for d, (score, _) in scores.items() if d != best), default=0.0)
+    confidence = best_score * (1 - runner_up / 2)
+    if best_score == 0.0:
+        best, fields = candidates[0], 1
+
+    return {
+        'delimiter': best,
+        'encoding': encoding,
+        'confidence': round(float(confidence), 3),
+        'fields': fields,
+        'sampled_lines': len(head_lines) + len(tail_lines)
+    }
+
+
+def sniff_delimited_file(source, filename, head_bytes=SNIFF_HEAD_BYTES, tail_bytes=SNIFF_TAIL_BYTES):
+    """
+    Detect encoding and delimiter of a delimited text file from bounded samples
+
+    Only the first ``head_bytes`` and last ``tail_bytes`` of the file are read,
+    so the cost does not depend on the file size. Rows are parsed with a
+    quote-aware CSV reader and each candidate delimiter is scored by how
+    consistently it splits head and tail rows into the same number of fields.
+
+    Parameters:
+    -----------
+    source : UploadedFile or file-like
+        Seekable binary file object
+    filename : str
+        Name of the file (a .tsv extension forces the tab delimiter)
+
+    Returns:
+    --------
+    dict : 'delimiter', 'encoding', 'confidence' (0-1), 'fields' and 'sampled_lines'
+    """
+    size = _source_size(source)
+    source.seek(0)
+    head = source.read(head_bytes)
+    tail = b''
+    if size > head_bytes + tail_bytes:
+        source.seek(size - tail_bytes)
+        tail = source.read(tail_bytes)
+    source.seek(0)
+
+    file_hash = hashlib.sha1(str(size).encode() + head + tail).hexdigest()
+    return _sniff_cached(file_hash, head, tail, filename.lower().endswith('.tsv'))
+
+
+# ==================== Chunk Readers ====================
+def _source_size(source):
+    """Return the size in bytes of an uploaded file or file-like object"""
+    size = getattr(source, 'size', None)
+    if size:
+        return size
+    position = source.tell()
+    source.seek(0, os.SEEK_END)
+    size = source.tell()
+    source.seek(position)
+    return size
+
+
+def _iter_arrow_batches(source, delimiter, encoding, block_size, column_types):
+    """
+    Stream record batches with pyarrow; types are inferred from the first block
+
+    Yields:
+    -------
+    tuple : (pa.Schema, pa.RecordBatch)
+    """
+    reader = pa_csv.open_csv(
+        source,
+        read_options=pa_csv.ReadOptions(block_size=block_size, encoding=encoding),
+        parse_options=pa_csv.ParseOptions(delimiter=delimiter),
+        convert_options=pa_csv.ConvertOptions(column_types=column_types)
+    )
+    names = reader.schema.names
+    while True:
+        try:
+            batch = reader.read_next_batch()
+        except StopIteration:
+            return
+        except pa.ArrowInvalid as e:
+            match = _ARROW_CONFLICT.search(str(e))
+            if match and 'UTF8' in str(e):
+                # Surface bad bytes like the pandas engine does, so callers can retry another encoding
+                raise UnicodeDecodeError(encoding, b'', 0, 1, str(e)) from e
+            if match:
+                raise _SchemaConflict(names[int(match.group(1))], reader.schema) from e
+            raise
+        yield reader.schema, batch
+
+
+def _find_conflicts(source, delimiter, encoding, block_size, schema, column_types):
+    """
+    Scan the file once for every typed column with a value that does not fit its inferred type
+
+    Only those columns are read, as strings, and cast batch by batch, so the
+    caller can pin all of them in a single re-read.
+
+    Returns:
+    --------
+    set : Names of the conflicting columns
+    """
+    candidates = {field.name: field.type for field in schema
+                  if field.name not in column_types and not pa.types.is_string(field.type)}
+    if not candidates:
+        return set()
+    source.seek(0)
+    reader = pa_csv.open_csv(
+        source,
+        read_options=pa_csv.ReadOptions(block_size=block_size, encoding=encoding),
+        parse_options=pa_csv.ParseOptions(delimiter=delimiter),
+        convert_options=pa_csv.ConvertOptions(column_types={name: pa.string() for name in candidates},
+                                              include_columns=list(candidates), strings_can_be_null=True)
+    )
+    conflicts = set()
+    while len(conflicts) < len(candidates):
+        try:
+            batch = reader.read_next_batch()
+        except StopIteration:
+            break
+        for name, target in candidates.items():
+            if name in conflicts:
+                continue
+            try:
+                pc.cast(batch.column(name), target)
+            except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+                conflicts.add(name)
+    return conflicts
+
+
+def _coerce_to_schema(chunk, schema):
+    """
+    Cast a pandas chunk to the dtypes inferred from the first chunk
+
+    Columns that cannot be cast are widened in ``schema`` (int -> float -> object)
+    so every chunk ends up with the same dtypes before concatenation.
+    """
+    for col, dtype in schema.items():
+        if col not in chunk.columns or chunk[col].dtype == dtype:
+            continue
+        try:
+            chunk[col] = chunk[col].astype(dtype)
+        except (ValueError, TypeError):
+            widened = 'float64' if pd.api.types.is_integer_dtype(dtype) else 'object'
+            try:
+                chunk[col] = chunk[col].astype(widened)
+            except (ValueError, TypeError):
+                widened = 'object'
+                chunk[col] = chunk[col].astype(widened)
+            schema[col] = widened
+    return chunk
+
+
+def _iter_pandas_chunks(source, delimiter, encoding, chunk_rows):
+    """Stream pandas chunks with the C engine, pinning dtypes from the first chunk"""
+    schema = None
+    for chunk in pd.read_csv(source, delimiter=delimiter, encoding=encoding, chunksize=chunk_rows):
+        if schema is None:
+            schema = chunk.dtypes.to_dict()
+        yield None, _coerce_to_schema(chunk, schema)
+
+
+# ==================== Bounded Collector ====================
+def _bernoulli(frame, rate, rng):
+    """Keep each row of ``frame`` independently with probability ``rate``"""
+    return frame[rng.random(len(frame)) < rate]
+
+
+def _frame_bytes(frame):
+    return int(frame.memory_usage(deep=True).sum())
+
+
+def _collect(chunks, source, total_bytes, limit_bytes, spill_path, progress_callback, rng):
+    """
+    Accumulate chunks under a memory ceiling
+
+    While the kept rows fit under ``limit_bytes`` everything is kept. Once the
+    ceiling is crossed the kept rows are halved (Bernoulli, rate 0.5) until they
+    fit again and every later chunk is sampled at the current rate, so the result
+    is always a uniform random sample of the file. When ``spill_path`` is set the
+    complete data is also written to a Parquet file from the first overflow on.
+    """
+    kept = []
+    kept_bytes = 0
+    sample_rate = 1.0
+    rows_read = 0
+    writer = None
+
+    try:
+        for schema, chunk in chunks:
+            batch = None
+            if schema is not None:
+                batch = chunk
+                chunk = batch.to_pandas()
+            rows_read += len(chunk)
+
+            if writer is not None:
+                writer.write_batch(batch)
+
+            if sample_rate < 1.0:
+                chunk = _bernoulli(chunk, sample_rate, rng)
+            kept.append(chunk)
+            kept_bytes += _frame_bytes(chunk)
+
+            if kept_bytes > limit_bytes and spill_path and writer is None and schema is not None:
+                # First overflow: everything read so far is still in memory, flush it
+                writer = pq.ParquetWriter(spill_path, schema)
+                for frame in kept:
+                    writer.write_table(pa.Table.from_pandas(frame, schema=schema, preserve_index=False))
+
+            while kept_bytes > limit_bytes and kept_bytes > 0:
+                sample_rate /= 2
+                kept = [_bernoulli(frame, 0.5, rng) for frame in kept]
+                kept_bytes = sum(_frame_bytes(frame) for frame in kept)
+
+            if progress_callback is not None:
+                fraction = min(source.tell() / total_bytes, 1.0) if total_bytes else 1.0
+                progress_callback(fraction, rows_read)
+    finally:
+        if writer is not None:
+            writer.close()
+
+    df = pd.concat(kept, ignore_index=True) if kept else pd.DataFrame()
+    if sample_rate == 1.0:
+        mode = 'full'
+    elif writer is not None:
+        mode = 'on_disk'
+    else:
+        mode = 'sampled'
+
+    info = {
+        'mode': mode,
+        'engine': 'pyarrow' if PYARROW_AVAILABLE else 'pandas',
+        'rows_read': rows_read,
+        'rows_kept': len(df),
+        'sample_rate': sample_rate,
+        'spill_path': spill_path if writer is not None else None
+    }
+    return df, info
+
+
+# ==================== Public API ====================
+def read_csv_chunked(source, delimiter=',', encoding='utf-8', memory_limit_mb=DEFAULT_MEMORY_LIMIT_MB,
+                     on_limit='sample', block_size=DEFAULT_BLOCK_SIZE, chunk_rows=DEFAULT_CHUNK_ROWS,
+                     progress_callback=None, spill_dir=None, random_state=0):
+    """
+    Read a delimited file in chunks without exceeding a memory ceiling
+
+    Parameters:
+    -----------
+    source : UploadedFile or file-like
+        Seekable binary file object
+    delimiter : str
+        Field delimiter
+    encoding : str
+        File encoding
+    memory_limit_mb : int
+        Ceiling for the in-memory DataFrame, in MB (None for no ceiling)
+    on_limit : str
+        'sample' to keep a uniform random sample once the ceiling is hit,
+        'spill' to also write the complete data to a Parquet file on disk (needs pyarrow)
+    block_size : int
+        Bytes per block for the pyarrow engine
+    chunk_rows : int
+        Rows per chunk for the pandas fallback engine
+    progress_callback : callable
+        Called as ``progress_callback(fraction, rows_read)`` after each chunk
+    spill_dir : str
+        Directory for spilled Parquet files (defaults to the system temp dir)
+    random_state : int
+        Seed for the row sampler
+
+    Returns:
+    --------
+    tuple : (pd.DataFrame, dict) - the loaded (possibly sampled) data and an
+        info dict with 'mode' ('full', 'sampled' or 'on_disk'), 'engine',
+        'rows_read', 'rows_kept', 'sample_rate' and 'spill_path'
+    """
+    if on_limit == 'spill' and not PYARROW_AVAILABLE:
+        raise ValueError("on_limit='spill' requires pyarrow")
+    if on_limit not in ON_LIMIT_OPTIONS:
+        raise ValueError(f"on_limit must be one of {list(ON_LIMIT_OPTIONS)}")
+
+    total_bytes = _source_size(source)
+    limit_bytes = float('inf') if memory_limit_mb is None else memory_limit_mb * 1024**2
+    rng = np.random.default_rng(random_state)
+
+    if not PYARROW_AVAILABLE:
+        source.seek(0)
+        chunks = _iter_pandas_chunks(source, delimiter, encoding, chunk_rows)
+        return _collect(chunks, source, total_bytes, limit_bytes, None, progress_callback, rng)
+
+    spill_path = None
+    if on_limit == 'spill':
+        fd, spill_path = tempfile.mkstemp(suffix='.parquet', dir=spill_dir)
+        os.close(fd)
+
+    # Later blocks may contradict the types inferred from the first block
+    # (e.g. a stray text value deep in a numeric column). On the first conflict
+    # every such column is found in one scan and pinned to string, so the file
+    # is re-read once instead of failing the whole upload.
+    column_types = {}
+    df, info = None, None
+    try:
+        while info is None:
+            source.seek(0)
+            chunks = _iter_arrow_batches(source, delimiter, encoding, block_size, column_types)
+            try:
+                df, info = _collect(chunks, source, total_bytes, limit_bytes, spill_path, progress_callback, rng)
+            except _SchemaConflict as conflict:
+                if conflict.column in column_types:
+                    raise
+                conflicts = _find_conflicts(source, delimiter, encoding, block_size, conflict.schema, column_types)
+                for column in conflicts | {conflict.column}:
+                    column_types[column] = pa.string()
+    finally:
+        # Only keep the spill file when the data actually overflowed to disk
+        if spill_path and (info is None or info['mode'] != 'on_disk') and os.path.exists(spill_path):
+            os.unlink(spill_path)
+    return df, info
@@ -0,0 +1,165 @@
+"""
+Missingness Engine
+Bit-packed null masks per dataset version for the Check Null Values tab
+"""
+
+import numpy as np
+import pandas as pd
+
+from history import cached_by_version
+import polars_backend
+
+
+HEATMAP_MAX_ROWS = 200
+TOP_PATTERNS = 10
+MAX_PATTERN_COLUMNS = 64               # one bit per column in a uint64 pattern key
+
+# Number of set bits in each byte value
+_POPCOUNT = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+
+# ==================== Null Masks ====================
+def null_mask(df, column):
+    """
+    Return the packed null mask of one column (1 bit per row)
+
+    Masks are cached per column and survive operations on other columns.
+    """
+    return cached_by_version(
+        'null_mask', column, [column],
+        lambda: np.packbits(df[column].isna().to_numpy())
+    )
+
+
+def _unpacked(df, column):
+    return np.unpackbits(null_mask(df, column), count=len(df)).astype(bool)
+
+
+def null_counts(df):
+    """
+    Null count per column, counted on the packed masks
+
+    Returns:
+    --------
+    pd.Series : Column -> number of nulls
+    """
+    if polars_backend.use_polars(df):
+        try:
+            return polars_backend.null_counts(df)
+        except polars_backend.BACKEND_ERRORS:
+            pass
+    counts = [int(_POPCOUNT[null_mask(df, col)].sum(dtype=np.int64)) for col in df.columns]
+    return pd.Series(counts, index=df.columns, dtype='int64')
+
+
+def null_summary(df):
+    """
+    Column/Null Count/Null Percentage table of the columns that have nulls
+
+    Returns:
+    --------
+    pd.DataFrame : Sorted by null count, descending
+    """
+    counts = null_counts(df)
+    counts = counts[counts > 0].sort_values(ascending=False, kind='mergesort')
+    return pd.DataFrame({
+        'Column': counts.index,
+        'Null Count': counts.values,
+        'Null Percentage (%)': (counts.values / max(len(df), 1) * 100).round(2)
+    })
+
+
+def null_rows(df, columns, how='any'):
+    """Rows with a null in any (or all) of ``columns``, selected through the masks"""
+    masks = [null_mask(df, col) for col in columns]
+    combined = masks[0].copy()
+    for mask in masks[1:]:
+        if how == 'any':
+            combined |= mask
+        else:
+            combined &= mask
+    return df[np.unpackbits(combined, count=len(df)).astype(bool)]
+
+
+# ==================== Co-Missingness ====================
+def co_missingness(df, columns):
+    """
+    Pairwise count of rows where two columns are both null
+
+    Each pair is a bitwise AND of two packed masks plus a popcount, so the
+    cost is n/8 bytes per pair instead of n booleans.
+
+    Parameters:
+    -----------
+    df : pd.DataFrame
+        Session DataFrame
+    columns : list
+        Columns to compare (normally the ones with nulls)
+
+    Returns:
+    --------
+    pd.DataFrame : Symmetric matrix; the diagonal holds the null count of each column
+    """
+    masks = [null_mask(df, col) for col in columns]
+    matrix = np.zeros((len(columns), len(columns)), dtype=np.int64)
+    for i, left in enumerate(masks):
+        for j in range(i, len(masks)):
+            matrix[i, j] = matrix[j, i] = _POPCOUNT[left & masks[j]].sum(dtype=np.int64)
+    return pd.DataFrame(matrix, index=columns, columns=columns)
+
+
+def missingness_patterns(df, columns, top=TOP_PATTERNS):
+    """
+    Most frequent combinations of null columns across rows
+
+    Every row gets a bit pattern (bit j set when ``columns[j]`` is null); the
+    patterns are counted with ``np.unique``.
+
+    Returns:
+    --------
+    pd.DataFrame : 'Missing Columns', 'Rows' and 'Percentage (%)', most frequent first
+    """
+    columns = list(columns)[:MAX_PATTERN_COLUMNS]
+    if not columns or len(df) == 0:
+        return pd.DataFrame(columns=['Missing Columns', 'Rows', 'Percentage (%)'])
+
+    patterns = np.zeros(len(df), dtype=np.uint64)
+    for bit, col in enumerate(columns):
+        patterns |= _unpacked(df, col).astype(np.uint64) << np.uint64(bit)
+
+    values, counts = np.unique(patterns, return_counts=True)
+    ranked = np.argsort(-counts, kind='stable')[:top]
+    labels = [
+        ', '.join(str(col) for bit, col in enumerate(columns) if int(values[i]) >> bit & 1) or '(none)'
+        for i in ranked
+    ]
+    return pd.DataFrame({
+        'Missing Columns': labels,
+        'Rows': counts[ranked],
+        'Percentage (%)': (counts[ranked] / len(df) * 100).round(2)
+    })
+
+
+# ==================== Heatmap ====================
+def missingness_heatmap(df, columns, max_rows=HEATMAP_MAX_ROWS):
+    """
+    Downsampled missingness matrix: share of nulls per block of rows and column
+
+    Rows are split into at most ``max_rows`` contiguous blocks and each block's
+    null share is computed with ``np.add.reduceat``.
+
+    Returns:
+    --------
+    pd.DataFrame : One row per block (indexed by the block's first row), one column per column
+    """
+    n_rows = len(df)
+    if n_rows == 0 or not columns:
+        return pd.DataFrame(columns=columns)
+
+    starts = np.unique(np.linspace(0, n_rows, num=min(max_rows, n_rows), endpoint=False).astype(np.int64))
+    sizes = np.diff(np.append(starts, n_rows))
+    shares = {
+        col: np.add.reduceat(_unpacked(df, col).astype(np.int32), starts) / sizes
+        for col in columns
+    }
+    return pd.DataFrame(shares, index=pd.Index(starts, name='First Row'))
@@ -0,0 +1,189 @@
+"""
+Cleaning Pipelines
+Serializable record of the applied cleaning operations, replayable headlessly
+"""
+
+import json
+import math
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from change_report import changed_mask
+from history import apply_operation, operation_columns, OPERATION_LABELS
+
+
+PIPELINE_FORMAT_VERSION = 1
+
+_REQUIRED_FIELDS = {
+    'drop_duplicates': [],
+    'dropna': ['column'],
+    'fillna': ['column', 'value'],
+    'dropna_columns': ['columns'],
+    'fillna_columns': ['columns', 'values'],
+    'replace': ['column', 'to_replace', 'value']
+}
+
+
+# ==================== Serialization ====================
+def _to_json_value(value):
+    """Convert numpy/pandas scalars found in operation dicts to plain JSON values"""
+    if isinstance(value, (list, tuple)):
+        return [_to_json_value(item) for item in value]
+    if isinstance(value, pd.Timestamp):
+        return value.isoformat()
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and math.isnan(value):
+        return None
+    return value
+
+
+def pipeline_to_json(operations, source_name=None):
+    """
+    Serialize a list of operation dicts to a pipeline JSON document
+
+    Parameters:
+    -----------
+    operations : list
+        Operations as returned by ``history.applied_operations``
+    source_name : str
+        Name of the dataset the pipeline was recorded on (informational)
+
+    Returns:
+    --------
+    str : Pipeline JSON
+    """
+    document = {
+        'format_version': PIPELINE_FORMAT_VERSION,
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'source': source_name,
+        'operations': [{key: _to_json_value(value) for key, value in op.items()} for op in operations]
+    }
+    return json.dumps(document, indent=2, ensure_ascii=False)
+
+
+def load_pipeline(text):
+    """
+    Parse and validate a pipeline JSON document
+
+    Parameters:
+    -----------
+    text : str or bytes
+        Pipeline JSON
+
+    Returns:
+    --------
+    list : Operation dicts
+
+    Raises:
+    -------
+    ValueError : If the document is not a valid pipeline
+    """
+    try:
+        document = json.loads(text)
+    except json.JSONDecodeError as e:
+        raise ValueError(f"Pipeline is not valid JSON: {e}") from e
+
+    if not isinstance(document, dict) or not isinstance(document.get('operations'), list):
+        raise ValueError("Pipeline must be an object with an 'operations' list")
+    if document.get('format_version', PIPELINE_FORMAT_VERSION) > PIPELINE_FORMAT_VERSION:
+        raise ValueError(f"Unsupported pipeline format version: {document['format_version']}")
+
+    for i, op in enumerate(document['operations'], start=1):
+        kind = op.get('op') if isinstance(op, dict) else None
+        if kind not in _REQUIRED_FIELDS:
+            raise ValueError(f"Step {i}: unknown operation {kind!r}")
+        missing = [field for field in _REQUIRED_FIELDS[kind] if field not in op]
+        if missing:
+            raise ValueError(f"Step {i} ({OPERATION_LABELS[kind]}): missing {', '.join(missing)}")
+    return document['operations']
+
+
+# ==================== Replay ====================
+def _parse_date_values(values, date_format):
+    """Parse strings written in a column's source date format; other values are kept"""
+    parsed = []
+    for value in values:
+        if isinstance(value, str):
+            timestamp = pd.to_datetime(value, format=date_format, errors='coerce')
+            value = value if pd.isna(timestamp) else timestamp
+        parsed.append(value)
+    return parsed
+
+
+def _with_date_values(df, op, dtype_plan):
+    """
+    Match recorded values to parsed date columns
+
+    Values recorded on an optimized frame are ISO strings, which pandas matches
+    against datetime columns directly. Values recorded with the optimizer off
+    are written in the column's source format, so they are parsed with it.
+    """
+    if op['op'] not in ('fillna', 'replace'):
+        return op
+    step = dtype_plan.get(op['column']) or {}
+    if not step.get('date_format') or not pd.api.types.is_datetime64_any_dtype(df[op['column']]):
+        return op
+    op = dict(op)
+    op['value'] = _parse_date_values([op['value']], step['date_format'])[0]
+    if op['op'] == 'replace':
+        op['to_replace'] = _parse_date_values(op['to_replace'], step['date_format'])
+    return op
+
+
+def rows_affected(before, after, op):
+    """Number of rows an operation removed or changed"""
+    columns = operation_columns(op)
+    if columns is None:
+        return len(before) - len(after)
+    changed = np.zeros(len(after), dtype=bool)
+    for col in columns:
+        changed |= changed_mask(before[col], after[col])
+    return int(changed.sum())
+
+
+def replay_pipeline(df, operations, dtype_plan=None):
+    """
+    Apply a pipeline's operations to a DataFrame in order, counting their effect
+
+    Parameters:
+    -----------
+    df : pd.DataFrame
+        Input DataFrame (not modified), optimized like the app's session data
+    operations : list
+        Operation dicts (see ``load_pipeline``)
+    dtype_plan : dict
+        Plan returned by ``optimize_dtypes`` for ``df``
+
+    Returns:
+    --------
+    tuple : (cleaned pd.DataFrame, rows removed or changed by each step)
+    """
+    affected = []
+    for op in operations:
+        before = df
+        df = apply_operation(before, _with_date_values(before, op, dtype_plan or {}))
+        affected.append(rows_affected(before, df, op))
+    return df, affected
+
+
+def run_pipeline(df, operations, dtype_plan=None):
+    """
+    Apply a pipeline's operations to a DataFrame in order
+
+    Parameters:
+    -----------
+    df : pd.DataFrame
+        Input DataFrame (not modified)
+    operations : list
+        Operation dicts (see ``load_pipeline``)
+    dtype_plan : dict
+        Plan returned by ``optimize_dtypes`` for ``df``
+
+    Returns:
+    --------
+    pd.DataFrame : Cleaned DataFrame
+    """
+    return replay_pipeline(df, operations, dtype_plan)[0]
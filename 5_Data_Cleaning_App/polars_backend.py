@@ -0,0 +1,230 @@
+"""
+Polars Backend
+Optional multi-threaded engine for the heavy computations of the cleaning app
+
+The session dataset stays a pandas DataFrame (undo deltas, the Arrow store and
+the AG-Grid widgets all work on it). When the Polars backend is selected, the
+statistics, value counts, groupby, duplicate and null computations run on a
+Polars view of the data: each column is converted once per dataset version and
+cached, the query runs on Polars' lazy multi-threaded engine, and only the
+(small) result is converted back to pandas for display.
+"""
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+try:
+    import polars as pl
+    POLARS_AVAILABLE = True
+    BACKEND_ERRORS = (pl.exceptions.PolarsError, TypeError, ValueError, ImportError)
+except ImportError:
+    POLARS_AVAILABLE = False
+    BACKEND_ERRORS = ()
+
+from history import cached_by_version
+
+
+BACKENDS = {
+    'pandas': 'pandas (single-threaded)',
+    'polars': 'Polars (multi-threaded, lazy)'
+}
+
+CSV_EXPANSION = 3                      # in-memory size of a CSV relative to the file, for the memory ceiling
+
+PERCENTILES = {'25%': 0.25, '50%': 0.5, '75%': 0.75}
+
+
+# ==================== Backend Selection ====================
+def available_backends():
+    """Return the BACKENDS options that can be used in this environment"""
+    return [name for name in BACKENDS if name != 'polars' or POLARS_AVAILABLE]
+
+
+def use_polars(df=None):
+    """
+    Whether the Polars backend is selected (and usable for ``df``)
+
+    Polars needs unique string column names, so frames whose names collide
+    once converted to strings stay on pandas.
+    """
+    if not POLARS_AVAILABLE or st.session_state.get('backend') != 'polars':
+        return False
+    return df is None or len(set(map(str, df.columns))) == df.shape[1]
+
+
+# ==================== Conversion ====================
+def polars_column(df, column):
+    """Return ``df[column]`` as a Polars Series, converted once per dataset version"""
+    return cached_by_version(
+        'polars_column', column, [column],
+        lambda: pl.from_pandas(df[column]).rename(str(column))
+    )
+
+
+def to_polars(df, columns=None):
+    """Assemble a Polars DataFrame from the cached column conversions"""
+    columns = list(df.columns) if columns is None else list(columns)
+    return pl.DataFrame([polars_column(df, col) for col in columns])
+
+
+# ==================== Ingestion ====================
+def read_csv(source, delimiter=',', encoding='utf-8'):
+    """
+    Read a whole delimited file with Polars' multi-threaded CSV reader
+
+    Returns:
+    --------
+    tuple : (pd.DataFrame, info dict in the format of ``read_csv_chunked``)
+    """
+    polars_encoding = 'utf8' if encoding.replace('-', '').lower() in ('utf8', 'utf8sig') else encoding
+    source.seek(0)
+    data = source.read()
+    try:
+        frame = pl.read_csv(data, separator=delimiter, encoding=polars_encoding, infer_schema_length=10_000)
+    except pl.exceptions.ComputeError:
+        # A value deep in the file contradicts the inferred types: infer from all rows
+        frame = pl.read_csv(data, separator=delimiter, encoding=polars_encoding, infer_schema_length=None)
+
+    df = frame.to_pandas()
+    info = {
+        'mode': 'full',
+        'engine': 'polars',
+        'rows_read': len(df),
+        'rows_kept': len(df),
+        'sample_rate': 1.0,
+        'spill_path': None
+    }
+    return df, info
+
+
+# ==================== Column Profiles ====================
+def _profile_expressions(name, numeric, categorical):
+    col = pl.col(name)
+    expressions = [
+        col.count().alias(f"{name}|count"),
+        col.drop_nulls().n_unique().alias(f"{name}|unique")
+    ]
+    if numeric:
+        expressions += [
+            col.mean().alias(f"{name}|mean"),
+            col.std().alias(f"{name}|std"),
+            col.min().alias(f"{name}|min"),
+            col.max().alias(f"{name}|max")
+        ]
+        expressions += [col.quantile(q, interpolation='linear').alias(f"{name}|{label}")
+                        for label, q in PERCENTILES.items()]
+    elif categorical:
+        counts = col.drop_nulls().cast(pl.String).value_counts(sort=True).first()
+        expressions.append(counts.alias(f"{name}|top"))
+    return expressions
+
+
+def profile_columns(df, kinds):
+    """
+    Profile several columns in one lazy Polars query
+
+    Parameters:
+    -----------
+    df : pd.DataFrame
+        Session DataFrame
+    kinds : dict
+        Column -> (numeric, categorical) flags, as decided by ``profiling``
+
+    Returns:
+    --------
+    dict : Column -> the same profile dict as ``profiling.profile_column``
+    """
+    columns = list(kinds)
+    expressions = [expr for col in columns for expr in _profile_expressions(str(col), *kinds[col])]
+    row = to_polars(df, columns).lazy().select(expressions).collect().row(0, named=True)
+
+    profiles = {}
+    for col in columns:
+        name = str(col)
+        numeric, categorical = kinds[col]
+        non_null = int(row[f"{name}|count"])
+        describe = None
+        if numeric:
+            describe = {'count': float(non_null), 'mean': row[f"{name}|mean"], 'std': row[f"{name}|std"],
+                        'min': row[f"{name}|min"]}
+            describe.update({label: row[f"{name}|{label}"] for label in PERCENTILES})
+            describe['max'] = row[f"{name}|max"]
+            describe = {key: (np.nan if value is None else float(value)) for key, value in describe.items()}
+        elif categorical:
+            top = row[f"{name}|top"] or {}
+            describe = {'count': non_null, 'unique': int(row[f"{name}|unique"]),
+                        'top': top.get(name, np.nan), 'freq': top.get('count', np.nan)}
+        profiles[col] = {
+            'Non-Null Count': non_null,
+            'Null Count': int(len(df) - non_null),
+            'Dtype': str(df[col].dtype),
+            'Unique Values': int(row[f"{name}|unique"]),
+            'Memory Usage (bytes)': int(df[col].memory_usage(deep=True, index=False)),
+            'describe': describe
+        }
+    return profiles
+
+
+# ==================== Aggregations ====================
+def value_counts(df, column):
+    """Non-null value counts of a column, most frequent first, as a pandas Series"""
+    counts = polars_column(df, column).drop_nulls().value_counts(sort=True)
+    return pd.Series(counts['count'].to_numpy().astype('int64'), index=pd.Index(counts[str(column)].to_list()), name='count')
+
+
+_AGGREGATIONS = {
+    'sum': lambda col: col.sum(),
+    'mean': lambda col: col.mean(),
+    'median': lambda col: col.median(),
+    'count': lambda col: col.count(),
+    'min': lambda col: col.min(),
+    'max': lambda col: col.max(),
+    'std': lambda col: col.std()
+}
+
+
+def groupby(df, groupby_cols, agg_col, agg_type):
+    """
+    GroupBy aggregation with pandas semantics (null keys dropped, sorted by key)
+
+    Returns:
+    --------
+    pd.DataFrame : Group columns followed by '<agg_type>_<agg_col>'
+    """
+    keys = [str(col) for col in groupby_cols]
+    frame = to_polars(df, list(dict.fromkeys(list(groupby_cols) + [agg_col])))
+    value_name = f"{agg_type}_{agg_col}"
+    grouped = (
+        frame.lazy()
+        .drop_nulls(subset=keys)
+        .group_by(keys)
+        .agg(_AGGREGATIONS[agg_type](pl.col(str(agg_col))).alias(value_name))
+        .sort(keys)
+        .collect()
+        .to_pandas()
+    )
+    grouped.columns = list(groupby_cols) + [value_name]
+    return grouped
+
+
+# ==================== Duplicates & Nulls ====================
+def duplicate_masks(df, columns):
+    """
+    Duplicate masks over ``columns``
+
+    Returns:
+    --------
+    tuple : (every row that has a duplicate, every repeat after the first occurrence)
+        as numpy bool arrays, like ``duplicated(keep=False)`` / ``duplicated(keep='first')``
+    """
+    frame = to_polars(df, columns)
+    all_duplicates = frame.is_duplicated().to_numpy()
+    first = frame.select(pl.struct(pl.all()).is_first_distinct()).to_series().to_numpy()
+    return all_duplicates, ~first
+
+
+def null_counts(df):
+    """Null count per column; Arrow arrays carry their null count, so this reads metadata only"""
+    counts = [polars_column(df, col).null_count() for col in df.columns]
+    return pd.Series(counts, index=df.columns, dtype='int64')
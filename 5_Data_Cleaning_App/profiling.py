@@ -0,0 +1,139 @@
+"""
+Column Profiling
+Per-column statistics cached by dataset version for the Basic Statistics tab
+"""
+
+import pandas as pd
+import streamlit as st
+
+from history import dataset_version, changed_columns_since
+import polars_backend
+
+
+NUMERIC_STATS = ['count', 'mean', 'std', 'min', '25%', '50%', '75%', 'max']
+CATEGORICAL_STATS = ['count', 'unique', 'top', 'freq']
+
+
+def is_numeric_column(series):
+    """Numeric in the sense of ``DataFrame.describe()`` (booleans excluded)"""
+    return pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series)
+
+
+def is_categorical_column(series):
+    return pd.api.types.is_object_dtype(series) or isinstance(series.dtype, pd.CategoricalDtype)
+
+
+def profile_column(series):
+    """
+    Compute every statistic the Basic Statistics tab shows for one column
+
+    Parameters:
+    -----------
+    series : pd.Series
+        Column to profile
+
+    Returns:
+    --------
+    dict : Profile with counts, dtype, unique values, memory usage and describe() output
+    """
+    non_null = int(series.count())
+    profile = {
+        'Non-Null Count': non_null,
+        'Null Count': int(len(series) - non_null),
+        'Dtype': str(series.dtype),
+        'Unique Values': int(series.nunique()),
+        'Memory Usage (bytes)': int(series.memory_usage(deep=True, index=False)),
+        'describe': None
+    }
+    if is_numeric_column(series) or is_categorical_column(series):
+        profile['describe'] = series.describe().to_dict()
+    return profile
+
+
+def column_profiles(df):
+    """
+    Return profiles for all columns, recomputing only what changed
+
+    The cache lives in the session and is keyed by dataset version. When the
+    data moves to a newer version, only the columns changed by the operations
+    in between are re-profiled; row operations (and new uploads) invalidate
+    every column.
+
+    Parameters:
+    -----------
+    df : pd.DataFrame
+        Current session DataFrame
+
+    Returns:
+    --------
+    dict : Column name -> profile dict (see ``profile_column``)
+    """
+    version = dataset_version()
+    cache = st.session_state.get('column_profiles')
+
+    if cache is not None and cache['version'] == version:
+        return cache['profiles']
+
+    stale = None if cache is None else changed_columns_since(cache['version'])
+    previous = {} if stale is None else cache['profiles']
+
+    to_profile = [col for col in df.columns if not (col in previous and col not in stale)]
+    fresh = {}
+    if to_profile and polars_backend.use_polars(df):
+        kinds = {col: (is_numeric_column(df[col]), is_categorical_column(df[col])) for col in to_profile}
+        try:
+            fresh = polars_backend.profile_columns(df, kinds)
+        except polars_backend.BACKEND_ERRORS:
+            fresh = {}
+
+    profiles = {}
+    for col in df.columns:
+        if col in fresh:
+            profiles[col] = fresh[col]
+        elif col in previous and col not in stale:
+            profiles[col] = previous[col]
+        else:
+            profiles[col] = profile_column(df[col])
+
+    st.session_state['column_profiles'] = {'version': version, 'profiles': profiles}
+    return profiles
+
+
+def describe_table(profiles, numeric=True):
+    """
+    Assemble a describe()-style table from cached profiles
+
+    Parameters:
+    -----------
+    profiles : dict
+        Output of ``column_profiles``
+    numeric : bool
+        True for numerical columns, False for categorical columns
+
+    Returns:
+    --------
+    pd.DataFrame : One row per column with a leading 'Column' column
+    """
+    stats = NUMERIC_STATS if numeric else CATEGORICAL_STATS
+    rows = []
+    for col, profile in profiles.items():
+        describe = profile['describe']
+        if describe is None or ('mean' in describe) != numeric:
+            continue
+        rows.append({'Column': col, **{stat: describe.get(stat) for stat in stats}})
+    return pd.DataFrame(rows, columns=['Column'] + stats)
+
+
+def info_table(profiles):
+    """Assemble the DataFrame Info table from cached profiles"""
+    return pd.DataFrame([
+        {
+            'Column': col,
+            'Non-Null Count': profile['Non-Null Count'],
+            'Null Count': profile['Null Count'],
+            'Dtype': profile['Dtype'],
+            'Unique Values': profile['Unique Values'],
+            'Memory Usage (bytes)': profile['Memory Usage (bytes)']
+        }
+        for col, profile in profiles.items()
+    ])
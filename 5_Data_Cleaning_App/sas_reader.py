@@ -0,0 +1,161 @@
+"""
+SAS Ingestion Helpers
+Metadata-only preview, chunked and multi-process SAS7BDAT reads
+"""
+
+import os
+import shutil
+
+import pandas as pd
+import pyreadstat
+
+from session_store import get_session_dir
+
+
+SAS_UPLOAD_FILE = 'upload.sas7bdat'
+SAS_CHUNK_ROWS = 250_000
+PARALLEL_READ_ROWS = 2_000_000         # rows above which a multi-process read is offered
+MAX_READ_PROCESSES = 4
+
+
+# ==================== Staging ====================
+def stage_sas_file(uploaded_file):
+    """
+    Copy an upload into the session directory so pyreadstat can open it by path
+
+    The file is streamed to disk in blocks instead of going through
+    ``getvalue()``, and it replaces any previously staged SAS upload.
+
+    Returns:
+    --------
+    str : Path of the staged file
+    """
+    path = os.path.join(get_session_dir(), SAS_UPLOAD_FILE)
+    uploaded_file.seek(0)
+    with open(path, 'wb') as handle:
+        shutil.copyfileobj(uploaded_file, handle, length=16 * 1024**2)
+    uploaded_file.seek(0)
+    return path
+
+
+# ==================== Metadata ====================
+def read_sas_metadata(path):
+    """
+    Read only the header of a SAS7BDAT file
+
+    No data rows are decoded, so this is instant even for multi-GB files.
+
+    Parameters:
+    -----------
+    path : str
+        Path to the .sas7bdat file
+
+    Returns:
+    --------
+    dict : 'rows', 'columns', 'file_label', 'encoding' and 'variables'
+        (a DataFrame with Column/Label/Format/Type per variable)
+    """
+    _, meta = pyreadstat.read_sas7bdat(path, metadataonly=True)
+    variables = pd.DataFrame({
+        'Column': meta.column_names,
+        'Label': [meta.column_names_to_labels.get(col) or '' for col in meta.column_names],
+        'Format': [meta.original_variable_types.get(col, '') for col in meta.column_names],
+        'Type': [meta.readstat_variable_types.get(col, '') for col in meta.column_names]
+    })
+    return {
+        'rows': meta.number_rows,
+        'columns': meta.column_names,
+        'file_label': meta.file_label or '',
+        'encoding': meta.file_encoding or '',
+        'variables': variables
+    }
+
+
+# ==================== Data Reads ====================
+def read_sas_chunked(path, columns=None, row_limit=None, chunk_rows=SAS_CHUNK_ROWS,
+                     total_rows=None, progress_callback=None):
+    """
+    Read a SAS7BDAT file chunk by chunk (row_offset / row_limit windows)
+
+    Parameters:
+    -----------
+    path : str
+        Path to the .sas7bdat file
+    columns : list
+        Columns to read (None for all); other columns are never decoded
+    row_limit : int
+        Read only the first ``row_limit`` rows (None for all)
+    chunk_rows : int
+        Rows per chunk
+    total_rows : int
+        Row count from the metadata, used for progress reporting
+    progress_callback : callable
+        Called with (fraction done, rows read)
+
+    Returns:
+    --------
+    pd.DataFrame : Loaded data
+    """
+    chunks = []
+    rows_read = 0
+    target = min(row_limit, total_rows) if row_limit and total_rows else (row_limit or total_rows)
+    while not target or rows_read < target:
+        size = min(chunk_rows, target - rows_read) if target else chunk_rows
+        chunk, _ = pyreadstat.read_sas7bdat(path, usecols=columns, row_offset=rows_read, row_limit=size)
+        if chunks and len(chunk) == 0:
+            break
+        chunks.append(chunk)
+        rows_read += len(chunk)
+        if progress_callback and target:
+            progress_callback(min(rows_read / target, 1.0), rows_read)
+        if len(chunk) < size:
+            break
+    return pd.concat(chunks, ignore_index=True)
+
+
+def read_sas_parallel(path, columns=None, total_rows=None, num_processes=None):
+    """
+    Read a whole SAS7BDAT file with several worker processes
+
+    Each worker decodes its own row range; this needs the row count from the
+    metadata, so files without one are read in chunks instead.
+    """
+    if not total_rows:
+        return read_sas_chunked(path, columns=columns)
+    num_processes = num_processes or min(os.cpu_count() or 1, MAX_READ_PROCESSES)
+    df, _ = pyreadstat.read_file_multiprocessing(
+        pyreadstat.read_sas7bdat, path, num_processes=num_processes,
+        num_rows=total_rows, usecols=columns
+    )
+    return df
+
+
+def read_sas(path, metadata, columns=None, row_limit=None, parallel=False, progress_callback=None):
+    """
+    Load a SAS7BDAT file, choosing between a parallel and a chunked read
+
+    Parameters:
+    -----------
+    path : str
+        Path to the .sas7bdat file
+    metadata : dict
+        Output of ``read_sas_metadata``
+    columns : list
+        Columns to load (None for all)
+    row_limit : int
+        Load only the first ``row_limit`` rows (None for all)
+    parallel : bool
+        Use worker processes for a full read (ignored with a row limit)
+    progress_callback : callable
+        Called with (fraction done, rows read) during chunked reads
+
+    Returns:
+    --------
+    pd.DataFrame : Loaded data
+    """
+    if columns is not None and len(columns) == len(metadata['columns']):
+        columns = None
+    if parallel and not row_limit:
+        return read_sas_parallel(path, columns=columns, total_rows=metadata['rows'])
+    return read_sas_chunked(path, columns=columns, row_limit=row_limit,
+                            total_rows=metadata['rows'], progress_callback=progress_callback)
@@ -0,0 +1,173 @@
+"""
+Session Storage Backend
+Keeps each session's dataset as a memory-mapped Arrow file on disk
+"""
+
+import os
+import shutil
+import tempfile
+import time
+import uuid
+
+import pandas as pd
+import pyarrow as pa
+import streamlit as st
+
+
+STORE_ROOT = os.path.join(tempfile.gettempdir(), 'data_cleaning_app')
+ORIGINAL_FILE = 'original.arrow'
+STALE_AFTER_HOURS = 24
+
+
+# ==================== Session Directory ====================
+def get_session_dir():
+    """
+    Return (and create) the storage directory of the current session
+
+    Returns:
+    --------
+    str : Path to the session directory
+    """
+    if 'store_id' not in st.session_state:
+        st.session_state['store_id'] = uuid.uuid4().hex
+        cleanup_stale_sessions()
+    session_dir = os.path.join(STORE_ROOT, st.session_state['store_id'])
+    os.makedirs(session_dir, exist_ok=True)
+    return session_dir
+
+
+def cleanup_stale_sessions(max_age_hours=STALE_AFTER_HOURS):
+    """Delete session directories that have not been touched for ``max_age_hours``"""
+    if not os.path.isdir(STORE_ROOT):
+        return
+    cutoff = time.time() - max_age_hours * 3600
+    for name in os.listdir(STORE_ROOT):
+        path = os.path.join(STORE_ROOT, name)
+        try:
+            if os.path.isdir(path) and os.path.getmtime(path) < cutoff:
+                shutil.rmtree(path, ignore_errors=True)
+        except OSError:
+            continue
+
+
+# ==================== Arrow Storage ====================
+def write_arrow(df, path):
+    """
+    Write a DataFrame as an uncompressed Arrow IPC file so it can be memory-mapped
+
+    Parameters:
+    -----------
+    df : pd.DataFrame
+        DataFrame to store (the index is not stored)
+    path : str
+        Destination file path
+    """
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    tmp_path = f"{path}.tmp"
+    with pa.OSFile(tmp_path, 'wb') as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    os.replace(tmp_path, path)
+
+
+def open_arrow(path):
+    """
+    Open an Arrow IPC file as a zero-copy, memory-mapped table
+
+    Returns:
+    --------
+    pa.Table : Table whose buffers live in the OS page cache, not the heap
+    """
+    return pa.ipc.open_file(pa.memory_map(path, 'r')).read_all()
+
+
+def read_arrow(path, columns=None, rows=None):
+    """
+    Materialize only the requested columns and rows of an Arrow file
+
+    Parameters:
+    -----------
+    path : str
+        Arrow IPC file path
+    columns : list
+        Columns to materialize (None for all)
+    rows : array-like
+        Row positions to materialize (None for all)
+
+    Returns:
+    --------
+    pd.DataFrame : DataFrame indexed by original row position
+    """
+    table = open_arrow(path)
+    if columns is not None:
+        table = table.select(list(columns))
+    if rows is not None:
+        rows = pa.array(rows, type=pa.int64())
+        table = table.take(rows)
+    # split_blocks keeps null-free numeric columns as views on the mapped file
+    df = table.to_pandas(split_blocks=True)
+    df.index = pd.Index(rows.to_numpy() if rows is not None else range(len(df)))
+    return df
+
+
+# ==================== Working Dataset ====================
+def store_dataset(df):
+    """
+    Persist a freshly loaded dataset as the session's original version
+
+    The returned working DataFrame is read back from the memory-mapped file, so
+    its numeric columns share buffers with the stored original until a cleaning
+    operation replaces them.
+
+    Parameters:
+    -----------
+    df : pd.DataFrame
+        Newly loaded DataFrame
+
+    Returns:
+    --------
+    pd.DataFrame : Working DataFrame backed by the on-disk original
+    """
+    path = os.path.join(get_session_dir(), ORIGINAL_FILE)
+    write_arrow(df.reset_index(drop=True), path)
+    st.session_state['original_path'] = path
+    return read_arrow(path)
+
+
+def get_original_df(columns=None, rows=None):
+    """
+    Materialize (part of) the original uploaded dataset
+
+    Parameters:
+    -----------
+    columns : list
+        Columns to read (None for all)
+    rows : array-like
+        Original row positions to read (None for all)
+
+    Returns:
+    --------
+    pd.DataFrame or None : Original data, or None when nothing is stored
+    """
+    path = st.session_state.get('original_path')
+    if path is None or not os.path.exists(path):
+        return None
+    return read_arrow(path, columns=columns, rows=rows)
+
+
+def original_shape():
+    """Return (rows, columns) of the stored original without materializing it"""
+    path = st.session_state.get('original_path')
+    if path is None or not os.path.exists(path):
+        return None
+    table = open_arrow(path)
+    return table.num_rows, table.num_columns
+
+
+def original_columns():
+    """Return the column names of the stored original without materializing it"""
+    path = st.session_state.get('original_path')
+    if path is None or not os.path.exists(path):
+        return None
+    # An empty read restores the original (possibly non-string) column labels
+    return read_arrow(path, rows=[]).columns.tolist()
@@ -1,6 +1,11 @@
 
 import streamlit as st
 import pandas as pd
+import numpy as np
+import math
+import re
+import json
+import functools
 from st_aggrid import AgGrid, GridOptionsBuilder, GridUpdateMode, DataReturnMode, ColumnsAutoSizeMode
 import uuid
 import time
@@ -92,37 +97,175 @@ import time
 
 
 #------------------------------------------------------------------------------------#
-# View Dataframe Widget
+# Server-Side Pagination
 #------------------------------------------------------------------------------------#
 
-@st.fragment
-def view_dataframe(df, height=450, theme='alpine', page_size=20, 
-                  font_size='16px', font_family='Arial, sans-serif', cell_color='#008080',
-                  header_color='#333333', header_font_size='14px', header_font_family='Arial, sans-serif',
-                  header_font_weight='600', header_background='#f0f0f0',
-                  min_col_width=280, key_suffix="", row_height=50):
-    """Display a read-only AG-Grid table with styling options and pagination controls"""
-    if df.empty:
-        st.info("No data available")
-        return
-    
-    # Page size will be controlled within the grid pagination
-    
-    # Use simple header class for styling (like working disply_shap_values function)
-    header_class = "custom-header"
-    
-    gb = GridOptionsBuilder.from_dataframe(df)
-    gb.configure_side_bar(filters_panel=True, columns_panel=True)
-    
-    # Configure each column individually
-    for col in df.columns:
+SERVER_PAGINATION_THRESHOLD = 50_000
+SERVER_PAGE_SIZES = [20, 50, 100, 500]
+ALL_COLUMNS = "All columns"
+
+
+def resolve_pagination_mode(df, pagination_mode):
+    """Turn 'auto' into 'server' for large frames and 'client' otherwise"""
+    if pagination_mode == 'auto':
+        return 'server' if len(df) > SERVER_PAGINATION_THRESHOLD else 'client'
+    return pagination_mode
+
+
+def server_row_order(df, filter_column=ALL_COLUMNS, filter_text="", sort_column=None, ascending=True):
+    """Return the row positions of df after filtering and sorting on the server"""
+    positions = np.arange(len(df))
+    
+    if filter_text:
+        columns = df.columns if filter_column == ALL_COLUMNS else [filter_column]
+        mask = np.zeros(len(df), dtype=bool)
+        for col in columns:
+            mask |= df[col].astype(str).str.contains(filter_text, case=False, regex=False, na=False).to_numpy()
+        positions = positions[mask]
+    
+    if sort_column is not None:
+        values = df[sort_column].iloc[positions].reset_index(drop=True)
+        order = values.sort_values(ascending=ascending, kind='mergesort', na_position='last').index.to_numpy()
+        positions = positions[order]
+    
+    return positions
+
+
+def content_token(df):
+    """Hash the contents of ``df`` so a cache can tell two frames apart (one pass over the data)"""
+    try:
+        hashed = pd.util.hash_pandas_object(df, index=True)
+    except TypeError:
+        # Unhashable cells (lists, dicts) are hashed by their text
+        hashed = pd.util.hash_pandas_object(df.astype(str), index=True)
+    return (df.shape, tuple(df.columns), int(hashed.sum()))
+
+
+def server_side_page(df, key_suffix, page_size=20, data_version=None):
+    """Render server-side filter, sort and page controls and return only the visible page
+    
+    data_version: token that changes whenever the rows of ``df`` change (e.g.
+        ``history.dataset_version()``); without it the contents are hashed.
+    """
+    col1, col2, col3, col4 = st.columns([2, 2, 2, 1])
+    with col1:
+        filter_column = st.selectbox("Filter column", [ALL_COLUMNS] + df.columns.tolist(),
+                                     key=f"server_filter_col_{key_suffix}")
+    with col2:
+        filter_text = st.text_input("Contains", key=f"server_filter_text_{key_suffix}")
+    with col3:
+        sort_column = st.selectbox("Sort by", ["None"] + df.columns.tolist(), key=f"server_sort_col_{key_suffix}")
+    with col4:
+        ascending = st.radio("Order", ["Asc", "Desc"], key=f"server_sort_order_{key_suffix}") == "Asc"
+    sort_column = None if sort_column == "None" else sort_column
+    
+    # Filtering and sorting only rerun when the data or the controls change
+    if data_version is None:
+        data_version = content_token(df)
+    signature = (data_version, filter_column, filter_text, sort_column, ascending)
+    cache_key = f"server_rows_{key_suffix}"
+    cached = st.session_state.get(cache_key)
+    if cached is None or cached[0] != signature:
+        cached = (signature, server_row_order(df, filter_column, filter_text, sort_column, ascending))
+        st.session_state[cache_key] = cached
+    positions = cached[1]
+    
+    col1, col2, col3 = st.columns([1, 1, 3])
+    with col1:
+        page_size = st.selectbox("Rows per page", sorted(set(SERVER_PAGE_SIZES + [page_size])),
+                                 index=sorted(set(SERVER_PAGE_SIZES + [page_size])).index(page_size),
+                                 key=f"server_page_size_{key_suffix}")
+    total_pages = max(1, math.ceil(len(positions) / page_size))
+    page_key = f"server_page_{key_suffix}"
+    if st.session_state.get(page_key, 1) > total_pages:
+        st.session_state[page_key] = total_pages
+    with col2:
+        page = st.number_input("Page", min_value=1, max_value=total_pages, value=1, step=1, key=page_key)
+    
+    start = (page - 1) * page_size
+    end = min(start + page_size, len(positions))
+    with col3:
+        st.caption(f"Showing rows {start + 1 if len(positions) else 0:,}-{end:,} of {len(positions):,}"
+                   + (f" (filtered from {len(df):,})" if len(positions) != len(df) else ""))
+    
+    return df.iloc[positions[start:end]]
+
+
+#------------------------------------------------------------------------------------#
+# Grid Options Compiler
+#------------------------------------------------------------------------------------#
+
+THEME_CLASSES = {
+    'alpine': 'ag-theme-alpine',
+    'alpine-dark': 'ag-theme-alpine-dark',
+    'balham': 'ag-theme-balham',
+    'balham-dark': 'ag-theme-balham-dark',
+    'material': 'ag-theme-material',
+    'streamlit': 'ag-theme-streamlit'
+}
+
+SIDE_BAR = {
+    "toolPanels": [
+        {
+            "id": "columns",
+            "labelDefault": "Columns",
+            "labelKey": "columns",
+            "iconKey": "columns",
+            "toolPanel": "agColumnsToolPanel"
+        },
+        {
+            "id": "filters",
+            "labelDefault": "Filters",
+            "labelKey": "filters",
+            "iconKey": "filter",
+            "toolPanel": "agFiltersToolPanel"
+        }
+    ]
+}
+
+# GridOptionsBuilder only looks at dtype.kind, so a zero-row frame per kind is enough
+KIND_DTYPES = {
+    'b': 'bool', 'i': 'int64', 'u': 'uint64', 'f': 'float64', 'c': 'complex128',
+    'm': 'timedelta64[ns]', 'M': 'datetime64[ns]'
+}
+
+
+def grid_schema(df):
+    """Return the hashable (column, dtype kind) schema the grid options depend on"""
+    return tuple((col, dtype.kind) for col, dtype in zip(df.columns, df.dtypes))
+
+
+def css_class_name(prefix, key_suffix):
+    """Build a stable CSS class name for a widget instance"""
+    return f"{prefix}-{re.sub(r'[^A-Za-z0-9_-]', '-', str(key_suffix))}"
+
+
+@st.cache_data(max_entries=256, show_spinner=False)
+def compile_grid_options(schema, header_class, cell_style, default_cell_style, min_col_width=280,
+                         page_size=20, pagination=True, selection=False, side_bar=True,
+                         editable_columns=(), extra_grid_options=None, default_col_def=None, hidden_columns=()):
+    """Build AG-Grid options once per (schema, style, layout) and serve cache hits afterwards"""
+    empty = pd.DataFrame({i: np.empty(0, dtype=KIND_DTYPES.get(kind, 'object'))
+                          for i, (_, kind) in enumerate(schema)})
+    empty.columns = [col for col, _ in schema]
+    
+    gb = GridOptionsBuilder.from_dataframe(empty)
+    if selection:
+        gb.configure_selection('multiple', use_checkbox=True)
+    if side_bar:
+        gb.configure_side_bar(filters_panel=True, columns_panel=True)
+    
+    editable_columns = set(editable_columns)
+    hidden_columns = set(hidden_columns)
+    for col, _ in schema:
         # Calculate minimum width based on header text length
         header_width = len(str(col)) * 12
         col_min_width = max(min_col_width, header_width)
         
         gb.configure_column(
             col,
-            editable=False,
+            editable=col in editable_columns,
+            hide=col in hidden_columns,
             filter=True,
             sortable=True,
             autoSize=False,
@@ -133,20 +276,9 @@ def view_dataframe(df, height=450, theme='alpine', page_size=20,
             maxWidth=400,
             autoHeight=True,
             wrapText=True,
-            cellStyle={
-                'textAlign': 'left',
-                'fontSize': font_size,
-                'fontFamily': font_family,
-                'color': cell_color,
-                'white-space': 'normal',
-                'line-height': '20px',
-                'display': 'flex',
-                'align-items': 'center',
-                'justify-content': 'flex-start'
-            }
+            cellStyle=cell_style
         )
     
-
     gb.configure_default_column(
         flex=1,
         minWidth=min_col_width,
@@ -155,18 +287,12 @@ def view_dataframe(df, height=450, theme='alpine', page_size=20,
         resizable=True,
         sortable=True,
         headerClass=header_class,
-        cellStyle={
-            'textAlign': 'left',
-            'fontSize': font_size,
-            'fontFamily': font_family,
-            'color': cell_color
-        }
+        cellStyle=default_cell_style
     )
     
-    # Configure grid options using your preferred method
     gb.configure_grid_options(
         domLayout='normal',
-        pagination=True,
+        pagination=pagination,
         paginationPageSize=page_size,
         paginationPageSizeSelector=[10, 20, 50, 100],
         enableCellTextSelection=True,
@@ -176,33 +302,54 @@ def view_dataframe(df, height=450, theme='alpine', page_size=20,
         columnSize="autoSize",
         sizeColumnsToFit=False,
         skipHeaderOnAutoSize=False,
-        enableColResize=True
+        enableColResize=True,
+        **(extra_grid_options or {})
     )
     
     grid_options = gb.build()
-    
-    # Configure sidebar
-    grid_options["sideBar"] = {
-        "toolPanels": [
-            {
-                "id": "columns",
-                "labelDefault": "Columns",
-                "labelKey": "columns",
-                "iconKey": "columns",
-                "toolPanel": "agColumnsToolPanel"
-            },
-            {
-                "id": "filters",
-                "labelDefault": "Filters",
-                "labelKey": "filters",
-                "iconKey": "filter",
-                "toolPanel": "agFiltersToolPanel"
-            }
-        ]
+    if side_bar:
+        grid_options["sideBar"] = SIDE_BAR
+    if default_col_def is not None:
+        grid_options['defaultColDef'] = default_col_def
+    # The builder nests local defaultdicts; plain dicts can be cached and copied
+    return json.loads(json.dumps(grid_options))
+
+
+def cell_styles(font_size, font_family, cell_color, row_height=None):
+    """Return the (column, default column) cell style dicts shared by the widgets"""
+    cell_style = {
+        'textAlign': 'left',
+        'fontSize': font_size,
+        'fontFamily': font_family,
+        'color': cell_color,
+        'white-space': 'normal',
+        'line-height': '20px',
+        'display': 'flex',
+        'align-items': 'center',
+        'justify-content': 'flex-start'
     }
-    
-    # Simple CSS for header styling (working approach like disply_shap_values)
-    st.markdown(f"""
+    default_cell_style = {
+        'textAlign': 'left',
+        'fontSize': font_size,
+        'fontFamily': font_family,
+        'color': cell_color
+    }
+    if row_height is not None:
+        row_limits = {
+            'height': f'{row_height}px',
+            'max-height': f'{row_height}px',
+            'overflow': 'hidden'
+        }
+        cell_style.update(row_limits)
+        default_cell_style.update(row_limits)
+    return cell_style, default_cell_style
+
+
+@functools.lru_cache(maxsize=64)
+def view_grid_css(header_class, header_background, header_color, header_font_size,
+                  header_font_family, header_font_weight):
+    """CSS for the read-only grid, built once per style"""
+    return f"""
     <style>
     .{header_class} {{
         background-color: {header_background} !important;
@@ -236,7 +383,117 @@ def view_dataframe(df, height=450, theme='alpine', page_size=20,
         background-color: #f5f5f5 !important;
     }}
     </style>
-    """, unsafe_allow_html=True)
+    """
+
+
+@functools.lru_cache(maxsize=64)
+def themed_grid_css(theme, header_class, header_background, header_color, header_font_size,
+                    header_font_family, header_font_weight):
+    """CSS for the selection grids, scoped to the theme class and built once per theme/style"""
+    theme_class = THEME_CLASSES.get(theme, 'ag-theme-alpine')
+    return f"""
+    <style>
+    /* Header styling */
+    .{theme_class} .ag-header-cell.{header_class} {{
+        background-color: {header_background} !important;
+    }}
+    
+    .{theme_class} .ag-header-cell.{header_class} .ag-header-cell-label {{
+        justify-content: center !important;
+        display: flex !important;
+        align-items: center !important;
+        color: {header_color} !important;
+        font-size: {header_font_size} !important;
+        font-family: {header_font_family} !important;
+        font-weight: {header_font_weight} !important;
+        text-align: center !important;
+    }}
+    
+    /* Checkbox positioning */
+    .{theme_class} .ag-selection-checkbox {{
+        margin-right: 8px !important;
+    }}
+    
+    .{theme_class} .ag-cell {{
+        display: flex !important;
+        align-items: center !important;
+        padding: 8px 12px !important;
+    }}
+    
+    /* Row styling */
+    .{theme_class} .ag-row {{
+        border-bottom: 1px solid #e0e0e0 !important;
+    }}
+    
+    .{theme_class} .ag-row:hover {{
+        background-color: #f5f5f5 !important;
+    }}
+    </style>
+    """
+
+
+@functools.lru_cache(maxsize=64)
+def edit_header_css(header_class, header_background, header_color, header_font_size,
+                    header_font_family, header_font_weight):
+    """CSS for the edit grid headers, built once per style"""
+    return f"""
+        <style>
+        .{header_class} .ag-header-cell-label {{
+            justify-content: center !important;
+            color: {header_color} !important;
+            font-size: {header_font_size} !important;
+            font-family: {header_font_family} !important;
+            font-weight: {header_font_weight} !important;
+        }}
+        .{header_class} {{
+            background-color: {header_background} !important;
+        }}
+        </style>
+        """
+
+
+#------------------------------------------------------------------------------------#
+# View Dataframe Widget
+#------------------------------------------------------------------------------------#
+
+@st.fragment
+def view_dataframe(df, height=450, theme='alpine', page_size=20, 
+                  font_size='16px', font_family='Arial, sans-serif', cell_color='#008080',
+                  header_color='#333333', header_font_size='14px', header_font_family='Arial, sans-serif',
+                  header_font_weight='600', header_background='#f0f0f0',
+                  min_col_width=280, key_suffix="", row_height=50, pagination_mode='client',
+                  data_version=None):
+    """Display a read-only AG-Grid table with styling options and pagination controls
+    
+    pagination_mode: 'client' ships the whole frame to the grid, 'server' filters, sorts
+    and pages in pandas and ships only the visible page, 'auto' picks by frame size.
+    data_version: token identifying the contents of ``df`` for server pagination
+        (see server_side_page).
+    """
+    if df.empty:
+        st.info("No data available")
+        return
+    
+    pagination_mode = resolve_pagination_mode(df, pagination_mode)
+    if pagination_mode == 'server':
+        df = server_side_page(df, key_suffix=f"view_{key_suffix}", page_size=page_size,
+                              data_version=data_version)
+    
+    # Page size will be controlled within the grid pagination
+    
+    # Use simple header class for styling (like working disply_shap_values function)
+    header_class = "custom-header"
+    
+    # Grid options are compiled once per schema and style
+    cell_style, default_cell_style = cell_styles(font_size, font_family, cell_color)
+    grid_options = compile_grid_options(
+        grid_schema(df), header_class, cell_style, default_cell_style,
+        min_col_width=min_col_width, page_size=page_size, pagination=pagination_mode == 'client'
+    )
+    
+    # Simple CSS for header styling (working approach like disply_shap_values)
+    st.markdown(view_grid_css(header_class, header_background, header_color, header_font_size,
+                              header_font_family, header_font_weight), unsafe_allow_html=True)
     
     AgGrid(
         df.reset_index(drop=True),
@@ -1379,6 +1636,93 @@ def view_dataframe(df, height=450, theme='alpine', page_size=20,
 
 
 
+#------------------------------------------------------------------------------------#
+# Cell-Level Change Detection
+#------------------------------------------------------------------------------------#
+
+# Hidden grid column carrying each row's position in the source DataFrame
+ROW_KEY_COLUMN = '__row_key__'
+DELTA_COLUMNS = ['row_key', 'column', 'old', 'new']
+BOOL_STRINGS = {'true': True, 'false': False, '1': True, '0': False, 'yes': True, 'no': False}
+
+
+def coerce_grid_values(values, dtype):
+    """Parse a column returned by AG-Grid (JSON strings/numbers, '' for cleared cells) back to ``dtype``"""
+    if values.dtype == object:
+        values = values.mask(values.astype(str).str.strip().eq(''))
+    if pd.api.types.is_bool_dtype(dtype):
+        return values.astype(str).str.lower().map(BOOL_STRINGS).where(values.notna())
+    if pd.api.types.is_numeric_dtype(dtype):
+        return pd.to_numeric(values, errors='coerce')
+    if pd.api.types.is_datetime64_any_dtype(dtype):
+        tz = getattr(dtype, 'tz', None)
+        parsed = pd.to_datetime(values, errors='coerce', utc=tz is not None, format='mixed')
+        if tz is not None:
+            return parsed.dt.tz_convert(tz)
+        return parsed.dt.tz_convert(None) if parsed.dt.tz is not None else parsed
+    return values
+
+
+def cell_changes(original, edited, row_keys, columns=None):
+    """
+    Vectorized cell-level diff between source rows and the same rows after editing
+    
+    Edited values are parsed back to the source dtype first, so 5 vs "5" or a
+    re-serialized date is not a change; two nulls (None, NaN, NaT, '') are equal.
+    
+    Parameters:
+    -----------
+    original : pd.DataFrame
+        Source rows, typed
+    edited : pd.DataFrame
+        The same rows in the same order, as returned by the grid
+    row_keys : np.ndarray
+        Key reported for each row
+    columns : list
+        Columns to compare (default: all columns of ``original`` present in ``edited``)
+    
+    Returns:
+    --------
+    pd.DataFrame : One row per changed cell with DELTA_COLUMNS (row_key, column, old, new)
+    """
+    columns = [col for col in (columns if columns is not None else original.columns) if col in edited.columns]
+    frames = []
+    for col in columns:
+        before = original[col].reset_index(drop=True)
+        after = coerce_grid_values(edited[col].reset_index(drop=True), before.dtype)
+        
+        if (pd.api.types.is_object_dtype(before) or pd.api.types.is_string_dtype(before)
+                or isinstance(before.dtype, pd.CategoricalDtype)):
+            differ = before.astype(str).ne(after.astype(str))
+        else:
+            differ = before.ne(after)
+        differ = differ.fillna(True).to_numpy(dtype=bool)
+        before_null, after_null = before.isna().to_numpy(), after.isna().to_numpy()
+        changed = np.where(before_null | after_null, before_null != after_null, differ)
+        
+        hits = np.flatnonzero(changed)
+        if len(hits):
+            frames.append(pd.DataFrame({
+                'row_key': row_keys[hits],
+                'column': col,
+                'old': before.iloc[hits].astype(object).to_numpy(),
+                'new': after.iloc[hits].astype(object).to_numpy()
+            }))
+    if not frames:
+        return pd.DataFrame(columns=DELTA_COLUMNS)
+    return pd.concat(frames, ignore_index=True)
+
+
+def row_keys_for(rows, key_columns=None):
+    """Key per row: the ``key_columns`` value (a tuple for several columns) or the index label"""
+    if not key_columns:
+        return rows.index.to_numpy()
+    if len(key_columns) == 1:
+        return rows[key_columns[0]].to_numpy()
+    return pd.MultiIndex.from_frame(rows[list(key_columns)]).to_numpy()
+
+
+
 @st.fragment
 def edit_dataframe(df, table_name_to_show_on_messages, height=450, theme='alpine', page_size=20,
                   font_size='16px', font_family='Arial, sans-serif', cell_color='#008080',
@@ -1388,12 +1732,28 @@ def edit_dataframe(df, table_name_to_show_on_messages, height=450, theme='alpine
                   edit_page_size=10, edit_font_size='14px', edit_font_family='Arial, sans-serif', edit_cell_color='green',
                   edit_header_color='#333333', edit_header_font_size='14px', 
                   edit_header_font_family='Arial, sans-serif', edit_header_font_weight='bold',
-                  edit_header_background='#e0e0e0'):
-    """Edit selected rows with pagination controls and return the edited data"""
+                  edit_header_background='#e0e0e0', pagination_mode='client', key_columns=None,
+                  data_version=None):
+    """Edit selected rows with pagination controls and return the changed cells
+    
+    pagination_mode: 'client', 'server' or 'auto' (see view_dataframe)
+    data_version: token identifying the contents of ``df`` (see view_dataframe)
+    key_columns: columns identifying a row (e.g. ['patient_id']); they are not
+        editable and their values are reported as the row key. Without them the
+        row key is the DataFrame index label.
+    
+    Returns a DataFrame with one row per changed cell (row_key, column, old, new),
+    see ``cell_changes``, once the edits are submitted.
+    """
     if df.empty:
         st.info("No data available to edit")
         return None
     
+    pagination_mode = resolve_pagination_mode(df, pagination_mode)
+    if pagination_mode == 'server':
+        df = server_side_page(df, key_suffix=f"edit_{key_suffix}", page_size=page_size,
+                              data_version=data_version)
+    
     # Initialize grid refresh counter for cancel functionality
     grid_refresh_key = f"grid_refresh_edit_{key_suffix}"
     if grid_refresh_key not in st.session_state:
@@ -1409,149 +1769,20 @@ def edit_dataframe(df, table_name_to_show_on_messages, height=450, theme='alpine
     # Use simple header class for original table
     header_class = "custom-header"
     
-    # Selection mode - Original table styling
-    gb = GridOptionsBuilder.from_dataframe(df)
-    gb.configure_selection('multiple', use_checkbox=True)
-    gb.configure_side_bar(filters_panel=True, columns_panel=True)
-    
-    # Configure columns with original styling
-    columns_not_editable = set(columns_not_editable or [])
-    for col in df.columns:
-        # Calculate minimum width based on header text length
-        header_width = len(str(col)) * 12
-        col_min_width = max(min_col_width, header_width)
-        
-        gb.configure_column(
-            col,
-            editable=False,
-            filter=True,
-            sortable=True,
-            autoSize=False,
-            resizable=True,
-            headerClass=header_class,
-            minWidth=col_min_width,
-            width=col_min_width,
-            maxWidth=400,
-            autoHeight=True,
-            wrapText=True,
-            cellStyle={
-                'textAlign': 'left',
-                'fontSize': font_size,
-                'fontFamily': font_family,
-                'color': cell_color,
-                'white-space': 'normal',
-                'line-height': '20px',
-                'display': 'flex',
-                'align-items': 'center',
-                'justify-content': 'flex-start'
-            }
-        )
-    
-    # Configure default column for original table
-    gb.configure_default_column(
-        flex=1,
-        minWidth=min_col_width,
-        filter=True,
-        autoSize=False,
-        resizable=True,
-        sortable=True,
-        headerClass=header_class,
-        cellStyle={
-            'textAlign': 'left',
-            'fontSize': font_size,
-            'fontFamily': font_family,
-            'color': cell_color
-        }
+    # Selection mode - Original table styling, compiled once per schema and style
+    cell_style, default_cell_style = cell_styles(font_size, font_family, cell_color)
+    # Rows carry their source position so edits can be matched back to the typed values
+    grid_df = df.reset_index(drop=True)
+    grid_df[ROW_KEY_COLUMN] = np.arange(len(df))
+    grid_options = compile_grid_options(
+        grid_schema(grid_df), header_class, cell_style, default_cell_style,
+        min_col_width=min_col_width, page_size=page_size, pagination=pagination_mode == 'client',
+        selection=True, hidden_columns=(ROW_KEY_COLUMN,)
     )
     
-    # Configure grid options using your preferred method
-    gb.configure_grid_options(
-        domLayout='normal',
-        pagination=True,
-        paginationPageSize=page_size,
-        paginationPageSizeSelector=[10, 20, 50, 100],
-        enableCellTextSelection=True,
-        ensureDomOrder=True,
-        suppressColumnVirtualisation=False,
-        suppressRowVirtualisation=False,
-        columnSize="autoSize",
-        sizeColumnsToFit=False,
-        skipHeaderOnAutoSize=False,
-        enableColResize=True
-    )
-    
-    grid_options = gb.build()
-    
-    # Configure sidebar
-    grid_options["sideBar"] = {
-        "toolPanels": [
-            {
-                "id": "columns",
-                "labelDefault": "Columns",
-                "labelKey": "columns",
-                "iconKey": "columns",
-                "toolPanel": "agColumnsToolPanel"
-            },
-            {
-                "id": "filters",
-                "labelDefault": "Filters",
-                "labelKey": "filters",
-                "iconKey": "filter",
-                "toolPanel": "agFiltersToolPanel"
-            }
-        ]
-    }
-    
-    # Get theme class for proper CSS targeting
-    theme_class = {
-        'alpine': 'ag-theme-alpine',
-        'alpine-dark': 'ag-theme-alpine-dark',
-        'balham': 'ag-theme-balham',
-        'balham-dark': 'ag-theme-balham-dark',
-        'material': 'ag-theme-material',
-        'streamlit': 'ag-theme-streamlit'
-    }.get(theme, 'ag-theme-alpine')
-    
     # Add enhanced CSS for proper styling
-    st.markdown(f"""
-    <style>
-    /* Header styling */
-    .{theme_class} .ag-header-cell.{header_class} {{
-        background-color: {header_background} !important;
-    }}
-    
-    .{theme_class} .ag-header-cell.{header_class} .ag-header-cell-label {{
-        justify-content: center !important;
-        display: flex !important;
-        align-items: center !important;
-        color: {header_color} !important;
-        font-size: {header_font_size} !important;
-        font-family: {header_font_family} !important;
-        font-weight: {header_font_weight} !important;
-        text-align: center !important;
-    }}
-    
-    /* Checkbox positioning */
-    .{theme_class} .ag-selection-checkbox {{
-        margin-right: 8px !important;
-    }}
-    
-    .{theme_class} .ag-cell {{
-        display: flex !important;
-        align-items: center !important;
-        padding: 8px 12px !important;
-    }}
-    
-    /* Row styling */
-    .{theme_class} .ag-row {{
-        border-bottom: 1px solid #e0e0e0 !important;
-    }}
-    
-    .{theme_class} .ag-row:hover {{
-        background-color: #f5f5f5 !important;
-    }}
-    </style>
-    """, unsafe_allow_html=True)
+    st.markdown(themed_grid_css(theme, header_class, header_background, header_color, header_font_size,
+                                header_font_family, header_font_weight), unsafe_allow_html=True)
     
     # Reset selected rows if needed
     if st.session_state[reset_key]:
@@ -1568,7 +1799,7 @@ def edit_dataframe(df, table_name_to_show_on_messages, height=450, theme='alpine
     current_grid_key = f"edit_select_{key_suffix}_{st.session_state[grid_refresh_key]}"
     
     grid_response = AgGrid(
-        df.reset_index(drop=True),
+        grid_df,
         gridOptions=grid_options,
         data_return_mode=DataReturnMode.FILTERED_AND_SORTED,
         update_mode=GridUpdateMode.MODEL_CHANGED | GridUpdateMode.SELECTION_CHANGED,
@@ -1588,112 +1819,33 @@ def edit_dataframe(df, table_name_to_show_on_messages, height=450, theme='alpine
         
         selected_df = pd.DataFrame(selected_rows)
         
-        # Generate unique header class for edit table
-        edit_header_class = f"edit-header-{uuid.uuid4().hex[:8]}"
-        
-            # Page size will be controlled within the edit grid pagination
-        
-        # Editing mode - Different styling for edit table
-        gb_edit = GridOptionsBuilder.from_dataframe(selected_df)
+        # Stable header class for the edit table so its options can be cached
+        edit_header_class = css_class_name("edit-header", key_suffix)
         
-        # Configure columns for editing - inherit ALL styling from original table
-        for col in selected_df.columns:
-            is_editable = col not in columns_not_editable
-            # Calculate same width as original table
-            header_width = len(str(col)) * 12
-            col_min_width = max(min_col_width, header_width)
-            
-            gb_edit.configure_column(
-                col,
-                editable=is_editable,
-                filter=True,
-                sortable=True,
-                autoSize=False,
-                resizable=True,
-                headerClass=edit_header_class,
-                minWidth=col_min_width,
-                width=col_min_width,
-                maxWidth=400,
-                autoHeight=True,
-                wrapText=True,
-                cellStyle={
-                    'textAlign': 'left',  # Same as original table
-                    'fontSize': edit_font_size,
-                    'fontFamily': edit_font_family,
-                    'color': edit_cell_color,
-                    'white-space': 'normal',
-                    'line-height': '20px',
-                    'display': 'flex',
-                    'align-items': 'center',
-                    'justify-content': 'flex-start',  # Same alignment as original
-                    'height': f'{row_height}px',
-                    'max-height': f'{row_height}px',
-                    'overflow': 'hidden'
-                }
-            )
-        
-        # Configure default column for edit table - inherit original table settings
-        gb_edit.configure_default_column(
-            flex=1,
-            minWidth=min_col_width,
-            filter=True,
-            autoSize=False,
-            resizable=True,
-            sortable=True,
-            headerClass=edit_header_class,
-            cellStyle={
-                'textAlign': 'left',
-                'fontSize': edit_font_size,
-                'fontFamily': edit_font_family,
-                'color': edit_cell_color,
-                'height': f'{row_height}px',
-                'max-height': f'{row_height}px',
-                'overflow': 'hidden'
-            }
+        # Editing mode - Different styling for edit table, inherit ALL styling from original table
+        columns_not_editable = set(columns_not_editable or []) | set(key_columns or []) | {ROW_KEY_COLUMN}
+        edit_cell_style, edit_default_cell_style = cell_styles(
+            edit_font_size, edit_font_family, edit_cell_color, row_height=row_height
         )
-        
-        # Configure edit grid options using your preferred method
-        gb_edit.configure_grid_options(
-            domLayout='normal',
-            pagination=True,
-            paginationPageSize=edit_page_size,
-            paginationPageSizeSelector=[10, 20, 50, 100],
-            enableCellTextSelection=True,
-            ensureDomOrder=True,
-            suppressColumnVirtualisation=False,
-            suppressRowVirtualisation=False,
-            columnSize="autoSize",
-            sizeColumnsToFit=False,
-            skipHeaderOnAutoSize=False,
-            enableColResize=True,
-            singleClickEdit=True
+        grid_options_edit = compile_grid_options(
+            grid_schema(selected_df), edit_header_class, edit_cell_style, edit_default_cell_style,
+            min_col_width=min_col_width, page_size=edit_page_size, side_bar=False,
+            editable_columns=tuple(col for col in selected_df.columns if col not in columns_not_editable),
+            extra_grid_options={'singleClickEdit': True},
+            hidden_columns=(ROW_KEY_COLUMN,),
+            # Configure edit grid to fill width
+            default_col_def={
+                'flex': 1,
+                'minWidth': 100,
+                'resizable': True,
+                'headerClass': edit_header_class
+            }
         )
         
-        grid_options_edit = gb_edit.build()
-        
-        # Configure edit grid to fill width
-        grid_options_edit['defaultColDef'] = {
-            'flex': 1,
-            'minWidth': 100,
-            'resizable': True,
-            'headerClass': edit_header_class
-        }
-        
         # Custom CSS for edit table headers
-        st.markdown(f"""
-        <style>
-        .{edit_header_class} .ag-header-cell-label {{
-            justify-content: center !important;
-            color: {edit_header_color} !important;
-            font-size: {edit_header_font_size} !important;
-            font-family: {edit_header_font_family} !important;
-            font-weight: {edit_header_font_weight} !important;
-        }}
-        .{edit_header_class} {{
-            background-color: {edit_header_background} !important;
-        }}
-        </style>
-        """, unsafe_allow_html=True)
+        st.markdown(edit_header_css(edit_header_class, edit_header_background, edit_header_color,
+                                    edit_header_font_size, edit_header_font_family, edit_header_font_weight),
+                    unsafe_allow_html=True)
         
         edit_response = AgGrid(
             selected_df.reset_index(drop=True),
@@ -1709,62 +1861,30 @@ def edit_dataframe(df, table_name_to_show_on_messages, height=450, theme='alpine
             columns_auto_size_mode=ColumnsAutoSizeMode.FIT_CONTENTS
         )
         
-        # Enhanced validation and button styling
+        # Cell-level delta between the typed source rows and the edited grid
         try:
-            # edited_data = pd.DataFrame(edit_response['data']).reset_index(drop=True)
-            # original_data = pd.DataFrame(selected_rows).reset_index(drop=True)
-            
-            # # Ensure both dataframes have the same columns in the same order
-            # if not edited_data.columns.equals(original_data.columns):
-            #     # Reorder columns to match
-            #     edited_data = edited_data[original_data.columns]
-            
-            # # Convert all columns to string for comparison to avoid data type issues
-            # edited_data_str = edited_data.astype(str)
-            # original_data_str = original_data.astype(str)
-            
-            # # Check if any changes were made by comparing string representations
-            # has_changes = not edited_data_str.equals(original_data_str)
-            
-            # # Alternative comparison method - check row by row
-            # if not has_changes:
-            #     # Double check with row-by-row comparison
-            #     for i in range(len(edited_data)):
-            #         for col in edited_data.columns:
-            #             orig_val = str(original_data.iloc[i][col])
-            #             edit_val = str(edited_data.iloc[i][col])
-            #             if orig_val != edit_val:
-            #                 has_changes = True
-            #                 break
-            #         if has_changes:
-            #             break
-            # edited_data = pd.DataFrame(edit_response['data']).reset_index(drop=True)
-            # original_data = pd.DataFrame(selected_rows).reset_index(drop=True)
-            # st.write(edited_data['has_po'])
-            # st.write(selected_df)
-            # Ensure both dataframes have the same columns in the same order
-            # if not edited_data.columns.equals(original_data.columns):
-            #     # Reorder columns to match
-            #     edited_data = edited_data[original_data.columns]
-
-            # # Check if any changes were made using DataFrame.equals()
-            # has_changes = not original_data.equals(edited_data)
+            edited_data = pd.DataFrame(edit_response['data'])
+            positions = pd.to_numeric(edited_data[ROW_KEY_COLUMN]).to_numpy(dtype=np.int64)
+            original_rows = df.iloc[positions]
+            delta = cell_changes(
+                original_rows, edited_data, row_keys_for(original_rows, key_columns),
+                columns=[col for col in df.columns if col not in columns_not_editable]
+            )
             
             # Show submit and cancel buttons
             col1, col2 = st.columns([1, 1])
             
             with col1:
                 if st.button("Submit Changes", key=f"submit_{key_suffix}"):
-                    # if has_changes:
-                    # st.success(f"✅ Successfully edited {len(edited_data)} rows")
-                    # Reset selection and return data
-                    st.session_state[reset_key] = True
-                    # Store the result in session state to handle fragment rerun
-                    st.session_state[f"edit_result_{key_suffix}"] = edit_response['data'].copy()
-                    st.session_state[grid_refresh_key] += 1
-                    st.rerun()
-                    # else:
-                    #     st.warning("⚠️ No changes detected. Please modify the data before submitting.")
+                    if len(delta) > 0:
+                        # Reset selection and return data
+                        st.session_state[reset_key] = True
+                        # Store the result in session state to handle fragment rerun
+                        st.session_state[f"edit_result_{key_suffix}"] = delta
+                        st.session_state[grid_refresh_key] += 1
+                        st.rerun()
+                    else:
+                        st.warning("⚠️ No changes detected. Please modify the data before submitting.")
             
             with col2:
                 if st.button("Cancel", key=f"cancel_edit_changes_{key_suffix}"):
@@ -1773,12 +1893,8 @@ def edit_dataframe(df, table_name_to_show_on_messages, height=450, theme='alpine
                     st.info("🔵 Selection cleared. Changes discarded.")
                     st.rerun()
             
-            # Check if there's a result to return from session state
-            result_key = f"edit_result_{key_suffix}"
-            if result_key in st.session_state:
-                result = st.session_state[result_key].copy()
-                del st.session_state[result_key]  # Clean up
-                return result
+            if len(delta) > 0:
+                st.caption(f"{len(delta):,} changed cell(s) in {delta['row_key'].nunique():,} row(s)")
                         
         except Exception as e:
             st.error(f"Error in edit comparison: {str(e)}")
@@ -1787,7 +1903,13 @@ def edit_dataframe(df, table_name_to_show_on_messages, height=450, theme='alpine
     else:
         st.warning(f"Please Select {table_name_to_show_on_messages} for Update")
     
-    # Fragment functions should not return values - use session state instead
+    # The delta is returned on the rerun after submitting, when the selection has been cleared
+    result_key = f"edit_result_{key_suffix}"
+    if result_key in st.session_state:
+        return st.session_state.pop(result_key)
+    return None
+
+
 #------------------------------------------------------------------------------------#
 # Delete Dataframe Widget
 #------------------------------------------------------------------------------------#
@@ -1797,12 +1919,22 @@ def delete_dataframe(df, height=450, theme='alpine', page_size=20,
                     font_size='16px', font_family='Arial, sans-serif', cell_color='#008080',
                     header_color='#333333', header_font_size='14px', header_font_family='Arial, sans-serif',
                     header_font_weight='600', header_background='#f0f0f0',
-                    min_col_width=280, key_suffix="", row_height=50, table_name_to_show_on_messages=""):
-    """Delete selected rows with pagination controls and return the deleted data"""
+                    min_col_width=280, key_suffix="", row_height=50, table_name_to_show_on_messages="",
+                    pagination_mode='client', data_version=None):
+    """Delete selected rows with pagination controls and return the deleted data
+    
+    pagination_mode: 'client', 'server' or 'auto' (see view_dataframe)
+    data_version: token identifying the contents of ``df`` (see view_dataframe)
+    """
     if df.empty:
         st.info("No data available to delete")
         return None
     
+    pagination_mode = resolve_pagination_mode(df, pagination_mode)
+    if pagination_mode == 'server':
+        df = server_side_page(df, key_suffix=f"delete_{key_suffix}", page_size=page_size,
+                              data_version=data_version)
+    
     # Initialize grid refresh counter for cancel functionality
     grid_refresh_key = f"grid_refresh_{key_suffix}"
     if grid_refresh_key not in st.session_state:
@@ -1810,151 +1942,20 @@ def delete_dataframe(df, height=450, theme='alpine', page_size=20,
     
     # Page size will be controlled within the grid pagination
     
-    # Generate unique header class for styling
-    header_class = f"header-{uuid.uuid4().hex[:8]}"
-    
-    # Selection mode
-    gb = GridOptionsBuilder.from_dataframe(df)
-    gb.configure_selection('multiple', use_checkbox=True)
-    gb.configure_side_bar(filters_panel=True, columns_panel=True)
+    # Stable header class for styling so the grid options can be cached
+    header_class = css_class_name("header", key_suffix)
     
-    # Configure columns with styling
-    for col in df.columns:
-        # Calculate minimum width based on header text length
-        header_width = len(str(col)) * 12
-        col_min_width = max(min_col_width, header_width)
-        
-        gb.configure_column(
-            col,
-            editable=False,
-            filter=True,
-            sortable=True,
-            autoSize=False,
-            resizable=True,
-            headerClass=header_class,
-            minWidth=col_min_width,
-            width=col_min_width,
-            maxWidth=400,
-            autoHeight=True,
-            wrapText=True,
-            cellStyle={
-                'textAlign': 'left',
-                'fontSize': font_size,
-                'fontFamily': font_family,
-                'color': cell_color,
-                'white-space': 'normal',
-                'line-height': '20px',
-                'display': 'flex',
-                'align-items': 'center',
-                'justify-content': 'flex-start'
-            }
-        )
-    
-    # Configure default column
-    gb.configure_default_column(
-        flex=1,
-        minWidth=min_col_width,
-        filter=True,
-        autoSize=False,
-        resizable=True,
-        sortable=True,
-        headerClass=header_class,
-        cellStyle={
-            'textAlign': 'left',
-            'fontSize': font_size,
-            'fontFamily': font_family,
-            'color': cell_color
-        }
+    # Selection mode, compiled once per schema and style
+    cell_style, default_cell_style = cell_styles(font_size, font_family, cell_color)
+    grid_options = compile_grid_options(
+        grid_schema(df), header_class, cell_style, default_cell_style,
+        min_col_width=min_col_width, page_size=page_size, pagination=pagination_mode == 'client',
+        selection=True
     )
     
-    # Configure grid options using your preferred method
-    gb.configure_grid_options(
-        domLayout='normal',
-        pagination=True,
-        paginationPageSize=page_size,
-        paginationPageSizeSelector=[10, 20, 50, 100],
-        enableCellTextSelection=True,
-        ensureDomOrder=True,
-        suppressColumnVirtualisation=False,
-        suppressRowVirtualisation=False,
-        columnSize="autoSize",
-        sizeColumnsToFit=False,
-        skipHeaderOnAutoSize=False,
-        enableColResize=True
-    )
-    
-    grid_options = gb.build()
-    
-    # Configure sidebar
-    grid_options["sideBar"] = {
-        "toolPanels": [
-            {
-                "id": "columns",
-                "labelDefault": "Columns",
-                "labelKey": "columns",
-                "iconKey": "columns",
-                "toolPanel": "agColumnsToolPanel"
-            },
-            {
-                "id": "filters",
-                "labelDefault": "Filters",
-                "labelKey": "filters",
-                "iconKey": "filter",
-                "toolPanel": "agFiltersToolPanel"
-            }
-        ]
-    }
-    
-    # Get theme class for proper CSS targeting
-    theme_class = {
-        'alpine': 'ag-theme-alpine',
-        'alpine-dark': 'ag-theme-alpine-dark',
-        'balham': 'ag-theme-balham',
-        'balham-dark': 'ag-theme-balham-dark',
-        'material': 'ag-theme-material',
-        'streamlit': 'ag-theme-streamlit'
-    }.get(theme, 'ag-theme-alpine')
-    
     # Add enhanced CSS for proper styling
-    st.markdown(f"""
-    <style>
-    /* Header styling */
-    .{theme_class} .ag-header-cell.{header_class} {{
-        background-color: {header_background} !important;
-    }}
-    
-    .{theme_class} .ag-header-cell.{header_class} .ag-header-cell-label {{
-        justify-content: center !important;
-        display: flex !important;
-        align-items: center !important;
-        color: {header_color} !important;
-        font-size: {header_font_size} !important;
-        font-family: {header_font_family} !important;
-        font-weight: {header_font_weight} !important;
-        text-align: center !important;
-    }}
-    
-    /* Checkbox positioning */
-    .{theme_class} .ag-selection-checkbox {{
-        margin-right: 8px !important;
-    }}
-    
-    .{theme_class} .ag-cell {{
-        display: flex !important;
-        align-items: center !important;
-        padding: 8px 12px !important;
-    }}
-    
-    /* Row styling */
-    .{theme_class} .ag-row {{
-        border-bottom: 1px solid #e0e0e0 !important;
-    }}
-    
-    .{theme_class} .ag-row:hover {{
-        background-color: #f5f5f5 !important;
-    }}
-    </style>
-    """, unsafe_allow_html=True)
+    st.markdown(themed_grid_css(theme, header_class, header_background, header_color, header_font_size,
+                                header_font_family, header_font_weight), unsafe_allow_html=True)
     
     # st.markdown("**Select rows to delete:**")
     st.markdown(
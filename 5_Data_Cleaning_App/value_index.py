@@ -0,0 +1,106 @@
+"""
+Value Index
+Per-column inverted index (value -> row positions) for the Edit Data tab
+"""
+
+import numpy as np
+import pandas as pd
+
+from history import cached_by_version
+
+
+# ==================== Index Construction ====================
+def _from_codes(codes, uniques):
+    """
+    Group row positions by value code
+
+    Positions of value ``i`` are ``order[offsets[i]:offsets[i + 1]]``, in row
+    order. Missing values (code -1) are not indexed.
+    """
+    valid = np.flatnonzero(codes >= 0)
+    order = valid[np.argsort(codes[valid], kind='stable')]
+    counts = np.bincount(codes[valid], minlength=len(uniques))
+    offsets = np.concatenate([[0], np.cumsum(counts)])
+    return {'codes': codes, 'uniques': uniques, 'counts': counts, 'order': order, 'offsets': offsets}
+
+
+def build_value_index(series):
+    """
+    Build the inverted index of one column with a single factorize pass
+
+    Parameters:
+    -----------
+    series : pd.Series
+        Column to index
+
+    Returns:
+    --------
+    dict : 'codes' (value code per row), 'uniques' (pd.Index of values in
+        order of appearance), 'counts', 'order' and 'offsets'
+    """
+    codes, uniques = pd.factorize(series, use_na_sentinel=True)
+    uniques = pd.Index(uniques)
+    if isinstance(uniques, pd.CategoricalIndex):
+        uniques = uniques.astype(object)
+    return _from_codes(codes, uniques)
+
+
+def value_index(df, column):
+    """Return the index of ``df[column]``, built on first use and cached until the column changes"""
+    return cached_by_version('value_index', column, [column], lambda: build_value_index(df[column]))
+
+
+def refresh_value_index(column, index):
+    """Store an index updated by ``replace_in_index`` for the current dataset version"""
+    return cached_by_version('value_index', column, [column], lambda: index)
+
+
+# ==================== Lookups ====================
+def _codes_for(index, values):
+    codes = index['uniques'].get_indexer(pd.Index(list(values), dtype=object))
+    return codes[codes >= 0]
+
+
+def unique_values(index):
+    """Distinct non-null values in order of first appearance (``dropna().unique()``)"""
+    return index['uniques'][index['counts'] > 0].tolist()
+
+
+def value_counts_frame(index):
+    """Value/Count table sorted by count, like ``value_counts()``"""
+    present = np.flatnonzero(index['counts'] > 0)
+    ranked = present[np.argsort(-index['counts'][present], kind='stable')]
+    return pd.DataFrame({'Value': index['uniques'][ranked], 'Count': index['counts'][ranked]})
+
+
+def count_rows(index, values):
+    """Number of rows holding any of ``values``"""
+    return int(index['counts'][_codes_for(index, values)].sum())
+
+
+def row_positions(index, values):
+    """Sorted row positions holding any of ``values`` (for ``df.iloc``)"""
+    order, offsets = index['order'], index['offsets']
+    segments = [order[offsets[code]:offsets[code + 1]] for code in _codes_for(index, values)]
+    if not segments:
+        return np.array([], dtype=np.intp)
+    return np.sort(np.concatenate(segments))
+
+
+# ==================== Updates ====================
+def replace_in_index(index, to_replace, value):
+    """
+    Return the index after ``replace(to_replace, value)`` without re-hashing the column
+
+    Only the affected rows are re-coded; replaced values keep a zero count so
+    existing codes stay valid.
+    """
+    uniques = index['uniques']
+    target = uniques.get_indexer(pd.Index([value], dtype=object))[0]
+    if target < 0:
+        uniques = uniques.append(pd.Index([value], dtype=object))
+        target = len(uniques) - 1
+
+    codes = index['codes'].copy()
+    codes[row_positions(index, [v for v in to_replace if v != value])] = target
+    return _from_codes(codes, uniques)
@@ -0,0 +1,182 @@
+"""
+Excel Workbook Loader
+Single-pass, cached sheet parsing for Excel uploads
+"""
+
+import hashlib
+import importlib.util
+import io
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+
+import pandas as pd
+import streamlit as st
+
+
+CALAMINE_AVAILABLE = importlib.util.find_spec('python_calamine') is not None
+
+EXCEL_ENGINES = {
+    'auto': 'Auto (fastest installed)',
+    'calamine': 'Calamine (Rust, fast)',
+    'openpyxl': 'openpyxl (read-only streaming)'
+}
+
+MAX_PARSE_WORKERS = 4
+
+
+# ==================== Engines ====================
+def available_engines():
+    """Return the EXCEL_ENGINES options that can be used in this environment"""
+    return [engine for engine in EXCEL_ENGINES if engine != 'calamine' or CALAMINE_AVAILABLE]
+
+
+def resolve_engine(engine, filename):
+    """
+    Map an engine choice to a pandas ``read_excel`` engine
+
+    'auto' picks calamine when installed; otherwise .xlsx files use openpyxl
+    (read-only mode) and legacy .xls files use xlrd.
+    """
+    if engine in ('auto', 'calamine') and CALAMINE_AVAILABLE:
+        return 'calamine'
+    return 'xlrd' if filename.lower().endswith('.xls') else 'openpyxl'
+
+
+# ==================== Workbook Handles ====================
+@st.cache_resource(max_entries=4, show_spinner=False)
+def _open_workbook(file_hash, engine, _data):
+    """
+    Open a workbook once and keep the handle for later sheet reads
+
+    With openpyxl, pandas opens the workbook in read-only mode, so only the
+    zip directory is read here; each sheet is streamed when it is parsed. The
+    lock serialises reads because the handle is shared between reruns.
+    """
+    return pd.ExcelFile(io.BytesIO(_data), engine=engine), threading.Lock()
+
+
+@st.cache_data(max_entries=256, show_spinner=False)
+def _cached_sheet(file_hash, sheet, engine, _parse):
+    """Parsed sheet cache keyed by (file hash, sheet, engine); ``_parse`` runs on a miss"""
+    return _parse()
+
+
+def _parse_sheet_batch(data, sheets, engine):
+    """Parse several sheets from one workbook open (runs in a worker process)"""
+    with pd.ExcelFile(io.BytesIO(data), engine=engine) as workbook:
+        return {sheet: workbook.parse(sheet) for sheet in sheets}
+
+
+# ==================== Public API ====================
+def open_workbook(source, filename, engine='auto'):
+    """
+    Open an uploaded workbook and list its sheets
+
+    Parameters:
+    -----------
+    source : UploadedFile or file-like
+        Excel file
+    filename : str
+        Name of the file (used to pick the engine for .xls)
+    engine : str
+        One of EXCEL_ENGINES
+
+    Returns:
+    --------
+    dict : 'file_hash', 'engine' (resolved) and 'sheets' (sheet names in order)
+    """
+    source.seek(0)
+    data = source.read()
+    source.seek(0)
+    file_hash = hashlib.sha1(data).hexdigest()
+    engine = resolve_engine(engine, filename)
+    workbook, lock = _open_workbook(file_hash, engine, data)
+    with lock:
+        sheets = list(workbook.sheet_names)
+    return {'file_hash': file_hash, 'engine': engine, 'sheets': sheets}
+
+
+def read_sheet(source, workbook_info, sheet):
+    """
+    Return one sheet as a DataFrame, parsing it at most once per file
+
+    Parameters:
+    -----------
+    source : UploadedFile or file-like
+        Excel file (only read on a cache miss)
+    workbook_info : dict
+        Output of ``open_workbook``
+    sheet : str
+        Sheet name
+
+    Returns:
+    --------
+    pd.DataFrame : Parsed sheet
+    """
+    file_hash, engine = workbook_info['file_hash'], workbook_info['engine']
+
+    def parse():
+        source.seek(0)
+        workbook, lock = _open_workbook(file_hash, engine, source.read())
+        source.seek(0)
+        with lock:
+            return workbook.parse(sheet)
+
+    return _cached_sheet(file_hash, sheet, engine, parse)
+
+
+def parse_all_sheets(source, workbook_info, max_workers=None, progress_callback=None):
+    """
+    Parse every sheet of a workbook in parallel worker processes
+
+    Sheets are split into one batch per worker so each worker opens the
+    workbook only once. The results go into the same cache as ``read_sheet``,
+    which makes switching sheets afterwards instant. Falls back to parsing in
+    this process when a worker pool cannot be started.
+
+    Parameters:
+    -----------
+    source : UploadedFile or file-like
+        Excel file
+    workbook_info : dict
+        Output of ``open_workbook``
+    max_workers : int
+        Number of worker processes (default: CPU count, at most MAX_PARSE_WORKERS)
+    progress_callback : callable
+        Called with the fraction of sheets parsed (0-1)
+    """
+    file_hash, engine, sheets = workbook_info['file_hash'], workbook_info['engine'], workbook_info['sheets']
+    workers = min(max_workers or os.cpu_count() or 1, MAX_PARSE_WORKERS, len(sheets))
+
+    def store(parsed):
+        for sheet, frame in parsed.items():
+            _cached_sheet(file_hash, sheet, engine, lambda frame=frame: frame)
+
+    if workers <= 1:
+        for done, sheet in enumerate(sheets, start=1):
+            read_sheet(source, workbook_info, sheet)
+            if progress_callback:
+                progress_callback(done / len(sheets))
+        return
+
+    source.seek(0)
+    data = source.read()
+    source.seek(0)
+    batches = [sheets[i::workers] for i in range(workers)]
+    done = 0
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(_parse_sheet_batch, data, batch, engine) for batch in batches]
+            for future in as_completed(futures):
+                parsed = future.result()
+                store(parsed)
+                done += len(parsed)
+                if progress_callback:
+                    progress_callback(done / len(sheets))
+    except (BrokenProcessPool, OSError):
+        for sheet in sheets:
+            read_sheet(source, workbook_info, sheet)
+        if progress_callback:
+            progress_callback(1.0)
@@ -99,13 +99,12 @@ if __name__ == "__main__":
         col1, col2, col3 = st.columns(3)
         with col1:
             if st.button("⚡"):
-                fetch_data.clear()
+                refresh_tables()
                 st.rerun()
         with col2:
             st.markdown(f'<h2 style="color: firebrick; text-align: center">Welcome {st.session_state["name"]}</h2>', unsafe_allow_html=True)
-        df = pd.DataFrame(fetch_data("patients"))
-        st.session_state["patients_df"] = df
-        selected_rows = aggrid_dis(df, "All Patients Information", "", "single")
+        patients_page = patient_browser("home_browser", label="All Patients Information")
+        selected_rows = aggrid_dis(patients_page, "", "", "single")
 
     elif st.session_state["authentication_status"] is False:
         st.error('Username/password is incorrect')
@@ -0,0 +1,89 @@
+-- ============================================
+-- Change Tracking
+-- ============================================
+-- Adds created_at / updated_at to the tables the app keeps in memory and logs
+-- the keys of deleted rows, so the app only fetches rows changed since its
+-- last sync instead of re-reading whole tables.
+--
+-- Safe to run again, and on a database created before this script existed:
+--   psql -U <username> -d <dbname> -f Documentation/Change_Tracking.sql
+--
+-- A TRUNCATE is logged as a single row_id '*', which makes the app reload the table.
+--
+-- The app deletes deleted_rows entries older than one day (DELETED_ROWS_RETENTION in
+-- db_functions.py) about once an hour, and reloads a table in full when its last
+-- sync is older than that. If the app's role may not delete from deleted_rows,
+-- schedule the same cleanup instead (e.g. daily from cron):
+--   psql -U <username> -d <dbname> -c "DELETE FROM deleted_rows WHERE deleted_at < now() - interval '1 day'"
+
+CREATE TABLE IF NOT EXISTS deleted_rows (
+    id BIGSERIAL PRIMARY KEY,
+    table_name TEXT NOT NULL,
+    row_id TEXT NOT NULL,
+    deleted_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+CREATE INDEX IF NOT EXISTS idx_deleted_rows_table_deleted_at ON deleted_rows(table_name, deleted_at);
+CREATE INDEX IF NOT EXISTS idx_deleted_rows_deleted_at ON deleted_rows(deleted_at);
+
+-- TG_ARGV[0] is the primary key column of the table
+CREATE OR REPLACE FUNCTION touch_updated_at() RETURNS trigger AS $$
+BEGIN
+    NEW.updated_at := now();
+    IF TG_OP = 'UPDATE' THEN
+        NEW.created_at := OLD.created_at;
+        -- A changed primary key reads as a delete of the old key plus a new row
+        IF to_jsonb(NEW) ->> TG_ARGV[0] IS DISTINCT FROM to_jsonb(OLD) ->> TG_ARGV[0] THEN
+            INSERT INTO deleted_rows (table_name, row_id) VALUES (TG_TABLE_NAME, to_jsonb(OLD) ->> TG_ARGV[0]);
+        END IF;
+    END IF;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION log_deleted_row() RETURNS trigger AS $$
+BEGIN
+    INSERT INTO deleted_rows (table_name, row_id) VALUES (TG_TABLE_NAME, to_jsonb(OLD) ->> TG_ARGV[0]);
+    RETURN OLD;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION log_truncate() RETURNS trigger AS $$
+BEGIN
+    INSERT INTO deleted_rows (table_name, row_id) VALUES (TG_TABLE_NAME, '*');
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DO $$
+DECLARE
+    tracked RECORD;
+BEGIN
+    FOR tracked IN
+        SELECT * FROM (VALUES
+            ('patients', 'patient_id'),
+            ('blood_test', 'test_id'),
+            ('hormonal_test', 'test_id'),
+            ('tumor_marks', 'test_id'),
+            ('mutation_analysis', 'test_id'),
+            ('clinical_notes', 'visit_id')
+        ) AS t(table_name, key_column)
+    LOOP
+        EXECUTE format('ALTER TABLE %I ADD COLUMN IF NOT EXISTS created_at TIMESTAMPTZ NOT NULL DEFAULT now()', tracked.table_name);
+        EXECUTE format('ALTER TABLE %I ADD COLUMN IF NOT EXISTS updated_at TIMESTAMPTZ NOT NULL DEFAULT now()', tracked.table_name);
+        EXECUTE format('CREATE INDEX IF NOT EXISTS %I ON %I (updated_at)', 'idx_' || tracked.table_name || '_updated_at', tracked.table_name);
+
+        EXECUTE format('DROP TRIGGER IF EXISTS %I ON %I', tracked.table_name || '_touch_updated_at', tracked.table_name);
+        EXECUTE format('CREATE TRIGGER %I BEFORE INSERT OR UPDATE ON %I FOR EACH ROW EXECUTE FUNCTION touch_updated_at(%L)',
+                       tracked.table_name || '_touch_updated_at', tracked.table_name, tracked.key_column);
+
+        EXECUTE format('DROP TRIGGER IF EXISTS %I ON %I', tracked.table_name || '_log_deleted_row', tracked.table_name);
+        EXECUTE format('CREATE TRIGGER %I AFTER DELETE ON %I FOR EACH ROW EXECUTE FUNCTION log_deleted_row(%L)',
+                       tracked.table_name || '_log_deleted_row', tracked.table_name, tracked.key_column);
+
+        EXECUTE format('DROP TRIGGER IF EXISTS %I ON %I', tracked.table_name || '_log_truncate', tracked.table_name);
+        EXECUTE format('CREATE TRIGGER %I AFTER TRUNCATE ON %I FOR EACH STATEMENT EXECUTE FUNCTION log_truncate()',
+                       tracked.table_name || '_log_truncate', tracked.table_name);
+    END LOOP;
+END;
+$$;
@@ -41,6 +41,7 @@ CREATE EXTENSION IF NOT EXISTS "uuid-ossp";
 CREATE EXTENSION IF NOT EXISTS "pgcrypto";
 
 -- Drop tables if they exist (in correct order respecting foreign keys)
+DROP TABLE IF EXISTS deleted_rows CASCADE;
 DROP TABLE IF EXISTS clinical_notes CASCADE;
 DROP TABLE IF EXISTS tumor_marks CASCADE;
 DROP TABLE IF EXISTS mutation_analysis CASCADE;
@@ -280,6 +281,15 @@ CREATE INDEX IF NOT EXISTS idx_clinical_notes_patient_id ON clinical_notes(patie
 
 SQL
 
+# created_at/updated_at columns, deleted-rows log and their triggers (used by the app's delta sync)
+sudo -u $SUPERUSER psql -d $DBNAME -p $PORT < "$(dirname "$0")/Change_Tracking.sql"
+
+# Indexes behind the patient browser's name, phone, gender and age filters
+sudo -u $SUPERUSER psql -d $DBNAME -p $PORT < "$(dirname "$0")/Patient_Search_Indexes.sql"
+
+# patient_id default (P001, P002, ...) generated from a sequence
+sudo -u $SUPERUSER psql -d $DBNAME -p $PORT < "$(dirname "$0")/Patient_Id_Sequence.sql"
+
 echo "✅ All tables created successfully in database '$DBNAME'."
 echo ""
 echo "📋 Tables created:"
@@ -298,4 +308,5 @@ echo "   • hormonal_test (detailed hormone levels)"
 echo "   • mutation_analysis (CML specific mutations)"
 echo "   • tumor_marks (breast cancer markers)"
 echo "   • clinical_notes (visit records)"
+echo "   • deleted_rows (keys of deleted rows, for change tracking)"
 echo ""
\ No newline at end of file
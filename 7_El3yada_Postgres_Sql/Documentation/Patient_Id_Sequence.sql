@@ -0,0 +1,29 @@
+-- ============================================
+-- Patient ID Sequence
+-- ============================================
+-- Generates patient ids (P001, P002, ..., P1000, ...) in the database, so a
+-- registration is a single INSERT ... RETURNING patient_id and concurrent
+-- registrations can never get the same id.
+--
+-- Safe to run again, and on a database created before this script existed:
+--   psql -U <username> -d <dbname> -f Documentation/Patient_Id_Sequence.sql
+
+CREATE SEQUENCE IF NOT EXISTS patient_id_seq;
+ALTER SEQUENCE patient_id_seq OWNED BY patients.patient_id;
+
+-- At least three digits, never truncated
+CREATE OR REPLACE FUNCTION next_patient_id() RETURNS text AS $$
+    SELECT 'P' || lpad(n::text, greatest(3, length(n::text)), '0')
+    FROM nextval('patient_id_seq') AS n
+$$ LANGUAGE sql VOLATILE;
+
+-- Moves the sequence past the highest P<number> id, e.g. after patients were
+-- inserted with explicit ids (Documentation/insert_sample_data.py does this)
+CREATE OR REPLACE FUNCTION sync_patient_id_seq() RETURNS bigint AS $$
+    SELECT setval('patient_id_seq', coalesce(max(substring(patient_id FROM '^P([0-9]+)$')::bigint), 0) + 1, false)
+    FROM patients
+$$ LANGUAGE sql VOLATILE;
+
+ALTER TABLE patients ALTER COLUMN patient_id SET DEFAULT next_patient_id();
+
+SELECT sync_patient_id_seq();
@@ -0,0 +1,22 @@
+-- ============================================
+-- Patient Search Indexes
+-- ============================================
+-- Indexes behind the patient browser. Pages are read in (length(patient_id),
+-- patient_id) order, so P1000 sorts after P999 (keyset pagination); the other
+-- indexes only have to narrow down the filtered rows.
+--
+-- Safe to run again, and on a database created before this script existed:
+--   psql -U <username> -d <dbname> -f Documentation/Patient_Search_Indexes.sql
+
+-- Page order of the patient browser
+CREATE INDEX IF NOT EXISTS idx_patients_id_length ON patients ((length(patient_id)), patient_id);
+
+-- Name search matches anywhere in the name (ILIKE '%...%')
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+CREATE INDEX IF NOT EXISTS idx_patients_name_trgm ON patients USING gin (name gin_trgm_ops);
+
+-- Phone search matches from the start of the number (LIKE '...%')
+CREATE INDEX IF NOT EXISTS idx_patients_primary_phone_pattern ON patients(primary_phone_number text_pattern_ops);
+CREATE INDEX IF NOT EXISTS idx_patients_secondary_phone_pattern ON patients(secondary_phone_number text_pattern_ops);
+
+CREATE INDEX IF NOT EXISTS idx_patients_gender_age ON patients(gender, age);
@@ -117,6 +117,11 @@ def insert_patients(conn):
                              email, address, marital_status, notes)
         VALUES %s
     """, patients_data)
+
+    # Move the patient_id sequence (Patient_Id_Sequence.sql) past the ids inserted above
+    cur.execute("SELECT to_regproc('sync_patient_id_seq') IS NOT NULL")
+    if cur.fetchone()[0]:
+        cur.execute("SELECT sync_patient_id_seq()")
     
     conn.commit()
     cur.close()
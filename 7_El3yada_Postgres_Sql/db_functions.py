@@ -19,13 +19,17 @@ from streamlit_authenticator.utilities.exceptions import (CredentialsError,
 
 # PostgreSQL
 import psycopg2
-from psycopg2.extras import RealDictCursor
+from psycopg2 import sql
+from psycopg2.extras import RealDictCursor, Json, execute_values
 import psycopg2.pool
 
 #others
 import pandas as pd
-from datetime import datetime
+from datetime import datetime, timedelta
 import sys
+import json
+import threading
+import time
 import os
 from dotenv import load_dotenv  # pip install python-dotenv
 import yaml
@@ -75,56 +79,334 @@ def release_db_connection(conn):
 
 
 #==========================================================================#
-#                          Database Functions
+#                          Table Cache
 #==========================================================================#
 
+# Cached tables are shared by every session, so pages get their own copy: a page
+# that modifies its frame in place never changes the cached one
+QUERY_CACHE_ENTRIES = 256
 
-# Function to fetch data from the database
+
+# One version counter per table, shared by all sessions of the server process.
+# The write functions bump the counter of the table they change, so only the
+# cached queries of that table are refetched.
 @st.cache_resource
-def fetch_data(table_name):
+def table_versions():
+    return {'lock': threading.Lock(), 'versions': {}}
+
+
+def table_version(table_name):
+    return table_versions()['versions'].get(table_name, 0)
+
+
+def bump_table_version(*table_names):
+    state = table_versions()
+    with state['lock']:
+        for table_name in table_names:
+            state['versions'][table_name] = state['versions'].get(table_name, 0) + 1
+
+
+# Function to refetch tables changed outside the app (every table when none are given)
+def refresh_tables(*table_names):
+    if table_names:
+        bump_table_version(*table_names)
+    else:
+        _cached_query.clear()
+        bump_table_version(*TRACKED_TABLES)
+
+
+# Superseded versions are never requested again and age out of the LRU
+@st.cache_resource(max_entries=QUERY_CACHE_ENTRIES, show_spinner=False)
+def _cached_query(query, params, table_name, version):
     conn = get_db_connection()
     try:
-        cur = conn.cursor(cursor_factory=RealDictCursor)
-        cur.execute(f"SELECT * FROM {table_name}")
+        cur = conn.cursor()
+        cur.execute(query, params)
+        columns = [desc[0] for desc in cur.description]
         data = cur.fetchall()
         cur.close()
-        return [dict(row) for row in data]
-    except Exception as e:
-        print(f"Error fetching data from {table_name}: {e}")
-        return []
+        return pd.DataFrame.from_records(data, columns=columns)
+    except Exception:
+        conn.rollback()
+        raise
     finally:
         release_db_connection(conn)
 
 
-@st.cache_resource
-def fetch_name(id):
-    conn = get_db_connection()
+# Function to run a read-only query on one table through the table cache
+def fetch_query(table_name, query, params=()):
     try:
-        cur = conn.cursor(cursor_factory=RealDictCursor)
-        cur.execute("SELECT name FROM patients WHERE patient_id = %s", (id,))
-        result = cur.fetchone()
-        cur.close()
-        return result["name"] if result else None
+        df = _cached_query(query, tuple(params), table_name, table_version(table_name))
     except Exception as e:
-        print(f"Error fetching name: {e}")
-        return None
-    finally:
-        release_db_connection(conn)
+        # Failures are not cached: the next call queries the database again
+        print(f"Error fetching data from {table_name}: {e}")
+        return pd.DataFrame()
+    return df.copy()
+
 
+#==========================================================================#
+#                          Delta Sync
+#==========================================================================#
+
+# Tables with created_at/updated_at columns and a deleted-rows log
+# (Documentation/Change_Tracking.sql), by primary key column
+TRACKED_TABLES = {
+    'patients': 'patient_id',
+    'blood_test': 'test_id',
+    'hormonal_test': 'test_id',
+    'tumor_marks': 'test_id',
+    'mutation_analysis': 'test_id',
+    'clinical_notes': 'visit_id',
+}
+
+SYNC_INTERVAL_SECONDS = 30    # how often an unchanged table checks for writes made outside this server
+TRACKING_RETRY_SECONDS = 600  # how long an untracked table waits before it checks for change tracking again
+SYNC_OVERLAP = '5 minutes'    # rows are re-read this far back to catch transactions still open at the last sync
+DELETED_ROWS_RETENTION = timedelta(days=1)  # deleted_rows entries older than this are pruned
+PRUNE_INTERVAL_SECONDS = 3600  # how often this server prunes deleted_rows
+
+# Only used to find changed rows; the lab views slice rows by position, so pages never see them
+TRACKING_COLUMNS = ['created_at', 'updated_at']
+TRUNCATED = '*'               # row_id logged for a TRUNCATE of the whole table
+
+# One query returns the database clock, the last truncate, the keys deleted and the rows
+# changed since the last sync; the LEFT JOIN keeps a single row (with NULL table columns)
+# when nothing changed
+DELTA_QUERY = """
+    SELECT now() AS _synced_at,
+           (SELECT max(deleted_at) FROM deleted_rows
+            WHERE table_name = %(table_name)s AND row_id = %(truncated)s
+              AND deleted_at > %(since)s::timestamptz - %(overlap)s::interval) AS _truncated_at,
+           ARRAY(SELECT row_id FROM deleted_rows
+                 WHERE table_name = %(table_name)s AND row_id <> %(truncated)s
+                   AND deleted_at > %(since)s::timestamptz - %(overlap)s::interval) AS _deleted_ids,
+           changed.*
+    FROM (SELECT 1) AS anchor
+    LEFT JOIN (SELECT * FROM {table_name}
+               WHERE updated_at > %(since)s::timestamptz - %(overlap)s::interval) AS changed ON true
+"""
+
+
+# When this server last pruned deleted_rows, shared by all sessions of the server process
 @st.cache_resource
-def fetch_project(project_id):
-    conn = get_db_connection()
+def _prune_state():
+    return {'lock': threading.Lock(), 'next_at': 0}
+
+
+# Function to drop deleted_rows entries older than DELETED_ROWS_RETENTION. No sync needs
+# them: a table last synced before the retention window is reloaded in full instead
+def prune_deleted_rows(cur):
+    state = _prune_state()
+    with state['lock']:
+        if time.monotonic() < state['next_at']:
+            return
+        state['next_at'] = time.monotonic() + PRUNE_INTERVAL_SECONDS
+    # A failed prune (e.g. no DELETE permission) must not undo the sync around it
+    cur.execute("SAVEPOINT prune_deleted_rows")
     try:
-        cur = conn.cursor(cursor_factory=RealDictCursor)
-        cur.execute("SELECT * FROM projects WHERE id = %s", (project_id,))
-        data = cur.fetchall()
-        cur.close()
-        return [dict(row) for row in data]
+        cur.execute("DELETE FROM deleted_rows WHERE deleted_at < now() - %s", (DELETED_ROWS_RETENTION,))
+        cur.execute("RELEASE SAVEPOINT prune_deleted_rows")
+    except psycopg2.Error as e:
+        cur.execute("ROLLBACK TO SAVEPOINT prune_deleted_rows")
+        print(f"Error pruning deleted_rows: {e}")
+
+
+# In-memory copy of each tracked table, shared by all sessions of the server process
+@st.cache_resource
+def synced_tables():
+    return {table_name: {'lock': threading.Lock(), 'df': None, 'retry_at': 0} for table_name in TRACKED_TABLES}
+
+
+def _load_table(cur, table_name):
+    cur.execute("SELECT now()")
+    synced_at = cur.fetchone()[0]
+    cur.execute(f"SELECT * FROM {table_name} ORDER BY {TRACKED_TABLES[table_name]}")
+    columns = [desc[0] for desc in cur.description]
+    df = pd.DataFrame.from_records(cur.fetchall(), columns=columns)
+    return df.drop(columns=TRACKING_COLUMNS, errors='ignore'), synced_at, 'updated_at' in columns
+
+
+def _fetch_delta(cur, table_name, since):
+    cur.execute(DELTA_QUERY.format(table_name=table_name),
+                {'table_name': table_name, 'since': since, 'overlap': SYNC_OVERLAP, 'truncated': TRUNCATED})
+    columns = [desc[0] for desc in cur.description][3:]
+    data = cur.fetchall()
+    synced_at, truncated_at, deleted_ids = data[0][:3]
+    key_position = columns.index(TRACKED_TABLES[table_name])
+    changed = [row[3:] for row in data if row[3 + key_position] is not None]
+    changed = pd.DataFrame.from_records(changed, columns=columns).drop(columns=TRACKING_COLUMNS)
+    return changed, deleted_ids, synced_at, truncated_at
+
+
+def merge_delta(df, key, changed, deleted_ids):
+    """Replace changed rows (matched on ``key``), drop deleted keys and keep the frame sorted by key"""
+    if changed.empty and not deleted_ids:
+        return df
+    if pd.api.types.is_integer_dtype(df[key]):
+        # deleted_rows stores every key as text
+        deleted_ids = [int(row_id) for row_id in deleted_ids]
+    stale = df[key].isin(changed[key]) | df[key].isin(deleted_ids)
+    if changed.empty:
+        return df[~stale].reset_index(drop=True)
+    return pd.concat([df[~stale], changed], ignore_index=True).sort_values(key, ignore_index=True)
+
+
+# Function to bring the in-memory copy of a tracked table up to date
+def sync_table(table_name):
+    entry = synced_tables()[table_name]
+    with entry['lock']:
+        version = table_version(table_name)
+        if entry['df'] is not None and entry['version'] == version and (
+                time.monotonic() < entry['retry_at'] if not entry['tracked']
+                else time.monotonic() - entry['checked_at'] < SYNC_INTERVAL_SECONDS):
+            return entry['df']
+
+        conn = get_db_connection()
+        try:
+            cur = conn.cursor()
+            if entry['df'] is not None and entry['tracked']:
+                try:
+                    changed, deleted_ids, synced_at, truncated_at = _fetch_delta(cur, table_name, entry['synced_at'])
+                    if synced_at - entry['synced_at'] > DELETED_ROWS_RETENTION:
+                        # Deletes logged since the last sync may already have been pruned
+                        entry['df'] = None
+                    elif truncated_at is not None and truncated_at != entry.get('truncated_at'):
+                        entry['df'], entry['truncated_at'] = None, truncated_at
+                    else:
+                        entry['df'] = merge_delta(entry['df'], TRACKED_TABLES[table_name], changed, deleted_ids)
+                        entry['synced_at'] = synced_at
+                        prune_deleted_rows(cur)
+                except psycopg2.ProgrammingError as e:
+                    conn.rollback()
+                    print(f"Delta sync unavailable for {table_name}, reloading it in full: {e}")
+                    entry['tracked'] = False
+                    entry['retry_at'] = time.monotonic() + TRACKING_RETRY_SECONDS
+            if entry['df'] is None or not entry['tracked']:
+                entry['df'], entry['synced_at'], tracked = _load_table(cur, table_name)
+                # Without Documentation/Change_Tracking.sql the table is reloaded in full whenever
+                # the app writes to it, and every TRACKING_RETRY_SECONDS to pick the script up
+                # once it is applied; a failed delta sync backs off for the same time
+                entry['tracked'] = tracked and time.monotonic() >= entry['retry_at']
+                if not tracked:
+                    entry['retry_at'] = time.monotonic() + TRACKING_RETRY_SECONDS
+            cur.close()
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            release_db_connection(conn)
+        entry['version'], entry['checked_at'] = version, time.monotonic()
+        return entry['df']
+
+
+# Function to fetch data from the database
+def fetch_data(table_name):
+    if table_name not in TRACKED_TABLES:
+        return fetch_query(table_name, f"SELECT * FROM {table_name}")
+    try:
+        df = sync_table(table_name)
     except Exception as e:
-        print(f"Error fetching project: {e}")
-        return []
-    finally:
-        release_db_connection(conn)
+        print(f"Error fetching data from {table_name}: {e}")
+        return pd.DataFrame()
+    return df.copy()
+
+
+def fetch_name(id):
+    result = fetch_query("patients", "SELECT name FROM patients WHERE patient_id = %s", (id,))
+    return result["name"].iloc[0] if not result.empty else None
+
+
+def fetch_project(project_id):
+    return fetch_query("projects", "SELECT * FROM projects WHERE id = %s", (project_id,)).to_dict("records")
+
+
+#==========================================================================#
+#                          Patient Browser Queries
+#==========================================================================#
+
+PATIENT_PAGE_SIZE = 50
+PATIENT_COUNT_CAP = 10_000    # filtered counts are exact up to this many patients and estimated above it
+
+
+def _like_pattern(text, prefix=False):
+    escaped = text.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+    return f"{escaped}%" if prefix else f"%{escaped}%"
+
+
+# Function to turn the browser filters into SQL conditions and their parameters
+def patient_filter_clause(name="", phone="", gender="", min_age=None, max_age=None):
+    conditions, params = [], []
+    if name:
+        conditions.append("name ILIKE %s")
+        params.append(_like_pattern(name.strip()))
+    if phone:
+        conditions.append("(primary_phone_number LIKE %s OR secondary_phone_number LIKE %s)")
+        params += [_like_pattern(phone.strip(), prefix=True)] * 2
+    if gender:
+        conditions.append("gender = %s")
+        params.append(gender)
+    if min_age is not None:
+        conditions.append("age >= %s")
+        params.append(min_age)
+    if max_age is not None:
+        conditions.append("age <= %s")
+        params.append(max_age)
+    return conditions, params
+
+
+def _where(conditions):
+    return f" WHERE {' AND '.join(conditions)}" if conditions else ""
+
+
+# Function to fetch one page of patients after the patient_id `after` (keyset pagination:
+# the cost of a page does not depend on how far into the registry it is). Ids are ordered
+# by length first so P1000 comes after P999, not between P100 and P101
+def fetch_patients_page(filters, after=None, page_size=PATIENT_PAGE_SIZE):
+    conditions, params = patient_filter_clause(**filters)
+    if after is not None:
+        conditions.append("(length(patient_id), patient_id) > (length(%s), %s)")
+        params.extend([after, after])
+    page = fetch_query(
+        "patients",
+        f"SELECT * FROM patients{_where(conditions)} ORDER BY length(patient_id), patient_id LIMIT %s",
+        params + [page_size + 1]
+    ).drop(columns=TRACKING_COLUMNS, errors='ignore')
+    return page.iloc[:page_size], len(page) > page_size
+
+
+# Function to count the patients matching the filters; returns (count, exact)
+def count_patients(filters):
+    conditions, params = patient_filter_clause(**filters)
+    counted = fetch_query(
+        "patients",
+        f"SELECT count(*) AS n FROM (SELECT 1 FROM patients{_where(conditions)} LIMIT %s) AS capped",
+        params + [PATIENT_COUNT_CAP + 1]
+    )
+    if counted.empty:
+        return 0, True
+    if int(counted["n"].iloc[0]) <= PATIENT_COUNT_CAP:
+        return int(counted["n"].iloc[0]), True
+    # Past the cap, the planner's row estimate avoids scanning the whole registry
+    plan = fetch_query("patients", f"EXPLAIN (FORMAT JSON) SELECT 1 FROM patients{_where(conditions)}", params)
+    plan = plan.iloc[0, 0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return max(int(plan[0]["Plan"]["Plan Rows"]), PATIENT_COUNT_CAP + 1), False
+
+
+def phone_registered(phone_number):
+    found = fetch_query(
+        "patients",
+        "SELECT 1 FROM patients WHERE primary_phone_number = %s OR secondary_phone_number = %s LIMIT 1",
+        (phone_number, phone_number)
+    )
+    return not found.empty
+
+
+#==========================================================================#
+#                          Database Functions
+#==========================================================================#
 
 
 # function to add new project 
@@ -138,6 +420,7 @@ def add_project(project_name):
         )
         data = cur.fetchall()
         conn.commit()
+        bump_table_version("projects")
         cur.close()
         return [dict(row) for row in data]
     except Exception as e:
@@ -160,6 +443,7 @@ def update_project(project_name, project_id):
         )
         data = cur.fetchall()
         conn.commit()
+        bump_table_version("projects")
         cur.close()
         return [dict(row) for row in data]
     except Exception as e:
@@ -177,6 +461,7 @@ def delete_project(project_id):
         cur.execute("DELETE FROM projects WHERE id = %s RETURNING *", (project_id,))
         data = cur.fetchall()
         conn.commit()
+        bump_table_version("projects")
         cur.close()
         return [dict(row) for row in data]
     except Exception as e:
@@ -196,35 +481,19 @@ def add_patient(name, gender, age, birth_date, primary_phone_number, secondary_p
     conn = get_db_connection()
     try:
         cur = conn.cursor()
-        
-        # Generate next patient_id
-        cur.execute("SELECT patient_id FROM patients ORDER BY patient_id DESC LIMIT 1")
-        result = cur.fetchone()
-        
-        if result and result[0]:
-            # Extract number from last patient_id (e.g., 'P050' -> 50)
-            last_id = result[0]
-            if last_id.startswith('P'):
-                last_num = int(last_id[1:])
-                new_num = last_num + 1
-            else:
-                new_num = 1
-        else:
-            # No patients yet, start with 1
-            new_num = 1
-        
-        # Format as P001, P002, etc.
-        patient_id = f"P{str(new_num).zfill(3)}"
-        
+        # patient_id comes from its default, next_patient_id() (Documentation/Patient_Id_Sequence.sql)
         cur.execute(
             """INSERT INTO patients 
-            (patient_id, name, gender, age, birth_date, primary_phone_number, secondary_phone_number, 
+            (name, gender, age, birth_date, primary_phone_number, secondary_phone_number, 
              address, emergency_phone_number, emergency_name, email, marital_status, notes)
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)""",
-            (patient_id, name, gender, age, birth_date, primary_phone_number, secondary_phone_number,
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+            RETURNING patient_id""",
+            (name, gender, age, birth_date, primary_phone_number, secondary_phone_number,
              address, emergency_phone_number, emergency_name, email, marital_status, notes)
         )
+        patient_id = cur.fetchone()[0]
         conn.commit()
+        bump_table_version("patients")
         cur.close()
         print(f"✅ Successfully added patient with ID: {patient_id}")
         return patient_id
@@ -250,6 +519,7 @@ def add_blood_test(patient_id, test_date,test_name,test_results):
             (patient_id, test_date, test_name, test_results_json)
         )
         conn.commit()
+        bump_table_version("blood_test")
         cur.close()
     except Exception as e:
         conn.rollback()
@@ -274,6 +544,7 @@ def add_hormon_test(patient_id, test_date,
              follicle_stimulating_hormone, testosterone_levels, thyroid_tsh, thyroid_t3, thyroid_t4, notes)
         )
         conn.commit()
+        bump_table_version("hormonal_test")
         cur.close()
     except Exception as e:
         conn.rollback()
@@ -297,6 +568,7 @@ def add_tumor_marks(patient_id, test_date,
             (patient_id, test_date, ca_15_3, ca_27_29, carcinoembryonic_antigen, her2_neu, muc1)
         )
         conn.commit()
+        bump_table_version("tumor_marks")
         cur.close()
     except Exception as e:
         conn.rollback()
@@ -321,6 +593,7 @@ def add_mutation_analysis(patient_id, test_date,
              t315i_mutation, f317l_mutation, e255k_mutation, g250e_mutation, m351t_mutation, v299l_mutation)
         )
         conn.commit()
+        bump_table_version("mutation_analysis")
         cur.close()
     except Exception as e:
         conn.rollback()
@@ -341,6 +614,7 @@ def update_patients(data, patient_id):
         )
         result = cur.fetchall()
         conn.commit()
+        bump_table_version("patients")
         cur.close()
         return [dict(row) for row in result]
     except Exception as e:
@@ -358,6 +632,7 @@ def delete_patient(patient_id):
         cur.execute("DELETE FROM patients WHERE patient_id = %s RETURNING *", (patient_id,))
         result = cur.fetchall()
         conn.commit()
+        bump_table_version("patients")
         cur.close()
         return [dict(row) for row in result]
     except Exception as e:
@@ -368,6 +643,137 @@ def delete_patient(patient_id):
         release_db_connection(conn)
 
 
+#==========================================================================#
+#                          Bulk Patient Changes
+#==========================================================================#
+
+EDITABLE_PATIENT_COLUMNS = [
+    'name', 'gender', 'age', 'birth_date', 'primary_phone_number', 'secondary_phone_number',
+    'address', 'emergency_phone_number', 'emergency_name', 'email', 'marital_status', 'notes',
+]
+
+
+def _plain_value(value):
+    if pd.isna(value):
+        return None
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    if isinstance(value, (datetime, pd.Timestamp)):
+        return value.isoformat()
+    return value
+
+
+# Function to find the cells changed between two versions of the same patients
+# (matched on patient_id); returns {patient_id: {column: new value}}
+def patient_changes(original, edited, columns=EDITABLE_PATIENT_COLUMNS):
+    original = pd.DataFrame(original).set_index("patient_id")
+    edited = pd.DataFrame(edited).set_index("patient_id")
+    columns = [col for col in columns if col in edited.columns and col in original.columns]
+    before = original.reindex(edited.index)[columns]
+    after = edited[columns]
+    # Values coming back from the grid may change type (e.g. 45 -> 45.0 or "45"), so compare their text
+    as_text = lambda value: str(_plain_value(value))
+    changed = before.map(as_text) != after.map(as_text)
+    changes = {}
+    for patient_id, row in changed[changed.any(axis=1)].iterrows():
+        changes[patient_id] = {col: _plain_value(after.at[patient_id, col]) for col in columns if row[col]}
+    return changes
+
+
+# Function to update several patients in one statement and one transaction. Each row
+# only sends its changed columns; jsonb_populate_record overlays them on the stored
+# row, so Postgres converts the types and untouched columns keep their values.
+def update_patients_bulk(changes):
+    if not changes:
+        return []
+    columns = sorted({col for row in changes.values() for col in row})
+    unknown = set(columns) - set(EDITABLE_PATIENT_COLUMNS)
+    if unknown:
+        print(f"Error updating patients: not editable {sorted(unknown)}")
+        return []
+    query = sql.SQL("""
+        UPDATE patients AS p
+        SET ({columns}) = (SELECT {new_values} FROM jsonb_populate_record(p, v.changes) AS r)
+        FROM (VALUES %s) AS v(patient_id, changes)
+        WHERE p.patient_id = v.patient_id
+        RETURNING p.*
+    """).format(
+        columns=sql.SQL(", ").join(map(sql.Identifier, columns)),
+        new_values=sql.SQL(", ").join(sql.SQL("r.{}").format(sql.Identifier(col)) for col in columns),
+    )
+    rows = [(patient_id, Json(row)) for patient_id, row in changes.items()]
+    conn = get_db_connection()
+    try:
+        cur = conn.cursor(cursor_factory=RealDictCursor)
+        result = execute_values(cur, query, rows, template="(%s, %s::jsonb)", page_size=len(rows), fetch=True)
+        if len(result) != len(rows):
+            raise ValueError(f"{len(rows) - len(result)} of the patients no longer exist")
+        conn.commit()
+        bump_table_version("patients")
+        cur.close()
+        return [dict(row) for row in result]
+    except Exception as e:
+        conn.rollback()
+        print(f"Error updating patients: {e}")
+        return []
+    finally:
+        release_db_connection(conn)
+
+
+# Function to register many patients at once (e.g. an import). `patients` is a DataFrame or a
+# list of dicts with EDITABLE_PATIENT_COLUMNS; ids are assigned by the database. Returns the
+# new patient ids in input order, or [] when any row fails (nothing is inserted then).
+def add_patients_bulk(patients, page_size=1000):
+    patients = pd.DataFrame(patients)
+    columns = [col for col in EDITABLE_PATIENT_COLUMNS if col in patients.columns]
+    if patients.empty or not columns:
+        return []
+    rows = [tuple(_plain_value(value) for value in row) for row in patients[columns].itertuples(index=False)]
+    query = sql.SQL("INSERT INTO patients ({columns}) VALUES %s RETURNING patient_id").format(
+        columns=sql.SQL(", ").join(map(sql.Identifier, columns))
+    )
+    conn = get_db_connection()
+    try:
+        cur = conn.cursor()
+        result = execute_values(cur, query, rows, page_size=page_size, fetch=True)
+        conn.commit()
+        bump_table_version("patients")
+        cur.close()
+        return [row[0] for row in result]
+    except Exception as e:
+        conn.rollback()
+        print(f"❌ Error adding patients: {e}")
+        return []
+    finally:
+        release_db_connection(conn)
+
+
+# Function to delete several patients in one statement; nothing is deleted unless all of them are
+def delete_patients_bulk(patient_ids):
+    patient_ids = list(dict.fromkeys(patient_ids))
+    if not patient_ids:
+        return []
+    conn = get_db_connection()
+    try:
+        cur = conn.cursor(cursor_factory=RealDictCursor)
+        cur.execute("DELETE FROM patients WHERE patient_id = ANY(%s) RETURNING *", (patient_ids,))
+        result = cur.fetchall()
+        if len(result) != len(patient_ids):
+            raise ValueError(f"{len(patient_ids) - len(result)} of the patients no longer exist")
+        conn.commit()
+        bump_table_version("patients")
+        cur.close()
+        return [dict(row) for row in result]
+    except Exception as e:
+        conn.rollback()
+        print(f"Error deleting patients: {e}")
+        return []
+    finally:
+        release_db_connection(conn)
+
+
 def make_states():
     if 'patients_df' not in st.session_state:
         st.session_state["patients_df"] = pd.DataFrame([], columns=[])
@@ -392,10 +798,11 @@ def make_states():
 
 
 def aggrid_dis(data, label, sublabel, selection="single"):
-    colored_header(
-    label=label,
-    description=sublabel,
-    color_name="violet-70")
+    if label:
+        colored_header(
+        label=label,
+        description=sublabel,
+        color_name="violet-70")
 
     # Check if dataframe is empty
     if data.empty:
@@ -431,6 +838,54 @@ def aggrid_dis(data, label, sublabel, selection="single"):
 
 
 
+def patient_browser(key, label="Patients", sublabel="Filter patients by name, phone, gender and age"):
+    colored_header(
+    label=label,
+    description=sublabel,
+    color_name="violet-70")
+
+    col1, col2, col3, col4 = st.columns([2, 1.5, 1, 2])
+    with col1:
+        name = st.text_input("Name", key=f"{key}_name")
+    with col2:
+        phone = st.text_input("Phone", key=f"{key}_phone")
+    with col3:
+        gender = st.selectbox("Gender", ["", "Male", "Female"], key=f"{key}_gender")
+    with col4:
+        min_age, max_age = st.slider("Age", 0, 120, (0, 120), key=f"{key}_age")
+    filters = {
+        'name': name,
+        'phone': phone,
+        'gender': gender,
+        'min_age': min_age if min_age > 0 else None,
+        'max_age': max_age if max_age < 120 else None,
+    }
+
+    # Keyset cursors: the last patient_id of every page before the current one
+    if st.session_state.get(f"{key}_filters") != filters:
+        st.session_state[f"{key}_filters"] = filters
+        st.session_state[f"{key}_cursors"] = [None]
+    cursors = st.session_state[f"{key}_cursors"]
+
+    page, has_next = fetch_patients_page(filters, after=cursors[-1])
+    total, exact = count_patients(filters)
+
+    col1, col2, col3 = st.columns([1, 4, 1])
+    with col1:
+        if st.button("◀ Previous", key=f"{key}_previous", disabled=len(cursors) == 1):
+            cursors.pop()
+            st.rerun()
+    with col2:
+        shown = f"{total:,}" if exact else f"about {total:,}"
+        st.markdown(f"<p style='text-align:center'>Page {len(cursors)} · {shown} matching patients</p>", unsafe_allow_html=True)
+    with col3:
+        if st.button("Next ▶", key=f"{key}_next", disabled=not has_next):
+            cursors.append(page["patient_id"].iloc[-1])
+            st.rerun()
+    return page
+
+
+
 #==========================================================================#
 #                          Other Functions
 #==========================================================================#
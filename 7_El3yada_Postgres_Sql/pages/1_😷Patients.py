@@ -111,9 +111,7 @@ def add_new_patient():
             elif "nationalNumber" not in prim_phone:
                 st.error("Primary Number is not correct")
             
-            elif ( 
-                    prim_phone["nationalNumber"] in st.session_state["patients_df"]["primary_phone_number"].values or 
-                    prim_phone["nationalNumber"] in st.session_state["patients_df"]["secondary_phone_number"].values):
+            elif phone_registered(prim_phone["nationalNumber"]):
                 st.warning("Patient already exsits.")
 
             # elif secon_phone:
@@ -144,8 +142,6 @@ def add_new_patient():
                     placeholder.error("❌ Failed to add patient. Check console for errors.")
                 time.sleep(2)
                 placeholder.empty()
-                fetch_data.clear()
-                st.session_state["patients_df"] = pd.DataFrame(fetch_data("patients"))  
                 st.rerun()
 
 
@@ -171,7 +167,8 @@ def edit_patient():
     if 'reset' not in st.session_state:
         st.session_state['reset'] = False
     ##########################################################
-    gd = GridOptionsBuilder.from_dataframe(st.session_state["patients_df"])
+    patients_page = patient_browser("edit_browser", label="Find Patients")
+    gd = GridOptionsBuilder.from_dataframe(patients_page)
     gd.configure_pagination(enabled=True)
     gd.configure_column("patient_id", header_name="patient_id",minWidth=100, cellStyle={'textAlign': 'center'})
     gd.configure_column("age", header_name="age",maxWidth=75, cellStyle={'textAlign': 'right'})
@@ -208,7 +205,7 @@ def edit_patient():
         st.rerun()
     #################################################################
 # Display the custom CSS
-    grid_table = AgGrid(st.session_state["patients_df"],gridOptions=gridoptions,
+    grid_table = AgGrid(patients_page,gridOptions=gridoptions,
                             update_mode=GridUpdateMode.MODEL_CHANGED | GridUpdateMode.SELECTION_CHANGED,
                             height = 400,
                             allow_unsafe_jscode=True,
@@ -268,30 +265,16 @@ def edit_patient():
             selected_data2["marital_status"] = selected_data2["marital_status"].apply(lambda x:x.title())
             # selected_data2
             if st.button("Submit"):
-                # tasks_str = ""
-                for index, row in selected_data2.iterrows():
-                    # tasks_str += f"{row['task']},"  
-                    data = {
-                        'name': row['name'],
-                        'gender': row['gender'],
-                        'age': row['age'],
-                        'birth_date': str(row['birth_date']),
-                        'primary_phone_number': row['primary_phone_number'],
-                        'secondary_phone_number': row['secondary_phone_number'],
-                        'address': row['address'],
-                        'emergency_phone_number': row['emergency_phone_number'],
-                        'emergency_name': row['emergency_name'],
-                        'email': row['email'],
-                        'marital_status': row['marital_status'],
-                        'notes': row['notes'],
-                    }
-                    update_patients(data, row["patient_id"])
-                    # supabase.table('tasks').update(data).eq('id', id).execute()
+                changes = patient_changes(grid_table["selected_rows"], selected_data2)
                 placeholder2 = st.empty()
-                placeholder2.success("Patients information Updated successfully")
+                if not changes:
+                    placeholder2.warning("No changes to submit")
+                elif update_patients_bulk(changes):
+                    placeholder2.success("Patients information Updated successfully")
+                else:
+                    placeholder2.error("❌ Failed to update patients, no changes were saved. Check console for errors.")
                 time.sleep(2)
                 placeholder2.empty()
-                st.session_state["patients_df"] = pd.DataFrame(fetch_data("patients"))  
                 st.session_state['reset'] = True
                 st.rerun()
 
@@ -317,7 +300,8 @@ def delete_patients():
     ##########################################################
 
 
-    gd6 = GridOptionsBuilder.from_dataframe(st.session_state["patients_df"])
+    patients_page = patient_browser("delete_browser", label="Find Patients")
+    gd6 = GridOptionsBuilder.from_dataframe(patients_page)
 
     gd6.configure_pagination(enabled=True)
 
@@ -352,7 +336,7 @@ def delete_patients():
     #################################################################
 
 # Display the custom CSS
-    grid_table = AgGrid(st.session_state["patients_df"],gridOptions=gridoptions,
+    grid_table = AgGrid(patients_page,gridOptions=gridoptions,
                             update_mode=GridUpdateMode.MODEL_CHANGED | GridUpdateMode.SELECTION_CHANGED,
                             height = 500,
                             allow_unsafe_jscode=True,
@@ -369,15 +353,13 @@ def delete_patients():
         selected_data = pd.DataFrame(grid_table["selected_rows"])
         projs = ""
         if st.button("Delete Patient"):
-            for index, row in selected_data.iterrows():
-                    delete_patient(row["patient_id"])
             placeholder8 = st.empty()
-            # placeholder8.success(f"{row['task']} Task successfully Deleted")
-            placeholder8.success('The selected patients successfully deleted')
+            if delete_patients_bulk(selected_data["patient_id"].tolist()):
+                placeholder8.success('The selected patients successfully deleted')
+            else:
+                placeholder8.error("❌ Failed to delete patients, none were deleted. Check console for errors.")
             time.sleep(2)
             placeholder8.empty()
-            fetch_data.clear()
-            st.session_state["patients_df"] = pd.DataFrame(fetch_data("patients"))  
             st.session_state['reset'] = True
             st.rerun()
 
@@ -404,9 +386,6 @@ if __name__ == "__main__":
         st.sidebar.image(logo_path, use_container_width=True)
         col1, col2, col3, col4, col5, col6 = st.columns(6)
 
-        df = pd.DataFrame(fetch_data("patients"))
-        st.session_state["patients_df"] = df
-
         tabs = st.tabs(["Patient Summary","Add New Patient", "Edit Patient", "Delete Patient"])
 
         with tabs[0]:
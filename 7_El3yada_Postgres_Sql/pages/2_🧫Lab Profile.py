@@ -62,11 +62,11 @@ authenticator = stauth.Authenticate(
 ########################################################
 #                       Data                          #
 ########################################################
-patients_df = pd.DataFrame(fetch_data("patients"))
-blood_df = pd.DataFrame(fetch_data("blood_test"))
-hormon_df = pd.DataFrame(fetch_data("hormonal_test"))
-tumer_marks_df = pd.DataFrame(fetch_data("tumor_marks"))
-mutation_analysis_df = pd.DataFrame(fetch_data("mutation_analysis"))
+patients_df = fetch_data("patients")
+blood_df = fetch_data("blood_test")
+hormon_df = fetch_data("hormonal_test")
+tumer_marks_df = fetch_data("tumor_marks")
+mutation_analysis_df = fetch_data("mutation_analysis")
 
 # Debug: Print columns to help diagnose issues
 with st.expander("🔍 Debug: Database Connection Info", expanded=False):
@@ -189,7 +189,7 @@ if __name__ == "__main__":
         col1, col2, col3 = st.columns(3)
         with col1:
             if st.button("⚡"):
-                fetch_data.clear()
+                refresh_tables()
                 st.rerun()
 
         #----------------------------- Make Tabs--------------------------------------
@@ -363,9 +363,7 @@ if __name__ == "__main__":
                             placeholder.success(f"Lab Results added successfully.")
                             time.sleep(1.5)
                             placeholder.empty()
-                            fetch_data.clear()
-                            st.session_state["blood_df"] = pd.DataFrame(fetch_data("blood_df"))  
-                            st.session_state["patients_df"] = pd.DataFrame(fetch_data("patients")) 
+                            st.session_state["blood_df"] = fetch_data("blood_test")  
                             st.rerun()
 
 
@@ -420,9 +418,7 @@ if __name__ == "__main__":
                             placeholder.success(f"Lab Results added successfully.")
                             time.sleep(1.5)
                             placeholder.empty()
-                            fetch_data.clear()
-                            st.session_state["hormonal_df"] = pd.DataFrame(fetch_data("hormonal_test"))  
-                            st.session_state["patients_df"] = pd.DataFrame(fetch_data("patients")) 
+                            st.session_state["hormonal_df"] = fetch_data("hormonal_test")  
                             st.rerun()
 
             
@@ -474,9 +470,7 @@ if __name__ == "__main__":
                             placeholder.success(f"Lab Results added successfully.")
                             time.sleep(1.5)
                             placeholder.empty()
-                            fetch_data.clear()
-                            st.session_state["tumer_marks_df"] = pd.DataFrame(fetch_data("tumor_marks"))  
-                            st.session_state["patients_df"] = pd.DataFrame(fetch_data("patients")) 
+                            st.session_state["tumer_marks_df"] = fetch_data("tumor_marks")  
                             st.rerun()
 
             
@@ -536,9 +530,7 @@ if __name__ == "__main__":
                             placeholder.success(f"Lab Results added successfully.")
                             time.sleep(1.5)
                             placeholder.empty()
-                            fetch_data.clear()
-                            st.session_state["mutation_analysis_df"] = pd.DataFrame(fetch_data("mutation_analysis"))  
-                            st.session_state["patients_df"] = pd.DataFrame(fetch_data("patients"))  
+                            st.session_state["mutation_analysis_df"] = fetch_data("mutation_analysis")  
                             st.rerun()
 
 
@@ -54,7 +54,7 @@ authenticator = stauth.Authenticate(
 
 
 
-clinical_notes_df = pd.DataFrame(fetch_data("clinical_notes"))
+clinical_notes_df = fetch_data("clinical_notes")
 st.session_state["clinical_notes_df"] = clinical_notes_df
 
 
@@ -82,9 +82,9 @@ if __name__ == "__main__":
         col1, col2, col3 = st.columns(3)
         with col1:
             if st.button("⚡"):
-                fetch_data.clear()
+                refresh_tables()
                 st.rerun()
-        df = pd.DataFrame(fetch_data("patients"))
+        df = fetch_data("patients")
         # st.session_state["patients_df"] = df
         # selected_rows = aggrid_dis(df, "All Patients Information", "", "single")
 
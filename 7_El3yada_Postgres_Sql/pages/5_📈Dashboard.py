@@ -285,10 +285,10 @@ def line_chart(df):
     
     st.plotly_chart(fig)
 
-patients_df = pd.DataFrame(fetch_data("patients"))
+patients_df = fetch_data("patients")
 st.session_state["patients_df"] = patients_df
 
-clinical_notes_df = pd.DataFrame(fetch_data("clinical_notes"))
+clinical_notes_df = fetch_data("clinical_notes")
 st.session_state["clinical_notes_df"] = clinical_notes_df
 
 #==========================================================================#
@@ -313,7 +313,7 @@ if __name__ == "__main__":
         col1, col2, col3 = st.columns(3)
         with col1:
             if st.button("⚡"):
-                fetch_data.clear()
+                refresh_tables()
                 st.rerun()
 
         col1 , col2 = st.columns(2)